@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Longest pause between attempts to resume an interrupted change stream
+MAX_RESUME_DELAY = 30.0
+# Server error codes meaning the deployment cannot run change streams at all
+_UNSUPPORTED_CODES = {20, 40573}  # IllegalOperation, not a replica set
+# The resume token fell off the oplog; the stream has to start afresh
+_HISTORY_LOST_CODES = {280, 286}
+
+
+def change_streams_unsupported(exc: PyMongoError) -> bool:
+    """Whether ``exc`` means change streams never work on this deployment."""
+    if not isinstance(exc, OperationFailure):
+        return False
+    if exc.code in _UNSUPPORTED_CODES:
+        return True
+    return "only supported on replica sets" in str(exc)
+
+
+def in_scope(doc: Dict[str, Any], scope: Dict[str, Any]) -> bool:
+    return all(doc.get(key) == value for key, value in scope.items())
+
+
+def project_card(doc: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    return {f: doc[f] for f in fields if f in doc}
+
+
+def diff_cards(
+    previous: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Return the card deltas that turn ``previous`` into ``current``."""
+    deltas: List[Dict[str, Any]] = []
+    for card_id, card in current.items():
+        if previous.get(card_id) != card:
+            deltas.append({"op": "upsert", "card": card})
+    for card_id in previous:
+        if card_id not in current:
+            deltas.append({"op": "delete", "id": card_id})
+    return deltas
+
+
+@dataclass
+class _Channel:
+    scope: Dict[str, Any]
+    subscribers: Set[asyncio.Queue] = field(default_factory=set)
+    task: Optional[asyncio.Task] = None
+
+
+class BoardFeed:
+    """Fan out card-level task changes to subscribers of a board scope.
+
+    Each distinct scope (e.g. ``{"discipline": "eng", "project_id": "p1"}``)
+    gets one producer shared by all of its subscribers. The producer follows
+    a change stream on the collection; where change streams are unavailable
+    (standalone servers) it falls back to polling the projected cards of the
+    scope and diffing consecutive snapshots.
+    """
+
+    def __init__(
+        self,
+        collection,
+        fields: Iterable[str],
+        poll_interval: float = 2.0,
+        use_change_streams: bool = True,
+        max_queue: int = 1000,
+    ):
+        self.collection = collection
+        self.fields = tuple(fields)
+        self.poll_interval = poll_interval
+        self.use_change_streams = use_change_streams
+        self.max_queue = max_queue
+        self._channels: Dict[tuple, _Channel] = {}
+
+    @property
+    def projection(self) -> Dict[str, int]:
+        return {"_id": 0, **{f: 1 for f in self.fields}}
+
+    async def subscribe(
+        self, scope: Dict[str, Any], heartbeat: float = 15.0
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield deltas for ``scope``; ``None`` is yielded after ``heartbeat``
+        seconds without changes so callers can keep the connection alive.
+
+        A ``{"op": "resync"}`` delta means the subscriber fell too far
+        behind and should refetch the board.
+        """
+        key = tuple(sorted(scope.items()))
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel(dict(scope))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        channel.subscribers.add(queue)
+        if channel.task is None or channel.task.done():
+            channel.task = asyncio.create_task(self._produce(channel))
+        try:
+            while True:
+                try:
+                    delta = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    delta = None
+                yield delta
+        finally:
+            channel.subscribers.discard(queue)
+            if not channel.subscribers:
+                channel.task.cancel()
+                if self._channels.get(key) is channel:
+                    del self._channels[key]
+
+    def _publish(self, channel: _Channel, delta: Dict[str, Any]) -> None:
+        for queue in channel.subscribers:
+            try:
+                queue.put_nowait(delta)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"op": "resync"})
+
+    async def _produce(self, channel: _Channel) -> None:
+        """Feed ``channel`` until cancelled, restarting whenever its source stops.
+
+        Changes may have been missed while the source was down, so subscribers
+        are asked to resync after each restart.
+        """
+        while True:
+            try:
+                await self._follow(channel)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Board feed producer failed, restarting")
+            await asyncio.sleep(self.poll_interval)
+            self._publish(channel, {"op": "resync"})
+
+    async def _follow(self, channel: _Channel) -> None:
+        if self.use_change_streams:
+            try:
+                await self._watch(channel)
+                return
+            except PyMongoError as exc:
+                if not change_streams_unsupported(exc):
+                    raise
+                logger.info(f"Change streams unavailable, polling instead: {exc}")
+                self.use_change_streams = False
+        await self._poll(channel)
+
+    async def _watch(self, channel: _Channel) -> None:
+        """Follow the change stream of ``channel``'s scope.
+
+        Transient failures (network errors, failovers, killed cursors) are
+        retried with exponential backoff, resuming after the last event seen.
+        Errors meaning change streams are unsupported are raised.
+        """
+        scope = channel.scope
+        # Deletes carry no document, and updates or replacements that move a
+        # card out of the scope (including by unsetting a scope field) no
+        # longer match it, so all of them are let through and resolved here
+        pipeline = [
+            {
+                "$match": {
+                    "$or": [
+                        {"operationType": {"$in": ["delete", "replace"]}},
+                        {f"fullDocument.{k}": v for k, v in scope.items()},
+                        *(
+                            {f"updateDescription.updatedFields.{k}": {"$exists": True}}
+                            for k in scope
+                        ),
+                        {"updateDescription.removedFields": {"$in": list(scope)}},
+                    ]
+                }
+            }
+        ]
+        resume_token = None
+        known: Optional[Dict[Any, str]] = None
+        delay = self.poll_interval
+        while True:
+            try:
+                async with self.collection.watch(
+                    pipeline, full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    if known is None:
+                        known = {
+                            doc["_id"]: doc["id"]
+                            for doc in await self.collection.find(
+                                scope, {"_id": 1, "id": 1}
+                            ).to_list(None)
+                        }
+                    delay = self.poll_interval
+                    async for change in stream:
+                        resume_token = change["_id"]
+                        delta = self._change_delta(scope, change, known)
+                        if delta:
+                            self._publish(channel, delta)
+                return
+            except PyMongoError as exc:
+                if change_streams_unsupported(exc):
+                    raise
+                logger.warning(f"Board change stream interrupted, resuming: {exc}")
+                lost = getattr(exc, "code", None) in _HISTORY_LOST_CODES
+                if resume_token is None or lost:
+                    # Events may have been missed; start over from a fresh view
+                    resume_token, known = None, None
+                    self._publish(channel, {"op": "resync"})
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RESUME_DELAY)
+
+    def _change_delta(
+        self, scope: Dict[str, Any], change: Dict[str, Any], known: Dict[Any, str]
+    ) -> Optional[Dict[str, Any]]:
+        object_id = change["documentKey"]["_id"]
+        doc = change.get("fullDocument")
+        if doc is not None and in_scope(doc, scope):
+            known[object_id] = doc["id"]
+            return {"op": "upsert", "card": project_card(doc, self.fields)}
+        card_id = known.pop(object_id, None)
+        return {"op": "delete", "id": card_id} if card_id else None
+
+    async def _poll(self, channel: _Channel) -> None:
+        previous: Optional[Dict[str, Dict[str, Any]]] = None
+        while True:
+            try:
+                docs = await self.collection.find(
+                    channel.scope, self.projection
+                ).to_list(None)
+            except PyMongoError as exc:
+                logger.warning(f"Board poll failed: {exc}")
+            else:
+                current = {doc["id"]: doc for doc in docs}
+                if previous is not None:
+                    for delta in diff_cards(previous, current):
+                        self._publish(channel, delta)
+                previous = current
+            await asyncio.sleep(self.poll_interval)
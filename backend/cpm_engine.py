@@ -0,0 +1,551 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class CycleError(ValueError):
+    """Raised when the dependency network contains a cycle."""
+
+
+# Frontiers up to this size are released with plain Python loops
+_THIN_LEVEL = 8
+
+
+def _csr_gather(ptr: np.ndarray, idx: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Return the concatenated CSR rows of ``nodes`` without a Python loop."""
+    starts = ptr[nodes]
+    counts = ptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return idx[:0]
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return idx[offsets + np.arange(total)]
+
+
+def _csr(keys: np.ndarray, values: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Build a CSR adjacency (row pointer, column index) keyed by ``keys``."""
+    perm = np.argsort(keys, kind="stable")
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n), out=ptr[1:])
+    return ptr, values[perm]
+
+
+class CPMNetwork:
+    """Critical path network with task IDs interned to integer indices.
+
+    Durations and the ES/EF/LS/LF/float results live in NumPy arrays and the
+    dependency graph is held as edge arrays plus CSR adjacency, so both passes
+    run level by level over a single topological ordering without recursion.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        durations: Sequence[float],
+        predecessors: Sequence[Sequence[str]],
+    ):
+        self.index: Dict[str, int] = {}
+        dur: List[float] = []
+        pred_lists: List[Sequence[str]] = []
+        for tid, d, ps in zip(ids, durations, predecessors):
+            pos = self.index.get(tid)
+            if pos is None:
+                self.index[tid] = len(dur)
+                dur.append(float(d))
+                pred_lists.append(ps or [])
+            else:
+                dur[pos] = float(d)
+                pred_lists[pos] = ps or []
+        self.ids: List[str] = list(self.index)
+        self.duration = np.asarray(dur, dtype=np.float64)
+
+        # Python adjacency lists back incremental edits; the edge/CSR arrays
+        # used by the full passes are rebuilt from them when they go stale.
+        # Unknown predecessors are ignored.
+        self._preds: List[List[int]] = [self._intern_preds(ps) for ps in pred_lists]
+        self._succs: List[List[int]] = [[] for _ in self._preds]
+        for i, ps in enumerate(self._preds):
+            for p in ps:
+                self._succs[p].append(i)
+        self._build_edges()
+
+        n = len(self.ids)
+        self.order = np.empty(0, dtype=np.int64)
+        self.level = np.zeros(n, dtype=np.int64)
+        self.early_start = np.zeros(n)
+        self.early_finish = np.zeros(n)
+        self.late_start = np.zeros(n)
+        self.late_finish = np.zeros(n)
+        self.total_float = np.zeros(n)
+        self.critical_path: List[str] = []
+        self.version: Optional[str] = None
+        self._results: Optional[Dict[str, Dict[str, float]]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def predecessors(self, i: int) -> List[int]:
+        """Positions of the predecessors of the task at position ``i``."""
+        return list(self._preds[i])
+
+    def successors(self, i: int) -> List[int]:
+        """Positions of the successors of the task at position ``i``.
+
+        Unlike the CSR arrays, these stay current across incremental updates.
+        """
+        return list(self._succs[i])
+
+    def _intern_preds(self, predecessors: Iterable[str]) -> List[int]:
+        index = self.index
+        return [index[p] for p in predecessors if p in index]
+
+    def _build_edges(self) -> None:
+        n = len(self.ids)
+        dst = [i for i, ps in enumerate(self._preds) for _ in ps]
+        src = [p for ps in self._preds for p in ps]
+        self.edge_src = np.asarray(src, dtype=np.int64)
+        self.edge_dst = np.asarray(dst, dtype=np.int64)
+        self.pred_ptr, self.pred_idx = _csr(self.edge_dst, self.edge_src, n)
+        self.succ_ptr, self.succ_idx = _csr(self.edge_src, self.edge_dst, n)
+        self._edges_dirty = False
+
+    def _levelize(self) -> List[np.ndarray]:
+        """Kahn's algorithm, one whole frontier at a time."""
+        n = len(self.ids)
+        indegree = np.diff(self.pred_ptr)
+        frontier = np.flatnonzero(indegree == 0)
+        levels: List[np.ndarray] = []
+        seen = 0
+        while frontier.size:
+            self.level[frontier] = len(levels)
+            levels.append(frontier)
+            seen += frontier.size
+            if frontier.size <= _THIN_LEVEL:
+                # Long chains: array calls would cost more than they save
+                frontier = self._release(frontier.tolist(), indegree)
+                continue
+            targets = _csr_gather(self.succ_ptr, self.succ_idx, frontier)
+            # Only the touched entries change, keeping long chains linear
+            candidates, counts = np.unique(targets, return_counts=True)
+            indegree[candidates] -= counts
+            frontier = candidates[indegree[candidates] == 0]
+        if seen != n:
+            raise CycleError("Cycle detected in dependencies")
+        self.order = np.concatenate(levels) if levels else np.empty(0, np.int64)
+        return levels
+
+    def _release(self, nodes: List[int], indegree: np.ndarray) -> np.ndarray:
+        """Drop the edges out of ``nodes``; return the successors left without any."""
+        ready = []
+        for node in nodes:
+            for succ in self._succs[node]:
+                indegree[succ] -= 1
+                if not indegree[succ]:
+                    ready.append(succ)
+        return np.asarray(ready, dtype=np.int64)
+
+    def schedule(self) -> "CPMNetwork":
+        """Run the forward and backward passes over the whole network."""
+        if self._edges_dirty:
+            self._build_edges()
+        levels = self._levelize()
+        src, dst, dur = self.edge_src, self.edge_dst, self.duration
+
+        # Forward pass: edges grouped by the level of their successor.
+        fwd = np.argsort(self.level[dst], kind="stable")
+        f_src, f_dst = src[fwd], dst[fwd]
+        f_bounds = np.searchsorted(self.level[f_dst], np.arange(len(levels) + 1))
+        es = np.zeros(len(self.ids))
+        ef = np.zeros(len(self.ids))
+        for lvl, nodes in enumerate(levels):
+            lo, hi = f_bounds[lvl], f_bounds[lvl + 1]
+            if hi > lo:
+                np.maximum.at(es, f_dst[lo:hi], ef[f_src[lo:hi]])
+            ef[nodes] = es[nodes] + dur[nodes]
+
+        # Backward pass: edges grouped by the level of their predecessor.
+        project_duration = float(ef.max()) if ef.size else 0.0
+        has_succ = np.diff(self.succ_ptr) > 0
+        lf = np.where(has_succ, np.inf, project_duration)
+        ls = np.zeros(len(self.ids))
+        bwd = np.argsort(self.level[src], kind="stable")
+        b_src, b_dst = src[bwd], dst[bwd]
+        b_bounds = np.searchsorted(self.level[b_src], np.arange(len(levels) + 1))
+        for lvl in range(len(levels) - 1, -1, -1):
+            lo, hi = b_bounds[lvl], b_bounds[lvl + 1]
+            if hi > lo:
+                np.minimum.at(lf, b_src[lo:hi], ls[b_dst[lo:hi]])
+            nodes = levels[lvl]
+            ls[nodes] = lf[nodes] - dur[nodes]
+
+        self.early_start, self.early_finish = es, ef
+        self.late_start, self.late_finish = ls, lf
+        self.total_float = ls - es
+        self.critical_path = self._trace_critical_path()
+        self._results = None
+        return self
+
+    def _trace_critical_path(self) -> List[str]:
+        """Walk back from the latest-finishing task along the driving predecessors."""
+        if not self.ids:
+            return []
+        ef = self.early_finish
+        node = int(np.argmax(ef))
+        path = [node]
+        while self._preds[node]:
+            preds = self._preds[node]
+            node = preds[int(np.argmax(ef[preds]))]
+            path.append(node)
+        path.reverse()
+        return [self.ids[i] for i in path]
+
+    def update(
+        self,
+        durations: Optional[Dict[str, float]] = None,
+        predecessors: Optional[Dict[str, Sequence[str]]] = None,
+    ) -> int:
+        """Apply duration/predecessor edits and re-propagate only what they affect.
+
+        Early dates are pushed forward to downstream successors and late dates
+        back to upstream predecessors, each in topological (level) order so a
+        node is visited at most once per pass. Returns the number of nodes
+        visited. Raises ``CycleError`` if a predecessor edit closes a loop, in
+        which case the network must be discarded.
+        """
+        forward: set[int] = set()
+        backward: set[int] = set()
+        for tid, d in (durations or {}).items():
+            i = self.index[tid]
+            if self.duration[i] != d:
+                self.duration[i] = d
+                forward.add(i)
+                backward.add(i)
+        # Drop every replaced edge before adding any new one, so each
+        # intermediate graph is a subgraph of the final one and a cycle found
+        # while re-levelling is a real cycle.
+        rewired: Dict[int, List[int]] = {}
+        for tid, ps in (predecessors or {}).items():
+            i = self.index[tid]
+            new = self._intern_preds(ps)
+            old = self._preds[i]
+            if new == old:
+                continue
+            for p in old:
+                self._succs[p].remove(i)
+            self._preds[i] = []
+            rewired[i] = new
+            backward.update(old)
+        for i, new in rewired.items():
+            for p in new:
+                self._succs[p].append(i)
+            self._preds[i] = new
+            self._raise_level(i)
+            forward.add(i)
+            backward.update(new)
+        if rewired:
+            self._edges_dirty = True
+        if not forward and not backward:
+            return 0
+
+        old_duration = self.project_duration
+        touched = self._propagate_forward(forward)
+        shift = self.project_duration - old_duration
+        if shift:
+            # Late dates are the project finish minus a tail length that only
+            # depends on downstream durations, so a new finish shifts them all.
+            self.late_start += shift
+            self.late_finish += shift
+        touched |= self._propagate_backward(backward)
+        if shift:
+            self.total_float = self.late_start - self.early_start
+        else:
+            idx = np.fromiter(touched, dtype=np.int64, count=len(touched))
+            self.total_float[idx] = self.late_start[idx] - self.early_start[idx]
+        self.critical_path = self._trace_critical_path()
+        self._results = None
+        return len(touched)
+
+    def _raise_level(self, start: int) -> None:
+        """Restore ``level[pred] < level[node]`` after ``start`` gained predecessors."""
+        level = self.level
+        need = max((int(level[p]) for p in self._preds[start]), default=-1) + 1
+        if need <= level[start]:
+            return
+        level[start] = need
+        stack = [start]
+        while stack:
+            u = stack.pop()
+            for s in self._succs[u]:
+                if s == start:
+                    raise CycleError("Cycle detected in dependencies")
+                if level[s] <= level[u]:
+                    level[s] = level[u] + 1
+                    stack.append(s)
+
+    def _propagate_forward(self, seeds: Iterable[int]) -> set[int]:
+        es, ef, dur, level = self.early_start, self.early_finish, self.duration, self.level
+        heap = [(int(level[i]), i) for i in seeds]
+        heapq.heapify(heap)
+        queued = {i for _, i in heap}
+        touched: set[int] = set()
+        while heap:
+            _, i = heapq.heappop(heap)
+            touched.add(i)
+            preds = self._preds[i]
+            start = float(ef[preds].max()) if preds else 0.0
+            finish = start + dur[i]
+            es[i] = start
+            if finish != ef[i]:
+                ef[i] = finish
+                for s in self._succs[i]:
+                    if s not in queued:
+                        queued.add(s)
+                        heapq.heappush(heap, (int(level[s]), s))
+        return touched
+
+    def _propagate_backward(self, seeds: Iterable[int]) -> set[int]:
+        ls, lf, dur, level = self.late_start, self.late_finish, self.duration, self.level
+        project_duration = self.project_duration
+        heap = [(-int(level[i]), i) for i in seeds]
+        heapq.heapify(heap)
+        queued = {i for _, i in heap}
+        touched: set[int] = set()
+        while heap:
+            _, i = heapq.heappop(heap)
+            touched.add(i)
+            succs = self._succs[i]
+            finish = float(ls[succs].min()) if succs else project_duration
+            start = finish - dur[i]
+            lf[i] = finish
+            if start != ls[i]:
+                ls[i] = start
+                for p in self._preds[i]:
+                    if p not in queued:
+                        queued.add(p)
+                        heapq.heappush(heap, (-int(level[p]), p))
+        return touched
+
+    @property
+    def project_duration(self) -> float:
+        return float(self.early_finish.max()) if len(self.ids) else 0.0
+
+    def results(self) -> Dict[str, Dict[str, float]]:
+        """Per-task metrics in the ``_calculate_cpm`` result shape.
+
+        Returns a fresh copy each call, so callers cannot alter the cached
+        metrics of a network kept by ``IncrementalScheduler``.
+        """
+        if self._results is None:
+            self._results = self._build_results()
+        return {tid: dict(metrics) for tid, metrics in self._results.items()}
+
+    def _build_results(self) -> Dict[str, Dict[str, float]]:
+        critical = set(self.critical_path)
+        columns = zip(
+            self.ids,
+            self.early_start.tolist(),
+            self.early_finish.tolist(),
+            self.late_start.tolist(),
+            self.late_finish.tolist(),
+            self.total_float.tolist(),
+            self.duration.tolist(),
+        )
+        return {
+            tid: {
+                "early_start": es,
+                "early_finish": ef,
+                "late_start": ls,
+                "late_finish": lf,
+                "total_float": tf,
+                "duration": d,
+                "is_critical": tid in critical,
+            }
+            for tid, es, ef, ls, lf, tf, d in columns
+        }
+
+
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class WorkCalendar:
+    """Working-day calendar anchored at a project start date.
+
+    The dates of successive working days are precomputed into a NumPy table
+    (grown on demand), together with a cumulative workday count per calendar
+    day, so converting between CPM day offsets and dates is a single array
+    lookup per task rather than a day-by-day walk.
+    """
+
+    def __init__(
+        self,
+        start: date,
+        working_days: Sequence[str] = DAY_NAMES[:5],
+        holidays: Iterable[date] = (),
+    ):
+        working = {d.lower() for d in working_days}
+        unknown = working - set(DAY_NAMES)
+        if unknown:
+            raise ValueError(f"Invalid working day: {sorted(unknown)[0]}")
+        if not working:
+            raise ValueError("Calendar must have at least one working day")
+        self.start = np.datetime64(start, "D")
+        self._weekmask = np.array([d in working for d in DAY_NAMES])
+        self._holidays = np.array(sorted(set(holidays)), dtype="datetime64[D]")
+        self._extend(366)
+
+    def _extend(self, span: int) -> None:
+        days = self.start + np.arange(span)
+        # 1970-01-01 (day 0) was a Thursday; shift so Monday maps to 0.
+        weekday = (days.astype(np.int64) + 3) % 7
+        working = self._weekmask[weekday] & ~np.isin(days, self._holidays)
+        self._span = span
+        self._workdays = days[working]
+        self._cumulative = np.concatenate(([0], np.cumsum(working)))
+
+    def _ensure_workdays(self, count: int) -> None:
+        while len(self._workdays) < count:
+            self._extend(self._span * 2)
+
+    def working_mask(self, n_days: int) -> np.ndarray:
+        """Whether each of the ``n_days`` days from the start is a working day."""
+        while self._span < n_days:
+            self._extend(self._span * 2)
+        return np.diff(self._cumulative[: n_days + 1]).astype(bool)
+
+    def dates(self, offsets: Sequence[float]) -> np.ndarray:
+        """Calendar dates of the working days that start at ``offsets``."""
+        idx = np.maximum(np.floor(np.asarray(offsets, dtype=np.float64)), 0)
+        idx = idx.astype(np.int64)
+        if idx.size:
+            self._ensure_workdays(int(idx.max()) + 1)
+        return self._workdays[idx]
+
+    def finish_dates(
+        self, start_offsets: Sequence[float], finish_offsets: Sequence[float]
+    ) -> np.ndarray:
+        """Dates of the last working day of activities spanning the given offsets."""
+        start_idx = np.maximum(np.floor(np.asarray(start_offsets, np.float64)), 0)
+        finish_idx = np.ceil(np.asarray(finish_offsets, np.float64)) - 1
+        idx = np.maximum(finish_idx, start_idx).astype(np.int64)
+        if idx.size:
+            self._ensure_workdays(int(idx.max()) + 1)
+        return self._workdays[idx]
+
+    def offset(self, day: date) -> int:
+        """Number of working days between the calendar start and ``day``."""
+        delta = int((np.datetime64(day, "D") - self.start).astype(np.int64))
+        if delta <= 0:
+            return 0
+        while self._span < delta:
+            self._extend(self._span * 2)
+        return int(self._cumulative[delta])
+
+    def schedule_dates(
+        self, network: "CPMNetwork"
+    ) -> Dict[str, Tuple[date, date, date, date]]:
+        """Map task ID to (early start, early finish, late start, late finish) dates."""
+        columns = (
+            self.dates(network.early_start),
+            self.finish_dates(network.early_start, network.early_finish),
+            self.dates(network.late_start),
+            self.finish_dates(network.late_start, network.late_finish),
+        )
+        rows = zip(*(c.astype(object).tolist() for c in columns))
+        return dict(zip(network.ids, rows))
+
+
+def schedule_fingerprint(
+    ids: Sequence[str],
+    durations: Sequence[float],
+    predecessors: Sequence[Sequence[str]],
+) -> str:
+    """Stable digest of the inputs that determine a CPM schedule."""
+    digest = hashlib.blake2b(digest_size=12)
+    for tid, d, ps in zip(ids, durations, predecessors):
+        preds = "\x1e".join(ps or [])
+        digest.update(f"{tid}\x1f{float(d)!r}\x1f{preds}\x1d".encode())
+    return digest.hexdigest()
+
+
+class IncrementalScheduler:
+    """Keep the last CPM network per key and apply task edits incrementally.
+
+    ``schedule`` diffs the supplied task set against the cached network: a
+    changed set of task IDs triggers a full rebuild, while duration and
+    predecessor edits are re-propagated through ``CPMNetwork.update``. Each
+    network is tagged with the ``schedule_fingerprint`` of its inputs, so a
+    repeat call for an unchanged schedule returns the cached network as is.
+    """
+
+    def __init__(self, max_networks: int = 128):
+        self.max_networks = max_networks
+        self._networks: "OrderedDict[Hashable, CPMNetwork]" = OrderedDict()
+        self.last_touched = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._networks
+
+    def get(self, key: Hashable) -> Optional[CPMNetwork]:
+        return self._networks.get(key)
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        if key is None:
+            self._networks.clear()
+        else:
+            self._networks.pop(key, None)
+
+    def schedule(
+        self,
+        key: Hashable,
+        ids: Sequence[str],
+        durations: Sequence[float],
+        predecessors: Sequence[Sequence[str]],
+    ) -> CPMNetwork:
+        version = schedule_fingerprint(ids, durations, predecessors)
+        network = self._networks.get(key)
+        if network is not None and network.version == version:
+            self.last_touched = 0
+            self._networks.move_to_end(key)
+            return network
+        if network is None or len(network) != len(ids) or any(
+            tid not in network.index for tid in ids
+        ):
+            network = CPMNetwork(ids, durations, predecessors).schedule()
+            self.last_touched = len(network)
+        else:
+            current = network.duration.tolist()
+            changed_durations: Dict[str, float] = {}
+            changed_preds: Dict[str, Sequence[str]] = {}
+            for tid, d, ps in zip(ids, durations, predecessors):
+                i = network.index[tid]
+                if current[i] != d:
+                    changed_durations[tid] = float(d)
+                if network._intern_preds(ps or []) != network._preds[i]:
+                    changed_preds[tid] = ps or []
+            try:
+                self.last_touched = network.update(changed_durations, changed_preds)
+            except CycleError:
+                self._networks.pop(key, None)
+                raise
+        network.version = version
+        self._networks[key] = network
+        self._networks.move_to_end(key)
+        while len(self._networks) > self.max_networks:
+            self._networks.popitem(last=False)
+        return network
+
+
+def compute_cpm(
+    ids: Sequence[str],
+    durations: Sequence[float],
+    predecessors: Sequence[Sequence[str]],
+) -> tuple[List[str], Dict[str, Dict[str, float]]]:
+    """Return ``(critical_path, results)`` for the given task network."""
+    network = CPMNetwork(ids, durations, predecessors).schedule()
+    return network.critical_path, network.results()
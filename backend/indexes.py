@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    # Only documents matching this filter are indexed
+    partial: Optional[Dict[str, Any]] = field(default=None, hash=False)
+
+
+@dataclass
+class QueryProbe:
+    """A representative query shape that must be served by an index."""
+
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[Dict[str, int]] = None
+
+
+def _asc(*fields: str) -> Tuple[Tuple[str, int], ...]:
+    return tuple((f, 1) for f in fields)
+
+
+INDEXES: List[IndexSpec] = [
+    # WBS generation and history
+    IndexSpec("wbs", _asc("project_id", "task_id"), unique=True),
+    IndexSpec("wbs", _asc("project_id", "id")),
+    # Audit records written before versioning have no version
+    IndexSpec(
+        "wbs_audit",
+        _asc("project_id", "version"),
+        unique=True,
+        partial={"version": {"$exists": True}},
+    ),
+    # Tasks: duplicate ids would otherwise only surface during regeneration
+    IndexSpec("tasks", _asc("id"), unique=True),
+    IndexSpec("tasks", _asc("project_id", "discipline", "due_date")),
+    IndexSpec("tasks", _asc("discipline", "status")),
+    IndexSpec("tasks", _asc("discipline", "due_date")),
+    IndexSpec("tasks", _asc("sprint_id", "discipline")),
+    IndexSpec("tasks", _asc("assigned_to")),
+    IndexSpec("tasks", _asc("created_at", "id")),
+    IndexSpec("tasks", _asc("mdr_entry_id")),
+    # Documents and MDR
+    IndexSpec("documents", _asc("discipline", "project_id", "category", "status")),
+    IndexSpec("documents", _asc("created_at", "id")),
+    IndexSpec("mdr_entries", _asc("project_id", "category", "status")),
+    IndexSpec("mdr_entries", _asc("project_id", "doc_number")),
+    IndexSpec("mdr_entries", _asc("created_at", "id")),
+    # Dashboard rollups, one row per (project, discipline, sprint)
+    IndexSpec("rollups", _asc("project_id", "discipline", "sprint_id"), unique=True),
+    IndexSpec("rollups", _asc("discipline", "project_id")),
+    # Users and notifications
+    IndexSpec("users", _asc("id"), unique=True),
+    IndexSpec("notifications", _asc("user_id", "created_at", "id")),
+]
+
+
+PROBES: List[QueryProbe] = [
+    QueryProbe("project tasks", "tasks", {"project_id": "?", "discipline": "?"}),
+    QueryProbe("discipline board", "tasks", {"discipline": "?", "status": "todo"}),
+    QueryProbe("sprint tasks", "tasks", {"sprint_id": "?", "discipline": "?"}),
+    QueryProbe("assigned tasks", "tasks", {"assigned_to": "?"}),
+    QueryProbe("mdr entry tasks", "tasks", {"mdr_entry_id": "?"}),
+    QueryProbe(
+        "document dashboard",
+        "documents",
+        {"discipline": "?", "project_id": "?", "category": "?", "status": "?"},
+    ),
+    QueryProbe(
+        "mdr entries",
+        "mdr_entries",
+        {"project_id": "?", "category": "?", "status": "?"},
+    ),
+    QueryProbe(
+        "mdr document", "mdr_entries", {"project_id": "?", "doc_number": "?"}
+    ),
+    QueryProbe(
+        "notifications",
+        "notifications",
+        {"user_id": "?"},
+        sort={"created_at": 1, "id": 1},
+    ),
+    QueryProbe(
+        "overdue tasks",
+        "tasks",
+        {"discipline": "?", "due_date": {"$lt": "?"}, "status": {"$ne": "done"}},
+    ),
+    QueryProbe("discipline rollups", "rollups", {"discipline": "?"}),
+    QueryProbe("project rollups", "rollups", {"project_id": "?"}),
+    QueryProbe("user lookup", "users", {"id": "?"}),
+    QueryProbe("project wbs", "wbs", {"project_id": "?"}),
+]
+
+
+async def ensure_indexes(db, specs: Iterable[IndexSpec] = INDEXES) -> List[IndexSpec]:
+    """Create every index in ``specs``; existing indexes are left untouched.
+
+    Failures are logged per index so one bad collection does not stop the
+    rest from being created. Returns the specs that were ensured.
+    """
+    ensured = []
+    for spec in specs:
+        try:
+            collection = getattr(db, spec.collection)
+            options: Dict[str, Any] = {}
+            if spec.unique:
+                options["unique"] = True
+            if spec.partial:
+                options["partialFilterExpression"] = spec.partial
+            await collection.create_index(list(spec.keys), **options)
+            ensured.append(spec)
+        except Exception as e:
+            logger.warning(
+                f"Skipping index {spec.collection}{list(spec.keys)} "
+                f"due to database error: {e}"
+            )
+    return ensured
+
+
+def _plan_stages(plan: Any) -> Iterable[str]:
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+async def find_collection_scans(
+    db, probes: Iterable[QueryProbe] = PROBES
+) -> List[QueryProbe]:
+    """Return the probes whose winning query plan is a collection scan."""
+    scans = []
+    for probe in probes:
+        command: Dict[str, Any] = {"find": probe.collection, "filter": probe.filter}
+        if probe.sort:
+            command["sort"] = probe.sort
+        try:
+            explained = await db.command(
+                {"explain": command, "verbosity": "queryPlanner"}
+            )
+        except Exception as e:
+            logger.debug(f"Could not explain {probe.name}: {e}")
+            continue
+        winning = explained.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _plan_stages(winning):
+            scans.append(probe)
+    return scans
+
+
+async def report_collection_scans(
+    db, probes: Iterable[QueryProbe] = PROBES
+) -> List[QueryProbe]:
+    """Log a warning for every hot query shape that is not index-backed."""
+    scans = await find_collection_scans(db, probes)
+    for probe in scans:
+        logger.warning(
+            f"Query '{probe.name}' on {probe.collection} {sorted(probe.filter)} "
+            "is doing a collection scan"
+        )
+    return scans
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MDR_DATE_FIELDS = (
+    "ifr_planned",
+    "ifr_actual",
+    "ifa_planned",
+    "ifa_actual",
+    "ifc_planned",
+    "ifc_actual",
+)
+
+
+def detect_mdr_columns(columns: Iterable[Any]) -> Dict[str, Any]:
+    """Map MDR entry fields to the spreadsheet columns holding them.
+
+    Headers are matched loosely (``Doc Number``, ``IFR Date Planned`` ...);
+    when several columns match a field the last one wins.
+    """
+    mapping: Dict[str, Any] = {}
+    for col in columns:
+        name = str(col).lower().strip()
+        if "doc number" in name or "doc_number" in name:
+            mapping["doc_number"] = col
+        elif "doc title" in name or "document title" in name:
+            mapping["doc_title"] = col
+        elif "category" in name or "discipline" in name:
+            mapping["category"] = col
+        elif "status" in name:
+            mapping["status"] = col
+        elif "ifr" in name and "planned" in name:
+            mapping["ifr_planned"] = col
+        elif "ifr" in name and "actual" in name:
+            mapping["ifr_actual"] = col
+        elif "ifa" in name and "planned" in name:
+            mapping["ifa_planned"] = col
+        elif "ifa" in name and "actual" in name:
+            mapping["ifa_actual"] = col
+        elif "ifc" in name and "planned" in name:
+            mapping["ifc_planned"] = col
+        elif "ifc" in name and "actual" in name:
+            mapping["ifc_actual"] = col
+        elif "remarks" in name:
+            mapping["remarks"] = col
+    return mapping
+
+
+def _text(values: pd.Series, default: Optional[str]) -> np.ndarray:
+    text = values.astype(str).str.strip().to_numpy(dtype=object)
+    return np.where(values.notna().to_numpy(), text, default)
+
+
+def _dates(values: pd.Series, name: str) -> np.ndarray:
+    """Coerce a whole column to ``date`` objects, ``None`` where missing."""
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(
+        values
+    ):
+        # Bare numbers are not dates; without this they would be read as
+        # nanoseconds since the epoch
+        values = pd.Series(pd.NaT, index=values.index)
+    elif values.dtype == object:
+        numeric = values.map(type).isin((int, float))
+        values = values.mask(numeric)
+    parsed = pd.to_datetime(values, errors="coerce", format="mixed")
+    missing = parsed.isna()
+    unparsed = int((missing & values.notna() & values.ne("")).sum())
+    if unparsed:
+        logger.warning(f"Could not parse {unparsed} values for {name}")
+    return np.where(missing, None, parsed.dt.date.to_numpy(dtype=object))
+
+
+def mdr_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Turn an MDR sheet into entry dicts, one column operation at a time.
+
+    Rows without a document number are dropped. Every entry has
+    ``doc_number``, ``doc_title``, ``category`` and ``status`` (missing
+    values become ``""``, or ``"Not Started"`` for the status), then the
+    date fields and ``remarks`` for the columns present in the sheet.
+    """
+    mapping = detect_mdr_columns(df.columns)
+    logger.info(f"Column mapping: {mapping}")
+    if "doc_number" in mapping:
+        df = df[df[mapping["doc_number"]].notna()]
+
+    columns: Dict[str, Any] = {}
+    for name, default in (
+        ("doc_number", ""),
+        ("doc_title", ""),
+        ("category", ""),
+        ("status", "Not Started"),
+    ):
+        if name in mapping:
+            columns[name] = _text(df[mapping[name]], default)
+        else:
+            columns[name] = np.full(len(df), default, dtype=object)
+    for name in MDR_DATE_FIELDS:
+        if name in mapping:
+            columns[name] = _dates(df[mapping[name]], name)
+    if "remarks" in mapping:
+        columns["remarks"] = _text(df[mapping["remarks"]], None)
+
+    out = pd.DataFrame(columns, dtype=object)
+    return out.to_dict("records")
+
+
+def row_hash(entry: Mapping[str, Any]) -> str:
+    """Stable digest of a parsed MDR row, independent of key order."""
+    payload = json.dumps(entry, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+@dataclass
+class MDRDelta:
+    """Doc numbers of a re-imported register sorted by what happened to them."""
+
+    new: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "new": len(self.new),
+            "changed": len(self.changed),
+            "unchanged": len(self.unchanged),
+            "removed": len(self.removed),
+        }
+
+
+def classify_rows(
+    incoming: Mapping[str, str], existing: Mapping[str, Optional[str]]
+) -> MDRDelta:
+    """Compare row hashes by doc number against those already stored.
+
+    Stored entries without a hash (imported before hashing) count as changed.
+    """
+    delta = MDRDelta()
+    for doc_number, digest in incoming.items():
+        if doc_number not in existing:
+            delta.new.append(doc_number)
+        elif existing[doc_number] != digest:
+            delta.changed.append(doc_number)
+        else:
+            delta.unchanged.append(doc_number)
+    delta.removed = [d for d in existing if d not in incoming]
+    return delta
@@ -0,0 +1,87 @@
+"""One-time linkage of MDR-generated tasks to their MDR entries.
+
+Tasks generated from the Master Document Register used to be tied to their
+entry only through the ``"<doc number>: <title>"`` title convention. This
+module backfills the explicit ``mdr_entry_id`` on such tasks::
+
+    python -m backend.mdr_links
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def doc_number_from_title(title: Optional[str]) -> Optional[str]:
+    """Doc number of a task titled ``"<doc number>: <doc title>"``."""
+    if not title or ":" not in title:
+        return None
+    return title.split(":", 1)[0]
+
+
+async def backfill_task_links(
+    db, project_id: Optional[str] = None, batch_size: int = BACKFILL_BATCH_SIZE
+) -> Dict[str, int]:
+    """Set ``mdr_entry_id`` on MDR tasks that do not have one yet.
+
+    Tasks are matched on project and the doc number in their title; when a
+    project holds several entries with the same doc number the oldest wins.
+    Safe to run repeatedly. Returns the number of linked and unmatched tasks.
+    """
+    scope = {"project_id": project_id} if project_id else {}
+    tasks_query = {**scope, "tags": "mdr", "mdr_entry_id": None}
+    if not await db.tasks.find_one(tasks_query, {"_id": 1}):
+        return {"linked": 0, "unmatched": 0}
+
+    entries: Dict[Tuple[Any, str], str] = {}
+    async for entry in db.mdr_entries.find(
+        scope, {"_id": 0, "id": 1, "project_id": 1, "doc_number": 1}
+    ).sort([("created_at", 1), ("id", 1)]):
+        key = (entry.get("project_id"), entry["doc_number"])
+        entries.setdefault(key, entry["id"])
+
+    linked = unmatched = 0
+    ops = []
+    async for task in db.tasks.find(
+        tasks_query, {"_id": 0, "id": 1, "project_id": 1, "title": 1}
+    ):
+        key = (task.get("project_id"), doc_number_from_title(task.get("title")))
+        entry_id = entries.get(key)
+        if entry_id is None:
+            unmatched += 1
+            continue
+        ops.append(UpdateOne({"id": task["id"]}, {"$set": {"mdr_entry_id": entry_id}}))
+        if len(ops) >= batch_size:
+            await db.tasks.bulk_write(ops, ordered=False)
+            linked += len(ops)
+            ops = []
+    if ops:
+        await db.tasks.bulk_write(ops, ordered=False)
+        linked += len(ops)
+    logger.info(f"Linked {linked} MDR tasks to their entries, {unmatched} unmatched")
+    return {"linked": linked, "unmatched": unmatched}
+
+
+async def _main() -> None:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    mongo_url = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+    client = AsyncIOMotorClient(mongo_url)
+    try:
+        db = client[os.environ.get("DB_NAME", "pmfusion_db")]
+        print(await backfill_task_links(db))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+# Page size used when a client does not ask for one
+DEFAULT_PAGE_SIZE = 1000
+# Hard upper bound on a single page
+MAX_PAGE_SIZE = 5000
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+@dataclass
+class Page:
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(doc: Dict[str, Any], sort_field: str) -> str:
+    """Return an opaque cursor positioned just after ``doc``."""
+    payload = {
+        "f": sort_field,
+        "v": _encode_value(doc.get(sort_field)),
+        "id": doc["id"],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort_field: str) -> tuple[Any, str]:
+    """Return the ``(sort value, id)`` pair stored in ``token``."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["f"] != sort_field:
+            raise InvalidCursor("Cursor does not match this listing")
+        return _decode_value(payload["v"]), str(payload["id"])
+    except InvalidCursor:
+        raise
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Malformed pagination cursor") from exc
+
+
+def keyset_filter(
+    query: Dict[str, Any], sort_field: str, cursor: Optional[str]
+) -> Dict[str, Any]:
+    """Restrict ``query`` to documents sorted after ``cursor``.
+
+    Documents are ordered by ``(sort_field, id)`` so ties on the sort field
+    are broken deterministically. Missing sort values sort first, as they do
+    in MongoDB.
+    """
+    if not cursor:
+        return query
+    value, last_id = decode_cursor(cursor, sort_field)
+    if sort_field == "id":
+        after: Dict[str, Any] = {"id": {"$gt": last_id}}
+    elif value is None:
+        after = {
+            "$or": [
+                {sort_field: None, "id": {"$gt": last_id}},
+                {sort_field: {"$ne": None}},
+            ]
+        }
+    else:
+        after = {
+            "$or": [
+                {sort_field: {"$gt": value}},
+                {sort_field: value, "id": {"$gt": last_id}},
+            ]
+        }
+    return {"$and": [query, after]} if query else after
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    sort_field: str = "id",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Page:
+    """Fetch one keyset page; ``next_cursor`` is ``None`` on the last page."""
+    limit = clamp_page_size(limit)
+    sort = [("id", 1)] if sort_field == "id" else [(sort_field, 1), ("id", 1)]
+    find_args: tuple = (keyset_filter(query, sort_field, cursor),)
+    if projection is not None:
+        if any(v for k, v in projection.items() if k != "_id"):
+            # The cursor is built from these, so inclusion projections keep them
+            projection = {**projection, sort_field: 1, "id": 1}
+        find_args += (projection,)
+    docs = (
+        await collection.find(*find_args)
+        .sort(sort)
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+    if len(docs) <= limit:
+        return Page(docs)
+    docs = docs[:limit]
+    return Page(docs, encode_cursor(docs[-1], sort_field))
+
+
+async def iter_documents(
+    collection,
+    query: Dict[str, Any],
+    sort_field: str = "id",
+    batch_size: Optional[int] = None,
+    projection: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield every matching document, holding at most one page in memory."""
+    cursor = None
+    while True:
+        page = await fetch_page(
+            collection, query, sort_field, batch_size, cursor, projection
+        )
+        for doc in page.items:
+            yield doc
+        if page.next_cursor is None:
+            return
+        cursor = page.next_cursor
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RegenerationQueue:
+    """Debounce and coalesce per-key background regenerations.
+
+    ``mark_dirty`` records the latest context for a key and schedules a
+    worker that waits until no new edits arrived for ``window`` seconds,
+    then calls ``regenerate(key, context)`` once for the whole burst. Each
+    successful run bumps the key's version counter and wakes any waiters.
+    """
+
+    def __init__(
+        self,
+        regenerate: Callable[[Hashable, Any], Awaitable[Any]],
+        window: float = 0.5,
+    ) -> None:
+        self._regenerate = regenerate
+        self.window = window
+        self._versions: Dict[Hashable, int] = {}
+        self._pending: Dict[Hashable, Tuple[Any, float]] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+        self._running: set = set()
+        self._waiters: Dict[Hashable, List[Tuple[int, asyncio.Future]]] = {}
+
+    def version(self, key: Hashable) -> int:
+        """Return the number of completed regenerations for ``key``."""
+        return self._versions.get(key, 0)
+
+    def is_pending(self, key: Hashable) -> bool:
+        """Return ``True`` while a regeneration for ``key`` is queued or running."""
+        worker = self._workers.get(key)
+        return worker is not None and not worker.done()
+
+    def mark_dirty(self, key: Hashable, context: Any = None) -> int:
+        """Queue a regeneration and return the version that will include it."""
+        loop = asyncio.get_running_loop()
+        self._pending[key] = (context, loop.time() + self.window)
+        worker = self._workers.get(key)
+        if worker is None or worker.done() or worker.get_loop() is not loop:
+            self._workers[key] = loop.create_task(self._run(key))
+        # An edit made while a run is in flight is only seen by the run after it
+        return self.version(key) + (2 if key in self._running else 1)
+
+    async def wait_for(
+        self, key: Hashable, version: int, timeout: float | None = None
+    ) -> int:
+        """Wait until ``key`` reaches ``version`` or ``timeout`` expires."""
+        if self.version(key) >= version or not self.is_pending(key):
+            return self.version(key)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, []).append((version, future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters = self._waiters.get(key, [])
+            if (version, future) in waiters:
+                waiters.remove((version, future))
+        return self.version(key)
+
+    async def flush(self, key: Hashable | None = None) -> None:
+        """Run queued regenerations immediately and wait for them to finish."""
+        loop = asyncio.get_running_loop()
+        keys = [key] if key is not None else list(self._workers)
+        workers = []
+        for k in keys:
+            if k in self._pending:
+                context, _ = self._pending[k]
+                self._pending[k] = (context, 0.0)
+                if k not in self._running and self.is_pending(k):
+                    # Interrupt the debounce sleep rather than waiting it out
+                    self._workers[k].cancel()
+                    self._workers[k] = loop.create_task(self._run(k))
+            if self.is_pending(k):
+                workers.append(self._workers[k])
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Cancel outstanding workers without running their regenerations."""
+        self._pending.clear()
+        workers = [w for w in self._workers.values() if not w.done()]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+
+    async def _run(self, key: Hashable) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while key in self._pending:
+                context, due = self._pending[key]
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                del self._pending[key]
+                self._running.add(key)
+                try:
+                    await self._regenerate(key, context)
+                except Exception as exc:
+                    logger.error(f"Background regeneration failed for {key}: {exc}")
+                    continue
+                finally:
+                    self._running.discard(key)
+                self._versions[key] = self.version(key) + 1
+                self._notify(key)
+        finally:
+            if key not in self._pending:
+                # Nothing left to run, so release waiters whose version never came
+                self._notify(key, release_all=True)
+
+    def _notify(self, key: Hashable, release_all: bool = False) -> None:
+        current = self.version(key)
+        remaining = []
+        for version, future in self._waiters.get(key, []):
+            if release_all or version <= current:
+                if not future.done():
+                    future.set_result(current)
+            else:
+                remaining.append((version, future))
+        self._waiters[key] = remaining
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+try:
+    from backend.cpm_engine import DAY_NAMES, WorkCalendar
+except ImportError:  # imported from inside backend/
+    from cpm_engine import DAY_NAMES, WorkCalendar
+
+BUCKETS = ("day", "week")
+
+
+@dataclass
+class Histogram:
+    """Hours and capacity per group (rows) and time bucket (columns)."""
+
+    bucket_starts: np.ndarray
+    hours: np.ndarray
+    capacity: np.ndarray
+
+    @property
+    def over_allocated(self) -> np.ndarray:
+        return self.hours > self.capacity + 1e-9
+
+
+def working_mask(
+    start: np.datetime64,
+    n_days: int,
+    working_days: Sequence[str] = DAY_NAMES[:5],
+    holidays: Iterable = (),
+) -> np.ndarray:
+    """Boolean mask of the working days in ``n_days`` days from ``start``."""
+    return WorkCalendar(start, working_days, holidays).working_mask(n_days)
+
+
+def spread_hours(
+    start_idx: np.ndarray,
+    end_idx: np.ndarray,
+    hours: np.ndarray,
+    group_idx: np.ndarray,
+    n_groups: int,
+    working: np.ndarray,
+) -> np.ndarray:
+    """Spread each task's hours evenly over the working days of its interval.
+
+    Day indices are inclusive. Every task adds its daily rate at its start
+    and removes it the day after its end in a difference array, so the whole
+    load is one ``bincount`` and one ``cumsum`` regardless of task lengths.
+    Tasks without a working day in their interval are spread over their
+    calendar days instead. Returns an ``(n_groups, len(working))`` array.
+    """
+    n_days = len(working)
+    cumulative = np.concatenate(([0], np.cumsum(working)))
+    workdays = cumulative[end_idx + 1] - cumulative[start_idx]
+    on_workdays = workdays > 0
+    rate = hours / np.where(on_workdays, workdays, end_idx - start_idx + 1)
+    width = n_days + 1
+
+    def accumulate(mask: np.ndarray) -> np.ndarray:
+        rows = group_idx[mask] * width
+        index = np.concatenate((rows + start_idx[mask], rows + end_idx[mask] + 1))
+        weights = np.concatenate((rate[mask], -rate[mask]))
+        diff = np.bincount(index, weights, minlength=n_groups * width)
+        return np.cumsum(diff.reshape(n_groups, width)[:, :-1], axis=1)
+
+    return accumulate(on_workdays) * working + accumulate(~on_workdays)
+
+
+def bucket_sums(
+    daily: np.ndarray, first_day: np.datetime64, bucket: str = "day"
+) -> tuple[np.ndarray, np.ndarray]:
+    """Sum daily columns into buckets; weeks start on Monday."""
+    n_days = daily.shape[1]
+    if bucket == "day":
+        return first_day + np.arange(n_days), daily
+    if bucket != "week":
+        raise ValueError(f"Unknown bucket '{bucket}'")
+    # 1970-01-01 (day 0) was a Thursday; shift so Monday maps to 0.
+    lead = int((first_day.astype(np.int64) + 3) % 7)
+    trail = -(lead + n_days) % 7
+    padded = np.pad(daily, ((0, 0), (lead, trail)))
+    sums = padded.reshape(daily.shape[0], -1, 7).sum(axis=2)
+    return first_day - lead + 7 * np.arange(sums.shape[1]), sums
+
+
+def build_histogram(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    hours: np.ndarray,
+    group_idx: np.ndarray,
+    daily_capacity: np.ndarray,
+    bucket: str = "week",
+    working_days: Sequence[str] = DAY_NAMES[:5],
+    holidays: Iterable = (),
+    window_start: Optional[np.datetime64] = None,
+    window_end: Optional[np.datetime64] = None,
+    max_days: Optional[int] = None,
+) -> Histogram:
+    """Time-phase task hours per group between ``window_start`` and ``window_end``.
+
+    ``starts`` and ``ends`` are ``datetime64[D]`` arrays (ends inclusive and
+    clamped to be no earlier than starts). ``daily_capacity`` holds the hours
+    each group can work on a working day. The window defaults to the span of
+    the tasks; hours of tasks running past it are counted pro rata. Raises
+    ``ValueError`` when the window and tasks together span more than
+    ``max_days`` days.
+    """
+    starts = np.asarray(starts, dtype="datetime64[D]")
+    ends = np.maximum(np.asarray(ends, dtype="datetime64[D]"), starts)
+    n_groups = len(daily_capacity)
+    if window_start is None:
+        window_start = starts.min() if starts.size else np.datetime64("today", "D")
+    if window_end is None:
+        window_end = ends.max() if ends.size else window_start
+    window_start = np.datetime64(window_start, "D")
+    window_end = max(np.datetime64(window_end, "D"), window_start)
+
+    # Spread over the union of the window and the task spans, then cut
+    first = min(window_start, starts.min()) if starts.size else window_start
+    last = max(window_end, ends.max()) if ends.size else window_end
+    n_days = int((last - first).astype(np.int64)) + 1
+    if max_days is not None and n_days > max_days:
+        raise ValueError(
+            f"Histogram would span {n_days} days, more than the {max_days} allowed"
+        )
+    working = working_mask(first, n_days, working_days, holidays)
+    daily = spread_hours(
+        (starts - first).astype(np.int64),
+        (ends - first).astype(np.int64),
+        np.asarray(hours, dtype=float),
+        np.asarray(group_idx, dtype=np.int64),
+        n_groups,
+        working,
+    )
+
+    lo = int((window_start - first).astype(np.int64))
+    hi = int((window_end - first).astype(np.int64)) + 1
+    capacity = np.outer(np.asarray(daily_capacity, dtype=float), working[lo:hi])
+    bucket_starts, hours_by_bucket = bucket_sums(daily[:, lo:hi], window_start, bucket)
+    _, capacity_by_bucket = bucket_sums(capacity, window_start, bucket)
+    return Histogram(bucket_starts, hours_by_bucket, capacity_by_bucket)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+EPSILON = 1e-9
+
+
+@dataclass
+class LeveledSchedule:
+    """Resource-constrained start/finish offsets aligned with ``CPMNetwork.ids``."""
+
+    ids: List[str]
+    start: np.ndarray
+    finish: np.ndarray
+    delay: np.ndarray
+
+    @property
+    def project_duration(self) -> float:
+        return float(self.finish.max()) if self.finish.size else 0.0
+
+    def results(self) -> Dict[str, Dict[str, float]]:
+        columns = zip(
+            self.ids, self.start.tolist(), self.finish.tolist(), self.delay.tolist()
+        )
+        return {
+            tid: {"leveled_start": s, "leveled_finish": f, "resource_delay": d}
+            for tid, s, f, d in columns
+        }
+
+
+def level_resources(
+    network,
+    resources: Sequence[Optional[Hashable]],
+    capacity: Mapping[Hashable, float],
+    demand: Optional[Sequence[float]] = None,
+) -> LeveledSchedule:
+    """Level a scheduled ``CPMNetwork`` against resource capacities.
+
+    ``resources`` gives the resource of each task in ``network.ids`` order
+    (``None`` for unassigned tasks, which are never delayed) and ``capacity``
+    the units each resource can supply at once; ``demand`` defaults to one
+    unit per task and is capped at the capacity of its resource so every
+    task fits on its own.
+
+    This is a parallel schedule generation scheme: finish events are kept in
+    a heap and, at each event time, the tasks whose predecessors have all
+    finished are started from per-resource ready heaps in priority order
+    (least total float, then earliest late start) while their resource has
+    units left. A resource whose best ready task does not fit waits for the
+    next release rather than starting lower-priority work ahead of it.
+    """
+    ids = list(network.ids)
+    n = len(ids)
+    duration = network.duration.tolist()
+    total_float = network.total_float.tolist()
+    late_start = network.late_start.tolist()
+    successors = [network.successors(i) for i in range(n)]
+    remaining = [len(network.predecessors(i)) for i in range(n)]
+
+    slots: Dict[Hashable, int] = {}
+    free: List[float] = []
+    task_slot: List[int] = []
+    for res in resources:
+        if res is None or res not in capacity:
+            task_slot.append(-1)
+            continue
+        slot = slots.get(res)
+        if slot is None:
+            slot = slots[res] = len(free)
+            free.append(float(capacity[res]))
+        task_slot.append(slot)
+    units = [1.0] * n if demand is None else [float(d) for d in demand]
+    for i, slot in enumerate(task_slot):
+        if slot >= 0:
+            units[i] = min(units[i], free[slot])
+
+    ready: List[List[tuple]] = [[] for _ in free]
+    events: List[tuple] = []
+    start = [0.0] * n
+    finish = [0.0] * n
+
+    def begin(i: int, now: float) -> None:
+        start[i] = now
+        finish[i] = now + duration[i]
+        heapq.heappush(events, (finish[i], i))
+
+    def release(i: int, now: float, dirty: set) -> None:
+        slot = task_slot[i]
+        if slot < 0:
+            begin(i, now)
+            return
+        heapq.heappush(ready[slot], (total_float[i], late_start[i], i))
+        dirty.add(slot)
+
+    now = 0.0
+    dirty: set = set()
+    for i in range(n):
+        if remaining[i] == 0:
+            release(i, now, dirty)
+    scheduled = 0
+    while True:
+        for slot in dirty:
+            heap = ready[slot]
+            while heap and units[heap[0][2]] <= free[slot] + EPSILON:
+                i = heapq.heappop(heap)[2]
+                free[slot] -= units[i]
+                begin(i, now)
+        dirty = set()
+        if not events:
+            break
+        now = events[0][0]
+        while events and events[0][0] <= now + EPSILON:
+            i = heapq.heappop(events)[1]
+            scheduled += 1
+            slot = task_slot[i]
+            if slot >= 0:
+                free[slot] += units[i]
+                dirty.add(slot)
+            for j in successors[i]:
+                remaining[j] -= 1
+                if remaining[j] == 0:
+                    release(j, now, dirty)
+    if scheduled != n:  # pragma: no cover - the CPM passes reject cycles
+        raise ValueError("Network could not be leveled")
+
+    start_arr = np.asarray(start)
+    return LeveledSchedule(
+        ids, start_arr, np.asarray(finish), start_arr - network.early_start
+    )
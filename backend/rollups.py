@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+
+# A rollup row is identified by these fields
+KEY_FIELDS = ("project_id", "discipline", "sprint_id")
+
+Key = Tuple[Any, Any, Any]
+Counters = Dict[str, float]
+Change = Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+def _plain(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def _label(value: Any) -> str:
+    # Counter names become field paths, so dots and leading dollars must go
+    return str(_plain(value)).replace(".", "_").lstrip("$") or "unknown"
+
+
+def _hours(value: Any) -> float:
+    # Legacy documents may hold hours as strings or junk; those count as 0
+    try:
+        hours = float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return hours if math.isfinite(hours) else 0.0
+
+
+def _task_counters(doc: Dict[str, Any]) -> Counters:
+    status = _label(doc.get("status") or "todo")
+    milestone = bool(doc.get("is_milestone"))
+    return {
+        "tasks.total": 1,
+        f"tasks.status.{status}": 1,
+        "tasks.milestones": int(milestone),
+        "tasks.milestones_done": int(milestone and status == "done"),
+        "tasks.estimated_hours": _hours(doc.get("estimated_hours")),
+    }
+
+
+def _document_counters(doc: Dict[str, Any]) -> Counters:
+    status = _label(doc.get("status") or "draft")
+    return {"documents.total": 1, f"documents.status.{status}": 1}
+
+
+def _mdr_counters(doc: Dict[str, Any]) -> Counters:
+    status = _label(doc.get("status") or "Not Started")
+    return {"mdr.total": 1, f"mdr.status.{status}": 1}
+
+
+@dataclass(frozen=True)
+class RollupSource:
+    """How documents of one collection contribute to the rollup rows."""
+
+    collection: str
+    discipline_field: str
+    sprint_field: Optional[str]
+    counters: Callable[[Dict[str, Any]], Counters]
+    fields: Tuple[str, ...]
+
+    @property
+    def projection(self) -> Dict[str, int]:
+        keys = ("project_id", self.discipline_field, self.sprint_field)
+        return {"_id": 0, **{f: 1 for f in (*keys, *self.fields) if f}}
+
+    def key(self, doc: Dict[str, Any]) -> Key:
+        sprint = doc.get(self.sprint_field) if self.sprint_field else None
+        return (doc.get("project_id"), _plain(doc.get(self.discipline_field)), sprint)
+
+    def query(self, scope: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Translate a rollup ``scope`` into a query on the source collection.
+
+        Returns ``None`` when no document of this source can fall in scope.
+        """
+        query = {}
+        for field, value in scope.items():
+            if field == "discipline":
+                query[self.discipline_field] = value
+            elif field == "sprint_id" and not self.sprint_field:
+                if value is not None:
+                    return None
+            else:
+                query[field] = value
+        return query
+
+
+SOURCES: Dict[str, RollupSource] = {
+    "tasks": RollupSource(
+        "tasks",
+        "discipline",
+        "sprint_id",
+        _task_counters,
+        ("status", "is_milestone", "estimated_hours"),
+    ),
+    "documents": RollupSource(
+        "documents", "discipline", None, _document_counters, ("status",)
+    ),
+    # MDR entries carry their discipline in ``category``
+    "mdr": RollupSource("mdr_entries", "category", None, _mdr_counters, ("status",)),
+}
+
+
+def key_filter(key: Key) -> Dict[str, Any]:
+    return dict(zip(KEY_FIELDS, key))
+
+
+def accumulate(
+    totals: Dict[Key, Counters], kind: str, doc: Dict[str, Any], sign: int = 1
+) -> None:
+    """Add (or with ``sign=-1`` remove) the contribution of ``doc``."""
+    source = SOURCES[kind]
+    bucket = totals.setdefault(source.key(doc), {})
+    for field, value in source.counters(doc).items():
+        bucket[field] = bucket.get(field, 0) + sign * value
+
+
+def deltas(kind: str, changes: Iterable[Change]) -> Dict[Key, Counters]:
+    """Return the non-zero ``$inc`` deltas per rollup row for ``changes``.
+
+    Each change is a ``(before, after)`` pair; ``before`` is ``None`` for an
+    insert and ``after`` is ``None`` for a delete.
+    """
+    totals: Dict[Key, Counters] = {}
+    for before, after in changes:
+        if before is not None:
+            accumulate(totals, kind, before, -1)
+        if after is not None:
+            accumulate(totals, kind, after)
+    result = {}
+    for key, counters in totals.items():
+        nonzero = {field: value for field, value in counters.items() if value}
+        if nonzero:
+            result[key] = nonzero
+    return result
+
+
+async def apply_changes(
+    collection, kind: str, changes: Iterable[Change], session=None
+) -> int:
+    """Increment the rollup rows touched by ``changes`` in one bulk write."""
+    ops = [
+        UpdateOne(key_filter(key), {"$inc": inc}, upsert=True)
+        for key, inc in deltas(kind, changes).items()
+    ]
+    if ops:
+        await collection.bulk_write(ops, ordered=False, session=session)
+    return len(ops)
+
+
+def _nest(counters: Counters) -> Dict[str, Any]:
+    nested: Dict[str, Any] = {}
+    for path, value in counters.items():
+        *parents, leaf = path.split(".")
+        target = nested
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = value
+    return nested
+
+
+def add_counters(total: Dict[str, Any], row: Dict[str, Any]) -> Dict[str, Any]:
+    """Sum the numeric counters of ``row`` into ``total`` and return it."""
+    for field, value in row.items():
+        if isinstance(value, dict):
+            add_counters(total.setdefault(field, {}), value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            total[field] = total.get(field, 0) + value
+    return total
+
+
+def summarize(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum rollup rows, ignoring their key fields."""
+    total: Dict[str, Any] = {}
+    for row in rows:
+        add_counters(total, {k: v for k, v in row.items() if k not in KEY_FIELDS})
+    return total
+
+
+async def rebuild(db, scope: Optional[Dict[str, Any]] = None) -> int:
+    """Recompute the rollup rows in ``scope`` from the source collections.
+
+    Rows are replaced in place and rows with no remaining source documents
+    are removed, so readers never see an empty rollup mid-rebuild. Returns
+    the number of rows written.
+    """
+    scope = scope or {}
+    totals: Dict[Key, Counters] = {}
+    for kind, source in SOURCES.items():
+        query = source.query(scope)
+        if query is None:
+            continue
+        collection = getattr(db, source.collection)
+        async for doc in collection.find(query, source.projection):
+            accumulate(totals, kind, doc)
+
+    existing = await db.rollups.find(
+        scope, {"_id": 0, **{f: 1 for f in KEY_FIELDS}}
+    ).to_list(None)
+    ops: List[Any] = [
+        ReplaceOne(key_filter(key), {**key_filter(key), **_nest(counters)}, upsert=True)
+        for key, counters in totals.items()
+    ]
+    for row in existing:
+        key = tuple(row.get(f) for f in KEY_FIELDS)
+        if key not in totals:
+            ops.append(DeleteOne(key_filter(key)))
+    if ops:
+        await db.rollups.bulk_write(ops, ordered=False)
+    return len(totals)
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import json
 import logging
 import os
-import shutil
 import uuid
 import sys
 import types
@@ -10,7 +12,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
 from typing import Dict, List, Optional
-# JWT and importlib removed - not needed for MDR workflow
+import importlib
+import importlib.util
 from dotenv import load_dotenv
 from fastapi import (
     APIRouter,
@@ -20,10 +23,13 @@ from fastapi import (
     Form,
     Header,
     HTTPException,
+    Request,
+    Response,
     UploadFile,
 )
 
-from fastapi.responses import FileResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 
 # Configure logging early so it's available for module-level imports
@@ -73,9 +79,123 @@ def safe_import_with_fallbacks(primary_path: str, fallback_path: str, items: lis
             )
 
 # MDR-specific imports for Excel processing
+import numpy as np
 import pandas as pd
 from datetime import date
 
+# Array-backed CPM engine
+_cpm_engine = safe_import_with_fallbacks(
+    "backend.cpm_engine",
+    "cpm_engine",
+    [
+        "CPMNetwork",
+        "CycleError",
+        "DAY_NAMES",
+        "IncrementalScheduler",
+        "WorkCalendar",
+        "compute_cpm",
+    ],
+)
+CPMNetwork = _cpm_engine["CPMNetwork"]
+DAY_NAMES = _cpm_engine["DAY_NAMES"]
+WorkCalendar = _cpm_engine["WorkCalendar"]
+CycleError = _cpm_engine["CycleError"]
+IncrementalScheduler = _cpm_engine["IncrementalScheduler"]
+compute_cpm = _cpm_engine["compute_cpm"]
+
+# Columnar MDR spreadsheet ingestion and re-import change detection
+_mdr_import = safe_import_with_fallbacks(
+    "backend.mdr_import", "mdr_import", ["classify_rows", "mdr_records", "row_hash"]
+)
+mdr_records = _mdr_import["mdr_records"]
+classify_rows = _mdr_import["classify_rows"]
+row_hash = _mdr_import["row_hash"]
+backfill_mdr_task_links = safe_import_with_fallbacks(
+    "backend.mdr_links", "mdr_links", ["backfill_task_links"]
+)["backfill_task_links"]
+
+# Chunked, non-blocking persistence of uploaded files
+save_upload = safe_import_with_fallbacks(
+    "backend.uploads", "uploads", ["save_upload"]
+)["save_upload"]
+
+# Resource-constrained (leveled) schedules on top of the CPM network
+level_resources = safe_import_with_fallbacks(
+    "backend.resource_leveling", "resource_leveling", ["level_resources"]
+)["level_resources"]
+
+# Debounced background WBS regeneration
+RegenerationQueue = safe_import_with_fallbacks(
+    "backend.regeneration_queue", "regeneration_queue", ["RegenerationQueue"]
+)["RegenerationQueue"]
+
+# Snapshot/delta encoding for the WBS audit history
+_wbs_history = safe_import_with_fallbacks(
+    "backend.wbs_history",
+    "wbs_history",
+    ["apply_patch", "audit_state", "diff", "state_nodes"],
+)
+apply_audit_patch = _wbs_history["apply_patch"]
+audit_state = _wbs_history["audit_state"]
+diff_audit_state = _wbs_history["diff"]
+audit_state_nodes = _wbs_history["state_nodes"]
+
+# Declarative index registry created at startup
+_indexes = safe_import_with_fallbacks(
+    "backend.indexes", "indexes", ["ensure_indexes", "report_collection_scans"]
+)
+ensure_indexes = _indexes["ensure_indexes"]
+report_collection_scans = _indexes["report_collection_scans"]
+
+# Keyset pagination shared by the list endpoints
+_pagination = safe_import_with_fallbacks(
+    "backend.pagination",
+    "pagination",
+    [
+        "InvalidCursor",
+        "MAX_PAGE_SIZE",
+        "encode_cursor",
+        "fetch_page",
+        "iter_documents",
+    ],
+)
+MAX_PAGE_SIZE = _pagination["MAX_PAGE_SIZE"]
+InvalidCursor = _pagination["InvalidCursor"]
+encode_cursor = _pagination["encode_cursor"]
+fetch_page = _pagination["fetch_page"]
+iter_documents = _pagination["iter_documents"]
+
+# Materialized per (project, discipline, sprint) dashboard counters
+_rollups = safe_import_with_fallbacks(
+    "backend.rollups",
+    "rollups",
+    ["SOURCES", "apply_changes", "rebuild", "summarize", "add_counters"],
+)
+ROLLUP_SOURCES = _rollups["SOURCES"]
+apply_rollup_changes = _rollups["apply_changes"]
+rebuild_rollups = _rollups["rebuild"]
+summarize_rollups = _rollups["summarize"]
+add_rollup_counters = _rollups["add_counters"]
+
+# Card-level kanban deltas from change streams, or polling on standalone Mongo
+BoardFeed = safe_import_with_fallbacks(
+    "backend.board_feed", "board_feed", ["BoardFeed"]
+)["BoardFeed"]
+
+# Time-phased resource loading over difference arrays
+_resource_histogram = safe_import_with_fallbacks(
+    "backend.resource_histogram",
+    "resource_histogram",
+    ["BUCKETS", "build_histogram"],
+)
+HISTOGRAM_BUCKETS = _resource_histogram["BUCKETS"]
+build_histogram = _resource_histogram["build_histogram"]
+
+# Bounded in-process cache used for authenticated user lookups
+TTLCache = safe_import_with_fallbacks(
+    "backend.ttl_cache", "ttl_cache", ["TTLCache"]
+)["TTLCache"]
+
 
 
 # Import API routes with clear fallback pattern
@@ -101,18 +221,19 @@ except Exception as e:
     api_routes_router = APIRouter()
     logger.warning("Created dummy router - API routes not available")
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer, field_validator
 from typing import List, Optional, Dict
-from collections import deque
+from functools import lru_cache
 from pymongo.client_session import ClientSession
+from pymongo import DeleteMany, DeleteOne, InsertOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from starlette.middleware.cors import CORSMiddleware
 # Dependency suggestion functionality removed for MDR-focused workflow
 # MDR documents are typically independent deliverables without complex dependencies
-from typing import List, Optional, Dict, Any
+from typing import IO, Any, Awaitable, Callable, Dict, List, Optional, Union
 import uuid
 from datetime import datetime, timedelta, date
 from enum import Enum
-import shutil
 
 if __name__ not in sys.modules:
     m = types.ModuleType(__name__)
@@ -137,18 +258,17 @@ db = client[
 app = FastAPI()
 
 
-async def ensure_wbs_index() -> None:
-    """Ensure the unique index on the WBS collection exists."""
-    try:
-        await db.wbs.create_index([("project_id", 1), ("task_id", 1)], unique=True)
-    except Exception as e:  # pragma: no cover - optional in tests
-        logger.warning(f"Skipping index creation due to database error: {e}")
+async def ensure_database_indexes() -> None:
+    """Create the registered indexes and report hot queries that still scan."""
+    await ensure_indexes(db)
+    if os.environ.get("INDEX_SCAN_CHECK", "true").lower() == "true":
+        await report_collection_scans(db)
 
 
-# Ensure WBS nodes are unique per project/task and create demo users
+# Ensure the registered indexes exist and create demo users
 @app.on_event("startup")
 async def ensure_demo_users_and_wbs_index() -> None:
-    await ensure_wbs_index()
+    await ensure_database_indexes()
     
     # Create demo users for testing assignment functionality
     demo_users = [
@@ -209,11 +329,23 @@ async def api_health():
     return {"status": "ok", "message": "EPC Project Management API is running"}
 
 
+# Authenticated users are cached for this many seconds; 0 disables the cache
+USER_CACHE_TTL_SECONDS = float(os.environ.get("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "1024"))
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
+async def _load_user(user_id: str) -> Optional[User]:
+    user = await db.users.find_one({"id": user_id})
+    return User(**user) if user else None
+
+
 async def get_current_user(x_user_id: str = Header(..., alias="X-User-ID")) -> User:
-    user = await db.users.find_one({"id": x_user_id})
-    if not user:
+    user = await user_cache.get_or_load(x_user_id, lambda: _load_user(x_user_id))
+    if user is None:
         raise HTTPException(status_code=401, detail="Invalid user")
-    return User(**user)
+    # Handlers get their own copy so the cached instance cannot be mutated
+    return user.model_copy(deep=True)
 
 
 async def send_notification(
@@ -347,6 +479,11 @@ class MDRDiscipline(str, Enum):
     ENVIRONMENTAL = "Environmental"
 
 
+# Case-folded spreadsheet values to enum members, for MDR imports
+MDR_DISCIPLINE_LOOKUP = {d.value.casefold(): d for d in MDRDiscipline}
+MDR_STATUS_LOOKUP = {s.value.casefold(): s for s in MDRStatus}
+
+
 # Models
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -378,6 +515,31 @@ class DisciplineCreate(BaseModel):
     name: str
 
 
+class CPMCalendar(BaseModel):
+    """Working calendar used to turn CPM day offsets into dates."""
+
+    working_days: List[str] = Field(
+        default_factory=lambda: ["mon", "tue", "wed", "thu", "fri"]
+    )
+    holidays: List[date] = Field(default_factory=list)
+
+    @field_validator("working_days")
+    @classmethod
+    def _known_working_days(cls, working_days: List[str]) -> List[str]:
+        working_days = [d.strip().lower() for d in working_days]
+        for day in working_days:
+            if day not in DAY_NAMES:
+                raise ValueError(f"Invalid working day: {day}")
+        if not working_days:
+            raise ValueError("Calendar must have at least one working day")
+        return working_days
+
+    @field_serializer("holidays")
+    def _holidays_as_iso(self, holidays: List[date]) -> List[str]:
+        # BSON has no plain date type, so keep holidays as ISO strings
+        return [d.isoformat() for d in holidays]
+
+
 class Project(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -387,6 +549,7 @@ class Project(BaseModel):
     end_date: Optional[datetime] = None
     project_manager_id: str
     created_by: str
+    calendar: Optional[CPMCalendar] = None  # Defaults to Mon-Fri, no holidays
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -397,6 +560,7 @@ class ProjectCreate(BaseModel):
     start_date: datetime
     end_date: Optional[datetime] = None
     project_manager_id: str
+    calendar: Optional[CPMCalendar] = None
 
 
 class Epic(BaseModel):
@@ -554,6 +718,7 @@ class Task(BaseModel):
         default_factory=list
     )  # List of user IDs required for this task
     tags: List[str] = Field(default_factory=list)
+    mdr_entry_id: Optional[str] = None  # MDR entry this task was generated from
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -629,6 +794,7 @@ class MDREntry(BaseModel):
     ifc_actual_date: Optional[date] = None
     
     remarks: Optional[str] = None
+    row_hash: Optional[str] = None  # Digest of the source row, for re-imports
     created_by: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -718,6 +884,24 @@ class GanttTask(BaseModel):
     is_milestone: bool = False
     status: TaskStatus
     priority: TaskPriority
+    # CPM metrics in working days from project start
+    early_start: Optional[float] = None
+    early_finish: Optional[float] = None
+    late_start: Optional[float] = None
+    late_finish: Optional[float] = None
+    total_float: Optional[float] = None
+    is_critical: bool = False
+    # CPM dates on the project calendar
+    early_start_date: Optional[date] = None
+    early_finish_date: Optional[date] = None
+    late_start_date: Optional[date] = None
+    late_finish_date: Optional[date] = None
+    # Resource-leveled schedule, only filled in when leveling was requested
+    leveled_start: Optional[float] = None
+    leveled_finish: Optional[float] = None
+    resource_delay: Optional[float] = None
+    leveled_start_date: Optional[date] = None
+    leveled_finish_date: Optional[date] = None
 
 
 class GanttData(BaseModel):
@@ -725,6 +909,8 @@ class GanttData(BaseModel):
     project_start: datetime
     project_end: datetime
     critical_path: List[str] = Field(default_factory=list)  # Task IDs on critical path
+    schedule_version: Optional[str] = None  # Fingerprint of the CPM inputs
+    leveled_duration: Optional[float] = None  # Working days after leveling
 
 
 # WBS models
@@ -770,15 +956,6 @@ WBSNode.model_rebuild()
 
 
 # CPM export models
-class CPMCalendar(BaseModel):
-    """Calendar options for CPM export."""
-
-    working_days: List[str] = Field(
-        default_factory=lambda: ["mon", "tue", "wed", "thu", "fri"]
-    )
-    holidays: List[date] = Field(default_factory=list)
-
-
 CPMCalendar.model_rebuild(_types_namespace=globals())
 
 
@@ -791,6 +968,12 @@ class CPMExportTask(BaseModel):
     early_start: float
     early_finish: float
     is_critical: bool = False
+    start_date: Optional[date] = None
+    finish_date: Optional[date] = None
+    leveled_start: Optional[float] = None
+    leveled_finish: Optional[float] = None
+    leveled_start_date: Optional[date] = None
+    leveled_finish_date: Optional[date] = None
 
 
 class CPMExport(BaseModel):
@@ -798,6 +981,7 @@ class CPMExport(BaseModel):
     anchor_date: Optional[datetime] = None
     calendar: CPMCalendar
     tasks: List[CPMExportTask]
+    leveled_duration: Optional[float] = None
 
 
 CPMExportTask.model_rebuild(_types_namespace=globals())
@@ -880,6 +1064,7 @@ async def add_discipline_member(discipline_name: str, user_id: str):
     await db.users.update_one(
         {"id": user_id}, {"$set": {"discipline": discipline_name}}
     )
+    user_cache.invalidate(user_id)
 
     updated = await db.disciplines.find_one({"name": discipline_name})
     return Discipline(**updated)
@@ -901,6 +1086,7 @@ async def remove_discipline_member(discipline_name: str, user_id: str):
     user = await db.users.find_one({"id": user_id})
     if user and user.get("discipline") == discipline_name:
         await db.users.update_one({"id": user_id}, {"$set": {"discipline": None}})
+        user_cache.invalidate(user_id)
 
     updated = await db.disciplines.find_one({"name": discipline_name})
     return Discipline(**updated)
@@ -960,6 +1146,7 @@ async def update_user(user_id: str, user_update: dict):
 
     if update_data:
         await db.users.update_one({"id": user_id}, {"$set": update_data})
+        user_cache.invalidate(user_id)
 
     updated_user = await db.users.find_one({"id": user_id})
     return User(**updated_user)
@@ -1012,7 +1199,11 @@ async def update_project(project_id: str, project_update: dict):
 
 # Task endpoints
 @api_router.post("/tasks", response_model=Task)
-async def create_task(task: TaskCreate, current_user: User = Depends(get_current_user)):
+async def create_task(
+    task: TaskCreate,
+    response: Response = None,
+    current_user: User = Depends(get_current_user),
+):
     # If assigned to someone, verify user exists
     if task.assigned_to:
         user = await db.users.find_one({"id": task.assigned_to})
@@ -1034,22 +1225,61 @@ async def create_task(task: TaskCreate, current_user: User = Depends(get_current
         )
     task_dict["created_by"] = current_user.id
     task_obj = Task(**task_dict)
-
-    async with await client.start_session() as session:
-        async with session.start_transaction():
-            await db.tasks.insert_one(task_obj.model_dump(), session=session)
-            if task_obj.project_id:
-                await _generate_project_wbs(
-                    task_obj.project_id, current_user, session=session
-                )
+    if task_obj.project_id and task_obj.predecessor_tasks:
+        await _check_task_schedule(task_obj, current_user)
+
+    task_doc = task_obj.model_dump()
+    await db.tasks.insert_one(task_doc)
+    await _update_rollups("tasks", [(None, task_doc)])
+    if task_obj.project_id:
+        _schedule_wbs_regeneration(task_obj.project_id, current_user, response)
     return task_obj
 
 
+async def _paginate(
+    response: Response | None,
+    collection,
+    query: Dict[str, Any],
+    model,
+    sort_field: str = "created_at",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    """Return one page of ``model`` objects, advertising the next cursor.
+
+    The cursor for the following page is sent in the ``X-Next-Cursor``
+    header; it is absent on the last page.
+    """
+    try:
+        page = await fetch_page(collection, query, sort_field, limit, cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if response is not None and page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return [model(**doc) for doc in page.items]
+
+
+def _ndjson_response(
+    collection, query: Dict[str, Any], model, sort_field: str = "created_at"
+) -> StreamingResponse:
+    """Stream every matching document as one JSON object per line."""
+
+    async def lines():
+        async for doc in iter_documents(collection, query, sort_field):
+            yield model(**doc).model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @api_router.get("/tasks", response_model=List[Task])
 async def get_tasks(
     project_id: Optional[str] = None,
     assigned_to: Optional[str] = None,
     independent: Optional[bool] = False,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    stream: bool = False,
+    response: Response = None,
     current_user: User = Depends(get_current_user),
 ):
 
@@ -1070,8 +1300,9 @@ async def get_tasks(
     if assigned_to:
         query["assigned_to"] = assigned_to
 
-    tasks = await db.tasks.find(query).to_list(1000)
-    return [Task(**task) for task in tasks]
+    if stream:
+        return _ndjson_response(db.tasks, query, Task)
+    return await _paginate(response, db.tasks, query, Task, limit=limit, cursor=cursor)
 
 
 @api_router.get("/tasks/{task_id}", response_model=Task)
@@ -1130,6 +1361,7 @@ async def assign_task(
 async def update_task(
     task_id: str,
     task_update: TaskUpdate,
+    response: Response = None,
     current_user: User = Depends(get_current_user),
 ):
     task = await db.tasks.find_one({"id": task_id})
@@ -1138,25 +1370,26 @@ async def update_task(
 
     update_data = {k: v for k, v in task_update.model_dump().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
+    if task.get("project_id") and "predecessor_tasks" in update_data:
+        await _check_task_schedule(Task(**{**task, **update_data}), current_user)
 
     # Update task without transactions for standalone MongoDB
     await db.tasks.update_one({"id": task_id}, {"$set": update_data})
     
-    # Try to update WBS if task belongs to a project
+    # Queue a WBS refresh if the task belongs to a project
     updated_task = await db.tasks.find_one({"id": task_id})
+    await _update_rollups("tasks", [(task, updated_task)])
     if updated_task and updated_task.get("project_id"):
-        try:
-            await _generate_project_wbs(updated_task["project_id"], current_user)
-        except Exception as e:
-            logging.error(
-                f"Failed to update WBS for project {updated_task.get('project_id')}: {e}"
-            )
-    updated_task = await db.tasks.find_one({"id": task_id})
+        _schedule_wbs_regeneration(updated_task["project_id"], current_user, response)
     return Task(**updated_task)
 
 
 @api_router.delete("/tasks/{task_id}")
-async def delete_task(task_id: str, current_user: User = Depends(get_current_user)):
+async def delete_task(
+    task_id: str,
+    response: Response = None,
+    current_user: User = Depends(get_current_user),
+):
     task = await db.tasks.find_one({"id": task_id})
     if not task or task.get("discipline") != current_user.discipline:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -1165,18 +1398,14 @@ async def delete_task(task_id: str, current_user: User = Depends(get_current_use
     result = await db.tasks.delete_one({"id": task_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Task not found")
+    await _update_rollups("tasks", [(task, None)])
     
     # Delete associated WBS node
     await db.wbs.delete_one({"task_id": task_id})
     
-    # Try to update WBS if task belonged to a project
+    # Queue a WBS refresh if the task belonged to a project
     if task.get("project_id"):
-        try:
-            await _generate_project_wbs(task["project_id"], current_user)
-        except Exception as e:
-            logging.error(
-                f"Failed to update WBS for project {task.get('project_id')}: {e}"
-            )
+        _schedule_wbs_regeneration(task["project_id"], current_user, response)
     return {"message": "Task deleted successfully"}
 
 
@@ -1203,6 +1432,7 @@ async def delete_user(user_id: str, current_user: User = Depends(get_current_use
         )
 
     result = await db.users.delete_one({"id": user_id})
+    user_cache.invalidate(user_id)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted successfully"}
@@ -1213,9 +1443,14 @@ async def delete_project(
     project_id: str, force: bool = False, current_user: User = Depends(get_current_user)
 ):
     if force:
-        await db.tasks.delete_many(
-            {"project_id": project_id, "discipline": current_user.discipline}
-        )
+        project_query = {
+            "project_id": project_id,
+            "discipline": current_user.discipline,
+        }
+        removed = await _rollup_sources_before("tasks", project_query)
+        await db.tasks.delete_many(project_query)
+        await _update_rollups("tasks", [(task, None) for task in removed])
+        cpm_scheduler.invalidate((project_id, current_user.discipline))
     else:
         project_tasks = await db.tasks.count_documents(
             {"project_id": project_id, "discipline": current_user.discipline}
@@ -1244,49 +1479,127 @@ async def force_delete_project(
     return await delete_project(project_id, force=True, current_user=current_user)
 
 
-# Dashboard endpoint
-@api_router.get("/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
-    # Count projects
-    total_projects = await db.projects.count_documents({})
-    active_projects = await db.projects.count_documents(
-        {"status": ProjectStatus.ACTIVE}
-    )
+# Seconds between full rollup rebuilds that correct drift; 0 disables them
+ROLLUP_RECONCILE_SECONDS = float(os.environ.get("ROLLUP_RECONCILE_SECONDS", "3600"))
+_rollup_reconciler: Optional[asyncio.Task] = None
 
-    # Count tasks
-    base_task_query = {"discipline": current_user.discipline}
 
-    total_tasks = await db.tasks.count_documents(base_task_query)
-    completed_tasks = await db.tasks.count_documents(
-        {**base_task_query, "status": TaskStatus.DONE}
-    )
-    in_progress_tasks = await db.tasks.count_documents(
-        {**base_task_query, "status": TaskStatus.IN_PROGRESS}
-    )
+async def _update_rollups(kind: str, changes, session=None) -> None:
+    """Apply rollup deltas for ``(before, after)`` pairs of ``kind`` documents.
+
+    A failed update only leaves the counters stale until the next
+    reconciliation, so it never fails the write that triggered it.
+    """
+    try:
+        await apply_rollup_changes(db.rollups, kind, changes, session=session)
+    except Exception as e:
+        logger.warning(f"Rollup update for {kind} failed: {e}")
+
+
+async def _rollup_sources_before(kind: str, query: Dict[str, Any]) -> List[dict]:
+    """Fetch the rollup fields of documents about to be changed in bulk."""
+    source = ROLLUP_SOURCES[kind]
+    collection = getattr(db, source.collection)
+    return await collection.find(query, source.projection).to_list(None)
+
+
+async def _reconcile_rollups_periodically(interval: float) -> None:
+    while True:
+        try:
+            rows = await rebuild_rollups(db)
+            logger.info(f"Reconciled {rows} rollup rows")
+        except Exception as e:
+            logger.warning(f"Rollup reconciliation failed: {e}")
+        await asyncio.sleep(interval)
+
+
+@app.on_event("startup")
+async def start_rollup_reconciler() -> None:
+    global _rollup_reconciler
+    if ROLLUP_RECONCILE_SECONDS > 0:
+        _rollup_reconciler = asyncio.create_task(
+            _reconcile_rollups_periodically(ROLLUP_RECONCILE_SECONDS)
+        )
+
+
+@api_router.post("/rollups/rebuild")
+async def rebuild_rollups_endpoint(
+    project_id: Optional[str] = None,
+    current_user: User = Depends(require_role(UserRole.SCHEDULER)),
+):
+    scope = {"project_id": project_id} if project_id else None
+    rows = await rebuild_rollups(db, scope)
+    return {"project_id": project_id, "rows": rows}
+
+
+async def _read_rollups(query: Dict[str, Any]) -> List[dict]:
+    return await db.rollups.find(query, {"_id": 0}).to_list(None)
+
 
-    # Count overdue tasks (simplified - tasks with due_date in past and not done)
-    current_time = datetime.utcnow()
-    overdue_tasks = await db.tasks.count_documents(
+async def _facet_counts(
+    collection, base_query: Dict[str, Any], counters: Dict[str, Dict[str, Any]]
+) -> Dict[str, int]:
+    """Count several sub-filters of ``base_query`` in one ``$facet`` round-trip."""
+    pipeline = [
+        {"$match": base_query},
         {
-            **base_task_query,
-            "due_date": {"$lt": current_time},
-            "status": {"$ne": TaskStatus.DONE},
-        }
-    )
+            "$facet": {
+                name: [{"$match": condition}, {"$count": "n"}]
+                for name, condition in counters.items()
+            }
+        },
+    ]
+    result = await collection.aggregate(pipeline).to_list(1)
+    facets = result[0] if result else {}
+    return {
+        name: facets[name][0]["n"] if facets.get(name) else 0 for name in counters
+    }
+
+
+def _overdue_filter(current_time: datetime) -> Dict[str, Any]:
+    # Simplified - tasks with due_date in past and not done
+    return {"due_date": {"$lt": current_time}, "status": {"$ne": TaskStatus.DONE}}
+
+
+def _rollup_task_counts(summary: Dict[str, Any]) -> Dict[str, int]:
+    """Pick the dashboard task counters out of summed rollup rows."""
+    tasks = summary.get("tasks", {})
+    by_status = tasks.get("status", {})
+    return {
+        "total": int(tasks.get("total", 0)),
+        "completed": int(by_status.get(TaskStatus.DONE.value, 0)),
+        "in_progress": int(by_status.get(TaskStatus.IN_PROGRESS.value, 0)),
+        "milestones": int(tasks.get("milestones", 0)),
+    }
+
 
-    # My tasks (placeholder - would normally use authenticated user)
-    my_tasks = await db.tasks.count_documents(
-        {**base_task_query, "assigned_to": "default_user"}
+# Dashboard endpoint
+@api_router.get("/dashboard/stats", response_model=DashboardStats)
+async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
+    discipline = current_user.discipline
+    projects, rows, overdue, mine = await asyncio.gather(
+        _facet_counts(
+            db.projects, {}, {"total": {}, "active": {"status": ProjectStatus.ACTIVE}}
+        ),
+        _read_rollups({"discipline": discipline}),
+        db.tasks.count_documents(
+            {"discipline": discipline, **_overdue_filter(datetime.utcnow())}
+        ),
+        # My tasks (placeholder - would normally use authenticated user)
+        db.tasks.count_documents(
+            {"discipline": discipline, "assigned_to": "default_user"}
+        ),
     )
+    tasks = _rollup_task_counts(summarize_rollups(rows))
 
     return DashboardStats(
-        total_projects=total_projects,
-        active_projects=active_projects,
-        total_tasks=total_tasks,
-        completed_tasks=completed_tasks,
-        in_progress_tasks=in_progress_tasks,
-        overdue_tasks=overdue_tasks,
-        my_tasks=my_tasks,
+        total_projects=projects["total"],
+        active_projects=projects["active"],
+        total_tasks=tasks["total"],
+        completed_tasks=tasks["completed"],
+        in_progress_tasks=tasks["in_progress"],
+        overdue_tasks=overdue,
+        my_tasks=mine,
     )
 
 
@@ -1295,62 +1608,84 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
 async def get_discipline_dashboard(current_user: User = Depends(get_current_user)):
     discipline = current_user.discipline
     # Find all users within the discipline
-    users = await db.users.find({"discipline": discipline}).to_list(1000)
+    users = [
+        u
+        async for u in iter_documents(
+            db.users,
+            {"discipline": discipline},
+            "id",
+            projection={"_id": 0, "id": 1, "availability": 1},
+        )
+    ]
     user_ids = [u["id"] for u in users]
 
-    # Fetch tasks assigned to those users
-    tasks = await db.tasks.find(
-        {"assigned_to": {"$in": user_ids}, "discipline": discipline}
-    ).to_list(1000)
+    # Tasks assigned to those users, grouped down to the counters we report
+    groups = await db.tasks.aggregate(
+        [
+            {"$match": {"assigned_to": {"$in": user_ids}, "discipline": discipline}},
+            {
+                "$group": {
+                    "_id": {
+                        "project_id": "$project_id",
+                        "status": {"$ifNull": ["$status", TaskStatus.TODO.value]},
+                        "is_milestone": {"$ifNull": ["$is_milestone", False]},
+                    },
+                    "count": {"$sum": 1},
+                    "hours": {"$sum": {"$ifNull": ["$estimated_hours", 8]}},
+                }
+            },
+        ]
+    ).to_list(None)
 
-    # Count tasks by status
     status_counts = {s.value: 0 for s in TaskStatus}
-    for task in tasks:
-        status = task.get("status", TaskStatus.TODO.value)
-        status_counts[status] = status_counts.get(status, 0) + 1
+    milestone_total = milestone_done = 0
+    allocated_hours = 0
+    project_map = {}
+    for group in groups:
+        key, count = group["_id"], group["count"]
+        status = key["status"]
+        done = status == TaskStatus.DONE
+        status_counts[status] = status_counts.get(status, 0) + count
+        allocated_hours += group["hours"]
+        if key["is_milestone"]:
+            milestone_total += count
+            milestone_done += count if done else 0
+
+        pid = key.get("project_id")
+        if not pid:
+            continue
+        counts = project_map.setdefault(
+            pid, {"total": 0, "completed": 0, "milestones": 0, "milestones_done": 0}
+        )
+        counts["total"] += count
+        if done:
+            counts["completed"] += count
+        if key["is_milestone"]:
+            counts["milestones"] += count
+            if done:
+                counts["milestones_done"] += count
 
     # Milestone completion
-    milestone_tasks = [t for t in tasks if t.get("is_milestone")]
-    completed_milestones = [
-        t for t in milestone_tasks if t.get("status") == TaskStatus.DONE
-    ]
     milestone_percent = (
-        (len(completed_milestones) / len(milestone_tasks) * 100)
-        if milestone_tasks
-        else 0
+        (milestone_done / milestone_total * 100) if milestone_total else 0
     )
 
     # Resource utilization
     available_hours = sum((u.get("availability", 1.0) * 40) for u in users)
-    allocated_hours = sum((t.get("estimated_hours", 8) for t in tasks))
     utilization = (
         (allocated_hours / available_hours * 100) if available_hours > 0 else 0
     )
 
     # Active projects and progress
-    project_map = {}
-    for task in tasks:
-        pid = task.get("project_id")
-        if not pid:
-            continue
-        if pid not in project_map:
-            project_map[pid] = {
-                "total": 0,
-                "completed": 0,
-                "milestones": 0,
-                "milestones_done": 0,
-            }
-        project_map[pid]["total"] += 1
-        if task.get("status") == TaskStatus.DONE:
-            project_map[pid]["completed"] += 1
-        if task.get("is_milestone"):
-            project_map[pid]["milestones"] += 1
-            if task.get("status") == TaskStatus.DONE:
-                project_map[pid]["milestones_done"] += 1
-
+    project_docs = {
+        p["id"]: p
+        for p in await db.projects.find(
+            {"id": {"$in": list(project_map)}}, {"_id": 0, "id": 1, "name": 1}
+        ).to_list(None)
+    }
     projects = []
     for pid, counts in project_map.items():
-        proj = await db.projects.find_one({"id": pid})
+        proj = project_docs.get(pid)
         if not proj:
             continue
         progress = (
@@ -1384,60 +1719,171 @@ async def get_discipline_dashboard(current_user: User = Depends(get_current_user
 async def get_project_dashboard_stats(
     project_id: str, current_user: User = Depends(get_current_user)
 ):
-    project = await db.projects.find_one({"id": project_id})
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-
     # Count tasks for this project only
-    base_query = {"project_id": project_id, "discipline": current_user.discipline}
-    total_tasks = await db.tasks.count_documents(base_query)
-    completed_tasks = await db.tasks.count_documents(
-        {**base_query, "status": TaskStatus.DONE}
-    )
-    in_progress_tasks = await db.tasks.count_documents(
-        {**base_query, "status": TaskStatus.IN_PROGRESS}
+    scope = {"project_id": project_id, "discipline": current_user.discipline}
+    project, rows, overdue = await asyncio.gather(
+        db.projects.find_one({"id": project_id}),
+        _read_rollups(scope),
+        db.tasks.count_documents({**scope, **_overdue_filter(datetime.utcnow())}),
     )
-
-    # Count overdue tasks for this project
-    current_time = datetime.utcnow()
-    overdue_tasks = await db.tasks.count_documents(
-        {
-            **base_query,
-            "due_date": {"$lt": current_time},
-            "status": {"$ne": TaskStatus.DONE},
-        }
-    )
-
-    # Count milestones
-    milestones = await db.tasks.count_documents({**base_query, "is_milestone": True})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    tasks = _rollup_task_counts(summarize_rollups(rows))
 
     return DashboardStats(
         total_projects=1,  # Always 1 for project-specific
         active_projects=1 if project["status"] == ProjectStatus.ACTIVE else 0,
-        total_tasks=total_tasks,
-        completed_tasks=completed_tasks,
-        in_progress_tasks=in_progress_tasks,
-        overdue_tasks=overdue_tasks,
-        my_tasks=milestones,  # Reuse this field for milestones in project view
+        total_tasks=tasks["total"],
+        completed_tasks=tasks["completed"],
+        in_progress_tasks=tasks["in_progress"],
+        overdue_tasks=overdue,
+        my_tasks=tasks["milestones"],  # Reuse this field for milestones in project view
     )
 
 
+# Fields a kanban card renders; lean boards project tasks down to these
+KANBAN_CARD_FIELDS = (
+    "id",
+    "title",
+    "status",
+    "priority",
+    "assigned_to",
+    "project_id",
+    "sprint_id",
+    "discipline",
+    "due_date",
+    "story_points",
+    "is_milestone",
+    "progress_percent",
+    "tags",
+    "mdr_entry_id",
+    "created_at",
+)
+# Cards returned per column on a lean board unless the client asks otherwise
+KANBAN_COLUMN_PAGE_SIZE = 50
+# Poll interval for live board updates when change streams are unavailable
+KANBAN_POLL_SECONDS = float(os.environ.get("KANBAN_POLL_SECONDS", "2"))
+KANBAN_HEARTBEAT_SECONDS = 15.0
+_kanban_feed: Optional[BoardFeed] = None
+
+
+def _get_kanban_feed() -> BoardFeed:
+    global _kanban_feed
+    if _kanban_feed is None:
+        _kanban_feed = BoardFeed(
+            db.tasks,
+            KANBAN_CARD_FIELDS,
+            poll_interval=KANBAN_POLL_SECONDS,
+            use_change_streams=(
+                os.environ.get("KANBAN_CHANGE_STREAMS", "true").lower() == "true"
+            ),
+        )
+    return _kanban_feed
+
+
+def _status_columns() -> Dict[str, Dict[str, Any]]:
+    # Tasks stored without a status are shown as todo, as Task() would
+    return {
+        status.value: (
+            {"status": {"$in": [status.value, None]}}
+            if status == TaskStatus.TODO
+            else {"status": status.value}
+        )
+        for status in TaskStatus
+    }
+
+
+async def _lean_kanban(
+    query: Dict[str, Any],
+    columns: Dict[str, Dict[str, Any]],
+    limit: Optional[int] = None,
+    column: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build a kanban board from projected task cards.
+
+    Every column gets its total count and first page of cards from a single
+    ``$facet`` aggregation. With ``column`` set, only the next page of that
+    column is returned, continuing from ``cursor``.
+    """
+    if not limit or limit < 1:
+        limit = KANBAN_COLUMN_PAGE_SIZE
+    limit = min(limit, MAX_PAGE_SIZE)
+    projection = {"_id": 0, **{field: 1 for field in KANBAN_CARD_FIELDS}}
+    if column is not None:
+        if column not in columns:
+            raise HTTPException(status_code=400, detail=f"Unknown column '{column}'")
+        try:
+            page = await fetch_page(
+                db.tasks,
+                {"$and": [query, columns[column]]},
+                "created_at",
+                limit,
+                cursor,
+                projection,
+            )
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return {
+            "column": column,
+            "cards": page.items,
+            "next_cursor": page.next_cursor,
+        }
+
+    facets = {}
+    for name, condition in columns.items():
+        facets[name] = [
+            {"$match": condition},
+            {"$sort": {"created_at": 1, "id": 1}},
+            {"$limit": limit},
+            {"$project": projection},
+        ]
+        facets[f"{name}:count"] = [{"$match": condition}, {"$count": "n"}]
+    result = await db.tasks.aggregate(
+        [{"$match": query}, {"$facet": facets}]
+    ).to_list(1)
+    facets = result[0] if result else {}
+
+    board, counts, next_cursors = {}, {}, {}
+    for name in columns:
+        cards = facets.get(name, [])
+        count_rows = facets.get(f"{name}:count")
+        board[name] = cards
+        counts[name] = count_rows[0]["n"] if count_rows else 0
+        next_cursors[name] = (
+            encode_cursor(cards[-1], "created_at")
+            if cards and counts[name] > len(cards)
+            else None
+        )
+    return {"board": board, "counts": counts, "next_cursors": next_cursors}
+
+
 # Kanban board data for projects
 @api_router.get("/projects/{project_id}/kanban")
 async def get_project_kanban(
-    project_id: str, current_user: User = Depends(get_current_user)
+    project_id: str,
+    lean: bool = False,
+    column: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
 ):
     project = await db.projects.find_one({"id": project_id})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    tasks = await db.tasks.find(
-        {"project_id": project_id, "discipline": current_user.discipline}
-    ).to_list(1000)
+    query = {"project_id": project_id, "discipline": current_user.discipline}
+    if lean:
+        board = await _lean_kanban(query, _status_columns(), limit, column, cursor)
+        if column is not None:
+            return board
+        return {"project": Project(**project).model_dump(), **board}
+
+    tasks = iter_documents(db.tasks, query, "created_at")
 
     kanban_board = {"todo": [], "in_progress": [], "review": [], "done": []}
 
-    for task in tasks:
+    async for task in tasks:
         task_obj = Task(**task)
         kanban_board[task_obj.status.value].append(task_obj.model_dump())
 
@@ -1447,16 +1893,47 @@ async def get_project_kanban(
     }
 
 
+def _discipline_columns() -> Dict[str, Dict[str, Any]]:
+    """Column filters matching the status mapping of the discipline board."""
+    todo = {"$in": [TaskStatus.TODO.value, None]}
+    return {
+        # Unassigned tasks go to backlog, assigned tasks go to todo
+        "backlog": {"status": todo, "assigned_to": None},
+        "todo": {"status": todo, "assigned_to": {"$ne": None}},
+        "in_progress": {"status": TaskStatus.IN_PROGRESS.value},
+        # Default review tasks go to DIC review
+        "review_dic": {"status": TaskStatus.REVIEW.value},
+        "review_idc": {"status": {"$in": []}},
+        "review_dcc": {"status": {"$in": []}},
+        "done": {"status": TaskStatus.DONE.value},
+    }
+
+
 # Discipline-wide kanban board
 @api_router.get("/disciplines/{discipline}/kanban")
-async def get_discipline_kanban(discipline: str, project_id: Optional[str] = None):
+async def get_discipline_kanban(
+    discipline: str,
+    project_id: Optional[str] = None,
+    lean: bool = False,
+    column: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+):
     """Return all tasks for a discipline grouped by status."""
     query = {"discipline": discipline}
     # Only filter by project if a valid project_id is provided and it's not the default "demo"
     if project_id and project_id != "demo" and project_id != "null":
         query["project_id"] = project_id
     
-    tasks = await db.tasks.find(query).to_list(1000)
+    if lean:
+        board = await _lean_kanban(
+            query, _discipline_columns(), limit, column, cursor
+        )
+        if column is not None:
+            return board
+        return {"discipline": discipline, **board}
+
+    tasks = iter_documents(db.tasks, query, "created_at")
 
     board = {
         "backlog": [],
@@ -1467,7 +1944,7 @@ async def get_discipline_kanban(discipline: str, project_id: Optional[str] = Non
         "review_dcc": [], 
         "done": []
     }
-    for task in tasks:
+    async for task in tasks:
         task_obj = Task(**task)
         status = task_obj.status.value
         
@@ -1490,63 +1967,118 @@ async def get_discipline_kanban(discipline: str, project_id: Optional[str] = Non
     return {"discipline": discipline, "board": board}
 
 
+@api_router.get("/disciplines/{discipline}/kanban/events")
+async def stream_discipline_kanban(
+    discipline: str,
+    request: Request,
+    project_id: Optional[str] = None,
+    sprint_id: Optional[str] = None,
+):
+    """Push card-level board changes as server-sent events.
+
+    Each event is ``upsert`` (with the projected card), ``delete`` (with the
+    card id) or ``resync`` (refetch the board). Clients should subscribe
+    before loading the board so no change is missed in between.
+    """
+    scope = {"discipline": discipline}
+    if project_id and project_id != "demo" and project_id != "null":
+        scope["project_id"] = project_id
+    if sprint_id:
+        scope["sprint_id"] = sprint_id
+
+    async def events():
+        feed = _get_kanban_feed()
+        async for delta in feed.subscribe(scope, KANBAN_HEARTBEAT_SECONDS):
+            if await request.is_disconnected():
+                break
+            if delta is None:
+                yield ": keepalive\n\n"
+                continue
+            data = json.dumps(jsonable_encoder(delta))
+            yield f"event: {delta['op']}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @api_router.get(
     "/disciplines/{discipline}/projects", response_model=List[DisciplineProjectSummary]
 )
 async def get_discipline_projects(discipline: str):
     """Return projects with tasks or documents for the given discipline."""
-    task_ids = await db.tasks.distinct(
-        "project_id", {"discipline": discipline, "project_id": {"$ne": None}}
-    )
-    doc_ids = await db.documents.distinct(
-        "project_id", {"discipline": discipline, "project_id": {"$ne": None}}
-    )
-    project_ids = list(set(task_ids) | set(doc_ids))
-
-    projects: List[DisciplineProjectSummary] = []
-    for pid in project_ids:
-        project = await db.projects.find_one({"id": pid})
-        if not project:
-            continue
-
-        task_count = await db.tasks.count_documents(
-            {"project_id": pid, "discipline": discipline}
-        )
-        doc_count = await db.documents.count_documents(
-            {"project_id": pid, "discipline": discipline}
-        )
+    rows = await _read_rollups({"discipline": discipline, "project_id": {"$ne": None}})
+    counts: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        add_rollup_counters(counts.setdefault(row["project_id"], {}), row)
+    project_ids = [
+        pid
+        for pid, c in counts.items()
+        if c.get("tasks", {}).get("total") or c.get("documents", {}).get("total")
+    ]
 
-        projects.append(
-            DisciplineProjectSummary(
-                project=Project(**project),
-                task_count=task_count,
-                document_count=doc_count,
-            )
+    projects = await db.projects.find({"id": {"$in": project_ids}}).to_list(None)
+    return [
+        DisciplineProjectSummary(
+            project=Project(**project),
+            task_count=int(counts[project["id"]].get("tasks", {}).get("total", 0)),
+            document_count=int(
+                counts[project["id"]].get("documents", {}).get("total", 0)
+            ),
         )
-
-    return projects
+        for project in projects
+    ]
 
 
 # Gantt Chart endpoints
 @api_router.get("/projects/{project_id}/gantt", response_model=GanttData)
 async def get_project_gantt(
-    project_id: str, current_user: User = Depends(get_current_user)
+    project_id: str,
+    level: bool = False,
+    current_user: User = Depends(get_current_user),
 ):
+    """Gantt tasks with CPM metrics; ``level`` adds a resource-leveled schedule."""
     project = await db.projects.find_one({"id": project_id})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    tasks = await db.tasks.find(
+    tasks_data = await db.tasks.find(
         {"project_id": project_id, "discipline": current_user.discipline}
     ).to_list(1000)
+    tasks = [Task(**task) for task in tasks_data]
+
+    # Reuse the WBS engine's CPM network; it is only recomputed when the
+    # schedule changed since the last WBS generation.
+    network: Optional[CPMNetwork] = None
+    if tasks:
+        try:
+            network = _schedule_network(tasks, (project_id, current_user.discipline))
+        except HTTPException as exc:
+            logger.warning(f"Skipping CPM for Gantt of project {project_id}: {exc.detail}")
+    metrics = network.results() if network else {}
+    try:
+        calendar = _project_calendar(project)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=422, detail=f"Invalid project calendar: {exc}"
+        ) from exc
+    dates = calendar.schedule_dates(network) if network and calendar else {}
+    leveled_duration, leveled = None, {}
+    if level and network:
+        leveled_duration, leveled = await _level_schedule(
+            network, {t.id: t.assigned_to for t in tasks}, calendar
+        )
 
     gantt_tasks = []
     project_start = datetime.utcnow()
     project_end = datetime.utcnow()
 
-    for task in tasks:
-        task_obj = Task(**task)
+    for task_obj in tasks:
         if task_obj.start_date and task_obj.end_date:
+            m = metrics.get(task_obj.id, {})
+            es_date, ef_date, ls_date, lf_date = dates.get(task_obj.id, (None,) * 4)
             gantt_task = GanttTask(
                 id=task_obj.id,
                 title=task_obj.title,
@@ -1559,6 +2091,17 @@ async def get_project_gantt(
                 is_milestone=task_obj.is_milestone,
                 status=task_obj.status,
                 priority=task_obj.priority,
+                early_start=m.get("early_start"),
+                early_finish=m.get("early_finish"),
+                late_start=m.get("late_start"),
+                late_finish=m.get("late_finish"),
+                total_float=m.get("total_float"),
+                is_critical=m.get("is_critical", False),
+                early_start_date=es_date,
+                early_finish_date=ef_date,
+                late_start_date=ls_date,
+                late_finish_date=lf_date,
+                **leveled.get(task_obj.id, {}),
             )
             gantt_tasks.append(gantt_task)
 
@@ -1568,24 +2111,16 @@ async def get_project_gantt(
             if task_obj.end_date > project_end:
                 project_end = task_obj.end_date
 
-    # Simple critical path calculation (can be enhanced)
-    critical_path = calculate_critical_path(gantt_tasks)
-
     return GanttData(
         tasks=gantt_tasks,
         project_start=project_start,
         project_end=project_end,
-        critical_path=critical_path,
+        critical_path=network.critical_path if network else [],
+        schedule_version=network.version if network else None,
+        leveled_duration=leveled_duration,
     )
 
 
-def calculate_critical_path(tasks: List[GanttTask]) -> List[str]:
-    """Simple critical path calculation - can be enhanced with proper algorithm"""
-    # For now, return tasks with longest duration and dependencies
-    sorted_tasks = sorted(tasks, key=lambda t: t.duration_days, reverse=True)
-    return [task.id for task in sorted_tasks[:3]]  # Return top 3 longest tasks
-
-
 @api_router.put("/tasks/{task_id}/progress")
 async def update_task_progress(
     task_id: str, progress: dict, current_user: User = Depends(get_current_user)
@@ -1608,6 +2143,7 @@ async def update_task_progress(
     await db.tasks.update_one({"id": task_id}, {"$set": update_data})
 
     updated_task = await db.tasks.find_one({"id": task_id})
+    await _update_rollups("tasks", [(task, updated_task)])
     return Task(**updated_task)
 
 
@@ -1620,62 +2156,69 @@ async def get_project_resources(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    tasks = await db.tasks.find(
-        {"project_id": project_id, "discipline": current_user.discipline}
-    ).to_list(1000)
-    users = await db.users.find().to_list(1000)
+    # One pass over the project's tasks, grouped by assignee. Legacy hours
+    # stored as strings are converted; missing, zero or invalid ones count 8
+    hours = {
+        "$convert": {
+            "input": "$estimated_hours",
+            "to": "double",
+            "onError": 8,
+            "onNull": 8,
+        }
+    }
+    task_hours = {"$cond": [hours, hours, 8]}
+    groups = await db.tasks.aggregate(
+        [
+            {
+                "$match": {
+                    "project_id": project_id,
+                    "discipline": current_user.discipline,
+                }
+            },
+            {
+                "$group": {
+                    "_id": "$assigned_to",
+                    "hours": {"$sum": task_hours},
+                    "tasks": {
+                        "$push": {
+                            "id": "$id",
+                            "title": "$title",
+                            "hours": task_hours,
+                            "status": {"$ifNull": ["$status", TaskStatus.TODO.value]},
+                        }
+                    },
+                }
+            },
+        ]
+    ).to_list(None)
+    assignee_ids = [g["_id"] for g in groups if g["_id"]]
+    users = {
+        u["id"]: u
+        for u in await db.users.find(
+            {"id": {"$in": assignee_ids}},
+            {"_id": 0, "id": 1, "name": 1, "discipline": 1},
+        ).to_list(None)
+    }
 
-    # Calculate resource allocation
-    resource_map = {}
-    total_hours_required = 0
+    total_hours_required = sum(g["hours"] for g in groups)
     total_hours_allocated = 0
-
-    for task in tasks:
-        task_obj = Task(**task)
-        if task_obj.assigned_to:
-            user_id = task_obj.assigned_to
-            if user_id not in resource_map:
-                user = next((u for u in users if u["id"] == user_id), None)
-                if user:
-                    resource_map[user_id] = {
-                        "user_id": user_id,
-                        "user_name": user["name"],
-                        "discipline": user.get("discipline", "General"),
-                        "allocated_hours": 0,
-                        "available_hours": 40,  # Default 40 hours per week
-                        "tasks": [],
-                    }
-
-            if user_id in resource_map:
-                task_hours = task_obj.estimated_hours or 8  # Default 8 hours
-                resource_map[user_id]["allocated_hours"] += task_hours
-                resource_map[user_id]["tasks"].append(
-                    {
-                        "id": task_obj.id,
-                        "title": task_obj.title,
-                        "hours": task_hours,
-                        "status": task_obj.status,
-                    }
-                )
-                total_hours_allocated += task_hours
-
-        total_hours_required += task_obj.estimated_hours or 8
-
-    # Convert to ResourceAllocation objects
     resources = []
-    for resource_data in resource_map.values():
-        utilization = (
-            resource_data["allocated_hours"] / resource_data["available_hours"]
-        ) * 100
+    for group in groups:
+        user = users.get(group["_id"])
+        if not user:
+            continue
+        available_hours = 40  # Default 40 hours per week
+        utilization = group["hours"] / available_hours * 100
+        total_hours_allocated += group["hours"]
         resources.append(
             ResourceAllocation(
-                user_id=resource_data["user_id"],
-                user_name=resource_data["user_name"],
-                discipline=resource_data["discipline"],
-                total_allocated_hours=resource_data["allocated_hours"],
-                available_hours=resource_data["available_hours"],
+                user_id=user["id"],
+                user_name=user["name"],
+                discipline=user.get("discipline", "General"),
+                total_allocated_hours=group["hours"],
+                available_hours=available_hours,
                 utilization_percent=min(utilization, 100),  # Cap at 100%
-                tasks=resource_data["tasks"],
+                tasks=group["tasks"],
             )
         )
 
@@ -1688,221 +2231,722 @@ async def get_project_resources(
     )
 
 
+def _float_values(values: List[Any], describe) -> np.ndarray:
+    """Convert ``values`` to floats with ``float()`` semantics in one pass.
+
+    ``None`` is rejected like ``float(None)`` would be. On failure a 400 is
+    raised with ``describe(index)`` of the first invalid value.
+    """
+    try:
+        if None in values:
+            raise TypeError("None is not a number")
+        # fromiter keeps list-like values as single (invalid) elements
+        return np.fromiter(values, dtype=object, count=len(values)).astype(float)
+    except (TypeError, ValueError):
+        for index, value in enumerate(values):
+            try:
+                float(value)
+            except (TypeError, ValueError) as exc:
+                raise HTTPException(status_code=400, detail=describe(index)) from exc
+        raise
+
+
 @api_router.get("/resources/overview")
 async def get_resources_overview(current_user: User = Depends(get_current_user)):
     """Return high level utilization metrics for all resources."""
     try:
-        users = await db.users.find({"discipline": current_user.discipline}).to_list(
-            1000
-        )
+        users = [
+            u
+            for u in await db.users.find(
+                {"discipline": current_user.discipline}
+            ).to_list(None)
+            if u.get("id")
+        ]
         tasks = await db.tasks.find(
-            {"assigned_to": {"$ne": None}, "discipline": current_user.discipline}
-        ).to_list(1000)
+            {
+                "assigned_to": {"$in": [u["id"] for u in users]},
+                "discipline": current_user.discipline,
+            },
+            {"_id": 0, "id": 1, "assigned_to": 1, "estimated_hours": 1, "status": 1},
+        ).to_list(None)
     except Exception as exc:  # pragma: no cover - safety net
         logger.exception("Failed fetching resources")
         raise HTTPException(status_code=500, detail="Error fetching resources") from exc
 
-    resource_summary = []
+    estimates = [t.get("estimated_hours", 8) for t in tasks]
+    task_hours = _float_values(
+        estimates,
+        lambda i: f"Invalid estimated_hours '{estimates[i]}' for task "
+        f"{tasks[i].get('id')}",
+    )
+    per_user = (
+        pd.DataFrame(
+            {
+                "user_id": [t["assigned_to"] for t in tasks],
+                "hours": task_hours,
+                "active": [t.get("status") != "done" for t in tasks],
+            }
+        )
+        .groupby("user_id")
+        .agg(hours=("hours", "sum"), active=("active", "sum"))
+        .reindex([u["id"] for u in users], fill_value=0)
+    )
 
-    for user in users:
-        try:
-            uid = user.get("id")
-            if not uid:
-                continue
-            user_tasks = [t for t in tasks if t.get("assigned_to") == uid]
+    availability_raw = [u.get("availability", 1.0) for u in users]
+    availability = _float_values(
+        [0.0 if a is None else a for a in availability_raw],
+        lambda i: f"Invalid availability '{availability_raw[i]}' for user "
+        f"{users[i]['id']}",
+    )
+    available_hours = 40 * availability
+    allocated_hours = per_user["hours"].to_numpy(dtype=float)
+    utilization = (
+        np.divide(
+            allocated_hours,
+            available_hours,
+            out=np.zeros_like(allocated_hours),
+            where=available_hours > 0,
+        )
+        * 100
+    )
 
-            total_hours = 0.0
-            for t in user_tasks:
-                est_raw = t.get("estimated_hours", 8)
-                try:
-                    est_hours = float(est_raw)
-                except (TypeError, ValueError) as exc:
-                    detail = (
-                        f"Invalid estimated_hours '{est_raw}' for task {t.get('id')}"
-                    )
-                    raise HTTPException(status_code=400, detail=detail) from exc
-                total_hours += est_hours
-
-            avail_raw = user.get("availability", 1.0)
-            try:
-                user_availability = float(avail_raw) if avail_raw is not None else 0.0
-            except (TypeError, ValueError) as exc:
-                detail = f"Invalid availability '{avail_raw}' for user {uid}"
-                raise HTTPException(status_code=400, detail=detail) from exc
+    resource_summary = [
+        {
+            "user_id": user["id"],
+            "name": user.get("name"),
+            "role": user.get("role"),
+            "discipline": user.get("discipline", "General"),
+            "hourly_rate": user.get("hourly_rate"),
+            "allocated_hours": float(allocated_hours[i]),
+            "available_hours": float(available_hours[i]),
+            "utilization_percent": min(float(utilization[i]), 100),
+            "active_tasks": int(per_user["active"].iat[i]),
+        }
+        for i, user in enumerate(users)
+    ]
 
-            available_hours = 40 * user_availability
-            utilization = (
-                (total_hours / available_hours) * 100 if available_hours > 0 else 0
-            )
+    return {"resources": resource_summary}
 
-            resource_summary.append(
-                {
-                    "user_id": uid,
-                    "name": user.get("name"),
-                    "role": user.get("role"),
-                    "discipline": user.get("discipline", "General"),
-                    "hourly_rate": user.get("hourly_rate"),
-                    "allocated_hours": total_hours,
-                    "available_hours": available_hours,
-                    "utilization_percent": min(utilization, 100),
-                    "active_tasks": len(
-                        [t for t in user_tasks if t.get("status") != "done"]
-                    ),
-                }
-            )
-        except HTTPException:
-            raise
-        except Exception:
-            logger.exception(
-                "Error processing resource metrics for user %s", user.get("id")
-            )
-            continue
 
-    return {"resources": resource_summary}
+# Working hours a fully available person covers on one working day
+HOURS_PER_WORKING_DAY = 8.0
+# Longest span, window and task dates together, a histogram may cover
+HISTOGRAM_MAX_DAYS = int(os.environ.get("HISTOGRAM_MAX_DAYS", "1830"))
 
 
-# ------------------- WBS Endpoints -------------------
+@api_router.get("/projects/{project_id}/resources/histogram")
+async def get_resource_histogram(
+    project_id: str,
+    group_by: str = "user",
+    bucket: str = "week",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+):
+    """Hours per user or discipline and day or week across the project.
 
+    Each task's estimate (8 hours when unset) is spread evenly over the
+    working days between its start and end dates on the project calendar.
+    Buckets whose load exceeds the group's capacity are flagged. Histograms
+    spanning more than ``HISTOGRAM_MAX_DAYS`` days are rejected with a 422.
+    """
+    if group_by not in ("user", "discipline"):
+        raise HTTPException(
+            status_code=400, detail="group_by must be user or discipline"
+        )
+    if bucket not in HISTOGRAM_BUCKETS:
+        raise HTTPException(status_code=400, detail="bucket must be day or week")
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if start and end and (end - start).days + 1 > HISTOGRAM_MAX_DAYS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Window must not span more than {HISTOGRAM_MAX_DAYS} days",
+        )
+    project = await db.projects.find_one({"id": project_id})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
 
-def _topological_sort(nodes: List[str], preds: Dict[str, List[str]]) -> List[str]:
-    """Return a topological ordering of nodes or raise ValueError if a cycle exists."""
-    succs: Dict[str, List[str]] = {n: [] for n in nodes}
-    indegree: Dict[str, int] = {n: 0 for n in nodes}
-    for node in nodes:
-        for p in preds.get(node, []):
-            if p not in succs:
-                continue
-            succs[p].append(node)
-            indegree[node] += 1
-
-    q: deque[str] = deque(n for n in nodes if indegree[n] == 0)
-    order: List[str] = []
-    while q:
-        n = q.popleft()
-        order.append(n)
-        for s in succs.get(n, []):
-            indegree[s] -= 1
-            if indegree[s] == 0:
-                q.append(s)
-
-    if len(order) != len(nodes):
-        raise ValueError("Cycle detected in dependencies")
-    return order
-
-
-def _calculate_cpm(tasks: List[Task]):
-    """Compute critical path metrics for tasks."""
-    durations = {}
-    preds = {}
-    for t in tasks:
-        dur = t.duration_days
-        if not dur:
-            if t.start_date and t.end_date:
-                dur = max((t.end_date - t.start_date).days, 1)
-            else:
-                dur = 1
-        durations[t.id] = dur
-        preds[t.id] = t.predecessor_tasks or []
+    # Users see their own discipline's people; the discipline view is
+    # project-wide
+    query = {"project_id": project_id}
+    if group_by == "user":
+        query["discipline"] = current_user.discipline
+    key_field = "assigned_to" if group_by == "user" else "discipline"
+    tasks = await db.tasks.find(
+        query,
+        {
+            "_id": 0,
+            "id": 1,
+            key_field: 1,
+            "estimated_hours": 1,
+            "start_date": 1,
+            "end_date": 1,
+        },
+    ).to_list(None)
+
+    estimates = [t.get("estimated_hours") or 8 for t in tasks]
+    hours = _float_values(
+        estimates,
+        lambda i: f"Invalid estimated_hours '{estimates[i]}' for task "
+        f"{tasks[i].get('id')}",
+    )
+    keys = np.array([t.get(key_field) for t in tasks], dtype=object)
+    starts = pd.to_datetime(
+        [t.get("start_date") for t in tasks], errors="coerce"
+    ).to_numpy(dtype="datetime64[D]")
+    ends = pd.to_datetime(
+        [t.get("end_date") for t in tasks], errors="coerce"
+    ).to_numpy(dtype="datetime64[D]")
+    scheduled = ~(np.isnat(starts) | np.isnat(ends))
+    assigned = np.array([k is not None for k in keys], dtype=bool)
+    usable = scheduled & assigned
+
+    group_keys = sorted(set(keys[usable]))
+    if group_by == "user":
+        people = await db.users.find(
+            {"id": {"$in": group_keys}},
+            {"_id": 0, "id": 1, "name": 1, "availability": 1},
+        ).to_list(None)
+    else:
+        people = await db.users.find(
+            {"discipline": {"$in": group_keys}},
+            {"_id": 0, "id": 1, "discipline": 1, "availability": 1},
+        ).to_list(None)
+    availability_raw = [p.get("availability", 1.0) for p in people]
+    availability = _float_values(
+        [0.0 if a is None else a for a in availability_raw],
+        lambda i: f"Invalid availability '{availability_raw[i]}' for user "
+        f"{people[i].get('id')}",
+    )
+    position = {key: i for i, key in enumerate(group_keys)}
+    daily_capacity = np.zeros(len(group_keys))
+    for person, share in zip(people, availability):
+        key = person.get("id" if group_by == "user" else "discipline")
+        if key in position:
+            daily_capacity[position[key]] += share * HOURS_PER_WORKING_DAY
+    names = {p["id"]: p.get("name") for p in people} if group_by == "user" else {}
 
     try:
-        _topological_sort(list(durations.keys()), preds)
+        calendar = CPMCalendar(**(project.get("calendar") or {}))
+        histogram = build_histogram(
+            starts[usable],
+            ends[usable],
+            hours[usable],
+            np.array([position[k] for k in keys[usable]], dtype=np.int64),
+            daily_capacity,
+            bucket=bucket,
+            working_days=calendar.working_days,
+            holidays=calendar.holidays,
+            window_start=np.datetime64(start, "D") if start else None,
+            window_end=np.datetime64(end, "D") if end else None,
+            max_days=HISTOGRAM_MAX_DAYS,
+        )
     except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    over = histogram.over_allocated
 
-    early_start: Dict[str, float] = {}
-    early_finish: Dict[str, float] = {}
+    return {
+        "project_id": project_id,
+        "group_by": group_by,
+        "bucket": bucket,
+        "buckets": [str(d) for d in histogram.bucket_starts],
+        "series": [
+            {
+                "key": key,
+                "name": names.get(key, key),
+                "hours": np.round(histogram.hours[i], 2).tolist(),
+                "capacity": np.round(histogram.capacity[i], 2).tolist(),
+                "over_allocated": over[i].tolist(),
+                "over_allocated_buckets": int(over[i].sum()),
+            }
+            for i, key in enumerate(group_keys)
+        ],
+        "unscheduled_hours": float(hours[~scheduled].sum()),
+        "unassigned_hours": float(hours[scheduled & ~assigned].sum()),
+    }
 
-    def ef(tid: str) -> float:
-        if tid in early_finish:
-            return early_finish[tid]
-        if not preds[tid]:
-            es = 0.0
-        else:
-            es = max(ef(p) for p in preds[tid])
-        early_start[tid] = es
-        early_finish[tid] = es + durations[tid]
-        return early_finish[tid]
-
-    for tid in durations:
-        ef(tid)
-
-    # build successor map for backward pass
-    succs: Dict[str, List[str]] = {tid: [] for tid in durations}
-    for tid, ps in preds.items():
-        for p in ps:
-            if p in succs:
-                succs[p].append(tid)
-
-    longest: Dict[str, float] = {}
-
-    def longest_path(tid: str) -> float:
-        if tid in longest:
-            return longest[tid]
-        if not preds[tid]:
-            longest[tid] = durations[tid]
-        else:
-            longest[tid] = durations[tid] + max(longest_path(p) for p in preds[tid])
-        return longest[tid]
-
-    for tid in durations:
-        longest_path(tid)
-
-    end_task = max(durations.keys(), key=lambda x: longest[x])
-    critical_path = []
-
-    def build(tid: str):
-        critical_path.append(tid)
-        if preds[tid]:
-            nxt = max(preds[tid], key=lambda p: longest[p])
-            build(nxt)
-
-    build(end_task)
-    critical_path.reverse()
-
-    project_duration = max(early_finish.values()) if early_finish else 0.0
-    order = _topological_sort(list(durations.keys()), preds)
-    late_finish: Dict[str, float] = {}
-    late_start: Dict[str, float] = {}
-    for tid in reversed(order):
-        succ = succs.get(tid) or []
-        if not succ:
-            lf = project_duration
+
+# ------------------- WBS Endpoints -------------------
+
+
+def _task_duration(t: Task) -> float:
+    """Duration used for scheduling, falling back to the task dates or one day."""
+    dur = t.duration_days
+    if not dur:
+        if t.start_date and t.end_date:
+            dur = max((t.end_date - t.start_date).days, 1)
         else:
-            lf = min(late_start[s] for s in succ)
-        late_finish[tid] = lf
-        late_start[tid] = lf - durations[tid]
-
-    results = {}
-    for tid in durations:
-        results[tid] = {
-            "early_start": early_start[tid],
-            "early_finish": early_finish[tid],
-            "late_start": late_start[tid],
-            "late_finish": late_finish[tid],
-            "total_float": late_start[tid] - early_start[tid],
-            "duration": durations[tid],
-            "is_critical": tid in critical_path,
+            dur = 1
+    return dur
+
+
+@lru_cache(maxsize=64)
+def _work_calendar(
+    start: date, working_days: tuple, holidays: tuple
+) -> WorkCalendar:
+    return WorkCalendar(start, working_days, holidays)
+
+
+def _project_calendar(
+    project: dict,
+    anchor: Optional[datetime] = None,
+    calendar: Optional[CPMCalendar] = None,
+) -> Optional[WorkCalendar]:
+    """Working calendar anchored at ``anchor`` or the project start date."""
+    start = anchor or project.get("start_date")
+    if start is None:
+        return None
+    if isinstance(start, str):
+        start = datetime.fromisoformat(start)
+    if isinstance(start, datetime):
+        start = start.date()
+    if calendar is None:
+        calendar = CPMCalendar(**(project.get("calendar") or {}))
+    return _work_calendar(
+        start, tuple(calendar.working_days), tuple(sorted(calendar.holidays))
+    )
+
+
+# Last CPM network per (project, discipline); single-task edits re-propagate
+# only through the affected part of the network instead of a full recompute.
+cpm_scheduler = IncrementalScheduler()
+
+
+def _schedule_network(tasks: List[Task], schedule_key: tuple) -> CPMNetwork:
+    """Return the cached CPM network for ``schedule_key``, updated for ``tasks``.
+
+    The network is only touched when the schedule fingerprint (IDs, durations
+    and predecessors) differs from the one it was last computed for.
+    """
+    try:
+        network = cpm_scheduler.schedule(
+            schedule_key,
+            [t.id for t in tasks],
+            [_task_duration(t) for t in tasks],
+            [t.predecessor_tasks or [] for t in tasks],
+        )
+    except CycleError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    logger.debug(
+        "CPM for %s touched %d of %d tasks",
+        schedule_key,
+        cpm_scheduler.last_touched,
+        len(network),
+    )
+    return network
+
+
+async def _level_schedule(
+    network: CPMNetwork,
+    assignees: Dict[str, Optional[str]],
+    calendar: Optional[WorkCalendar] = None,
+) -> tuple[float, Dict[str, Dict[str, Any]]]:
+    """Level ``network`` so no assignee works on more than one task at a time.
+
+    Each assignee's availability is their capacity and a task draws all of
+    it; tasks of unknown users, or users with no availability, are left at
+    their CPM dates. A non-numeric availability is rejected with a 400. Returns the leveled duration and per-task leveled
+    offsets, plus dates when ``calendar`` is given.
+    """
+    user_ids = sorted({a for a in assignees.values() if a})
+    users = (
+        await db.users.find(
+            {"id": {"$in": user_ids}}, {"_id": 0, "id": 1, "availability": 1}
+        ).to_list(None)
+        if user_ids
+        else []
+    )
+    availability_raw = [u.get("availability", 1.0) for u in users]
+    availability = _float_values(
+        [0.0 if a is None else a for a in availability_raw],
+        lambda i: f"Invalid availability '{availability_raw[i]}' for user "
+        f"{users[i].get('id')}",
+    )
+    capacity = {
+        u["id"]: float(share) for u, share in zip(users, availability) if share > 0
+    }
+    leveled = level_resources(
+        network, [assignees.get(tid) for tid in network.ids], capacity
+    )
+    metrics = leveled.results()
+    if calendar is not None and network.ids:
+        starts = calendar.dates(leveled.start).astype(object).tolist()
+        finishes = calendar.finish_dates(leveled.start, leveled.finish)
+        for tid, sd, fd in zip(network.ids, starts, finishes.astype(object).tolist()):
+            metrics[tid]["leveled_start_date"] = sd
+            metrics[tid]["leveled_finish_date"] = fd
+    return leveled.project_duration, metrics
+
+
+def _calculate_cpm(tasks: List[Task], schedule_key: Optional[tuple] = None):
+    """Compute critical path metrics for tasks.
+
+    When ``schedule_key`` is given the network is kept in ``cpm_scheduler`` and
+    later calls with the same key only re-propagate the edited tasks.
+    """
+    if schedule_key is not None:
+        network = _schedule_network(tasks, schedule_key)
+        return list(network.critical_path), network.results()
+    try:
+        return compute_cpm(
+            [t.id for t in tasks],
+            [_task_duration(t) for t in tasks],
+            [t.predecessor_tasks or [] for t in tasks],
+        )
+    except CycleError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+async def _record_wbs_audit(
+    project_id: str,
+    user_id: str,
+    nodes: List[WBSNode],
+    critical_path: List[str] | None,
+    metrics: Dict[str, Dict[str, float]] | None,
+    session: ClientSession | None = None,
+):
+    """Store a WBS version record with inference logs.
+
+    Every ``WBS_AUDIT_SNAPSHOT_INTERVAL`` versions a full snapshot is written;
+    the versions in between only store a patch against the previous state.
+    Regenerations that change nothing are not recorded; fields reconciliation
+    ignores, such as dependency timestamps, are left out of the history.
+    """
+    inference_logs = {"critical_path": critical_path, "metrics": metrics}
+    state = audit_state([_wbs_audit_node(n) for n in nodes], inference_logs)
+    try:
+        await _write_wbs_audit(project_id, user_id, state, session=session)
+    except Exception:
+        _wbs_audit_heads.pop(project_id, None)
+        raise
+
+
+def _wbs_audit_node(node: WBSNode) -> Dict[str, Any]:
+    doc = node.model_dump()
+    doc["dependency_metadata"] = _wbs_field_value(
+        "dependency_metadata", doc.get("dependency_metadata")
+    )
+    return doc
+
+
+async def _write_wbs_audit(
+    project_id: str,
+    user_id: str,
+    state: Dict[str, Any],
+    session: ClientSession | None = None,
+) -> None:
+    head = await _wbs_audit_head(project_id, session=session)
+    record = {
+        "project_id": project_id,
+        "version": head[0] + 1 if head else 1,
+        "timestamp": datetime.utcnow(),
+        "created_by": user_id,
+    }
+    if head is None or record["version"] - head[1] >= WBS_AUDIT_SNAPSHOT_INTERVAL:
+        record.update(
+            kind="snapshot",
+            nodes=audit_state_nodes(state),
+            inference_logs=state["inference_logs"],
+        )
+        snapshot_version = record["version"]
+    else:
+        patch = diff_audit_state(head[2], state)
+        if not patch:
+            return
+        record.update(kind="delta", patch=patch)
+        snapshot_version = head[1]
+    await db.wbs_audit.insert_one(record, session=session)
+    # A record written in a transaction may still be rolled back, so the head
+    # is only cached for writes that are already durable
+    if session is None:
+        _wbs_audit_heads[project_id] = (record["version"], snapshot_version, state)
+    else:
+        _wbs_audit_heads.pop(project_id, None)
+    if record["kind"] == "snapshot":
+        await compact_wbs_audit(project_id, session=session)
+
+
+# Full snapshot cadence and number of versions kept reconstructible
+WBS_AUDIT_SNAPSHOT_INTERVAL = int(os.environ.get("WBS_AUDIT_SNAPSHOT_INTERVAL", "20"))
+WBS_AUDIT_RETENTION_VERSIONS = int(os.environ.get("WBS_AUDIT_RETENTION_VERSIONS", "200"))
+
+# project_id -> (latest version, its base snapshot version, latest state)
+_wbs_audit_heads: Dict[str, tuple] = {}
+
+
+async def _load_wbs_audit_state(
+    project_id: str, version: int | None = None, session: ClientSession | None = None
+):
+    """Rebuild the audit state at ``version`` (latest if ``None``).
+
+    Returns ``(version, snapshot_version, state, record)`` where ``record`` is
+    the last audit document applied, or ``None`` when no history exists.
+    """
+    query: Dict[str, Any] = {"project_id": project_id, "kind": "snapshot"}
+    if version is not None:
+        query["version"] = {"$lte": version}
+    snapshots = (
+        await db.wbs_audit.find(query, session=session)
+        .sort("version", -1)
+        .limit(1)
+        .to_list(1)
+    )
+    if not snapshots:
+        return None
+    snapshot = snapshots[0]
+    bounds: Dict[str, int] = {"$gt": snapshot["version"]}
+    if version is not None:
+        bounds["$lte"] = version
+    deltas = (
+        await db.wbs_audit.find(
+            {"project_id": project_id, "kind": "delta", "version": bounds},
+            session=session,
+        )
+        .sort("version", 1)
+        .to_list(None)
+    )
+    state = audit_state(snapshot["nodes"], snapshot["inference_logs"])
+    record = snapshot
+    for record in deltas:
+        state = apply_audit_patch(state, record["patch"])
+    return record["version"], snapshot["version"], state, record
+
+
+async def _latest_wbs_audit_version(
+    project_id: str, session: ClientSession | None = None
+) -> int | None:
+    latest = (
+        await db.wbs_audit.find(
+            {"project_id": project_id, "version": {"$exists": True}},
+            projection={"_id": 0, "version": 1},
+            session=session,
+        )
+        .sort("version", -1)
+        .limit(1)
+        .to_list(1)
+    )
+    return latest[0]["version"] if latest else None
+
+
+async def _wbs_audit_head(project_id: str, session: ClientSession | None = None):
+    """Return ``(version, snapshot_version, state)`` of the latest record.
+
+    The cached head is only used while it matches the newest version stored,
+    as read within ``session``.
+    """
+    latest = await _latest_wbs_audit_version(project_id, session=session)
+    head = _wbs_audit_heads.get(project_id)
+    if head is not None and head[0] == latest:
+        return head
+    _wbs_audit_heads.pop(project_id, None)
+    if latest is None:
+        return None
+    loaded = await _load_wbs_audit_state(project_id, session=session)
+    if loaded is None:
+        return None
+    if session is None:
+        _wbs_audit_heads[project_id] = loaded[:3]
+    return loaded[:3]
+
+
+async def compact_wbs_audit(
+    project_id: str,
+    retain: int | None = None,
+    session: ClientSession | None = None,
+) -> int:
+    """Drop audit records older than the last ``retain`` versions.
+
+    History is cut at the newest snapshot that still precedes the retention
+    window so every retained version stays reconstructible. Records written
+    before versioning are folded in first, see :func:`_absorb_legacy_wbs_audit`.
+    """
+    retain = retain or WBS_AUDIT_RETENTION_VERSIONS
+    absorbed = await _absorb_legacy_wbs_audit(project_id, session=session)
+    latest = await _latest_wbs_audit_version(project_id, session=session)
+    if latest is None or latest - retain + 1 <= 1:
+        return absorbed
+    snapshots = (
+        await db.wbs_audit.find(
+            {
+                "project_id": project_id,
+                "kind": "snapshot",
+                "version": {"$lte": latest - retain + 1},
+            },
+            session=session,
+        )
+        .sort("version", -1)
+        .limit(1)
+        .to_list(1)
+    )
+    if not snapshots:
+        return absorbed
+    result = await db.wbs_audit.delete_many(
+        {"project_id": project_id, "version": {"$lt": snapshots[0]["version"]}},
+        session=session,
+    )
+    return absorbed + result.deleted_count
+
+
+async def _absorb_legacy_wbs_audit(
+    project_id: str, session: ClientSession | None = None
+) -> int:
+    """Fold audit records without a ``version`` into the versioned history.
+
+    Such records predate versioning and each holds a full WBS. When the
+    project has no versioned history yet, the newest of them becomes the
+    version 1 snapshot; every other one is deleted. Returns the number
+    deleted.
+    """
+    legacy = {"project_id": project_id, "version": {"$exists": False}}
+    newest = (
+        await db.wbs_audit.find(legacy, session=session)
+        .sort("timestamp", -1)
+        .limit(1)
+        .to_list(1)
+    )
+    if not newest:
+        return 0
+    if await _latest_wbs_audit_version(project_id, session=session) is None:
+        await db.wbs_audit.update_one(
+            {"_id": newest[0]["_id"]},
+            {"$set": {"version": 1, "kind": "snapshot"}},
+            session=session,
+        )
+    result = await db.wbs_audit.delete_many(legacy, session=session)
+    return result.deleted_count
+
+
+# Upper bound on documents sent per insert_many call
+WBS_WRITE_BATCH_SIZE = 1000
+
+
+async def _insert_many_chunked(
+    collection,
+    docs: List[Dict[str, Any]],
+    session: ClientSession | None = None,
+    batch_size: int | None = None,
+) -> int:
+    """Insert ``docs`` with ordered ``insert_many`` calls of ``batch_size``.
+
+    A duplicate key inside a batch is re-raised as ``DuplicateKeyError`` so
+    callers see the same error a single ``insert_one`` would produce.
+    """
+    batch_size = batch_size or WBS_WRITE_BATCH_SIZE
+    written = 0
+    for offset in range(0, len(docs), batch_size):
+        batch = docs[offset : offset + batch_size]
+        try:
+            await collection.insert_many(batch, ordered=True, session=session)
+        except BulkWriteError as exc:
+            raise _duplicate_key_error(exc) from exc
+        written += len(batch)
+    return written
+
+
+def _duplicate_key_error(exc: BulkWriteError) -> Exception:
+    """Return a ``DuplicateKeyError`` for bulk failures caused by one."""
+    errors = exc.details.get("writeErrors", [])
+    if errors and errors[0].get("code") == 11000:
+        return DuplicateKeyError(errors[0].get("errmsg", "duplicate key"), 11000)
+    return exc
+
+
+# Fields that never count as a change when reconciling WBS nodes
+_WBS_UNTRACKED_FIELDS = {"id", "created_by", "created_at"}
+_DEPENDENCY_UNTRACKED_FIELDS = {"created_by", "timestamp"}
+
+
+def _wbs_node_key(doc: Dict[str, Any]) -> tuple:
+    """Identify a WBS node across regenerations by task id or WBS code."""
+    if doc.get("task_id"):
+        return ("task", doc["task_id"])
+    return ("code", doc.get("wbs_code", ""))
+
+
+def _wbs_field_value(field: str, value: Any) -> Any:
+    if field == "dependency_metadata":
+        return [
+            {k: v for k, v in dep.items() if k not in _DEPENDENCY_UNTRACKED_FIELDS}
+            for dep in value or []
+        ]
+    return value
+
+
+def _diff_wbs_nodes(
+    existing: List[Dict[str, Any]], nodes: List[WBSNode]
+) -> list:
+    """Reconcile freshly generated ``nodes`` with the stored ``existing`` docs.
+
+    Nodes that match a stored document keep its ``id`` (and children are
+    re-pointed at it), so only the minimal set of ``DeleteOne``,
+    ``UpdateOne`` and ``InsertOne`` operations is returned, in that order.
+    Stored documents sharing a key with an earlier one are deleted.
+    """
+    remaining: Dict[tuple, Dict[str, Any]] = {}
+    deletes, updates, inserts = [], [], []
+    for doc in existing:
+        if remaining.setdefault(_wbs_node_key(doc), doc) is not doc:
+            deletes.append(DeleteOne({"id": doc["id"]}))
+    matched: List[Dict[str, Any] | None] = []
+    id_map: Dict[str, str] = {}
+    for node in nodes:
+        previous = remaining.pop(
+            _wbs_node_key({"task_id": node.task_id, "wbs_code": node.wbs_code}),
+            None,
+        )
+        matched.append(previous)
+        if previous is None:
+            continue
+        id_map[node.id] = previous["id"]
+        node.id = previous["id"]
+        node.created_by = previous.get("created_by", node.created_by)
+        node.created_at = previous.get("created_at", node.created_at)
+
+    for doc in remaining.values():
+        deletes.append(DeleteOne({"id": doc["id"]}))
+    for node, previous in zip(nodes, matched):
+        node.parent_id = id_map.get(node.parent_id, node.parent_id)
+        doc = node.model_dump()
+        if previous is None:
+            inserts.append(InsertOne(doc))
+            continue
+        changes = {
+            field: value
+            for field, value in doc.items()
+            if field not in _WBS_UNTRACKED_FIELDS
+            and _wbs_field_value(field, value)
+            != _wbs_field_value(field, previous.get(field))
         }
-    return critical_path, results
+        if changes:
+            updates.append(UpdateOne({"id": node.id}, {"$set": changes}))
+    return deletes + updates + inserts
 
 
-async def _record_wbs_audit(
+async def _persist_wbs_nodes(
     project_id: str,
-    user_id: str,
     nodes: List[WBSNode],
-    critical_path: List[str] | None,
-    metrics: Dict[str, Dict[str, float]] | None,
     session: ClientSession | None = None,
-):
-    """Store a WBS version record with inference logs."""
-    record = {
-        "project_id": project_id,
-        "timestamp": datetime.utcnow(),
-        "created_by": user_id,
-        "nodes": [n.model_dump() for n in nodes],
-        "inference_logs": {"critical_path": critical_path, "metrics": metrics},
-    }
-    await db.wbs_audit.insert_one(record)
+    reconcile: bool = True,
+) -> None:
+    """Write generated WBS nodes, either by diffing or by full replacement."""
+    if not reconcile:
+        await db.wbs.delete_many({"project_id": project_id}, session=session)
+        await _insert_many_chunked(
+            db.wbs, [n.model_dump() for n in nodes], session=session
+        )
+        return
+
+    existing = await db.wbs.find(
+        {"project_id": project_id}, session=session
+    ).to_list(None)
+    operations = _diff_wbs_nodes(existing, nodes)
+    if not operations:
+        return
+    try:
+        await db.wbs.bulk_write(operations, ordered=True, session=session)
+    except BulkWriteError as exc:
+        raise _duplicate_key_error(exc) from exc
 
 
 # Default grouping rules for building the WBS tree
@@ -1946,8 +2990,44 @@ def build_wbs_tree(tasks: List[Task], rules: Dict[str, Any]) -> Dict[str, List[T
     return tree
 
 
+# Per-project locks and their holder counts; nodes and audit versions are
+# project-wide, so generations of one project (whatever the discipline) must
+# not interleave
+_wbs_locks: Dict[str, asyncio.Lock] = {}
+_wbs_lock_holders: Dict[str, int] = {}
+
+
+@contextlib.asynccontextmanager
+async def _project_wbs_lock(project_id: str):
+    lock = _wbs_locks.setdefault(project_id, asyncio.Lock())
+    _wbs_lock_holders[project_id] = _wbs_lock_holders.get(project_id, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        _wbs_lock_holders[project_id] -= 1
+        if not _wbs_lock_holders[project_id]:
+            del _wbs_lock_holders[project_id], _wbs_locks[project_id]
+
+
 async def _generate_project_wbs(
-    project_id: str, current_user: User, session: ClientSession | None = None
+    project_id: str,
+    current_user: User,
+    session: ClientSession | None = None,
+    reconcile: bool = True,
+):
+    """Generate, persist and audit the project's WBS, one run per project."""
+    async with _project_wbs_lock(project_id):
+        return await _build_project_wbs(
+            project_id, current_user, session=session, reconcile=reconcile
+        )
+
+
+async def _build_project_wbs(
+    project_id: str,
+    current_user: User,
+    session: ClientSession | None = None,
+    reconcile: bool = True,
 ):
     project = await db.projects.find_one({"id": project_id})
     if not project:
@@ -1957,11 +3037,9 @@ async def _generate_project_wbs(
         {"project_id": project_id, "discipline": current_user.discipline}
     ).to_list(1000)
     tasks = [Task(**t) for t in tasks_data]
-    
-    # Clear existing WBS nodes
-    await db.wbs.delete_many({"project_id": project_id})
-    
+
     nodes = []
+    task_docs = []
     
     # Handle empty projects by creating a default WBS structure
     if not tasks:
@@ -2003,7 +3081,7 @@ async def _generate_project_wbs(
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow(),
             }
-            await db.tasks.insert_one(task_data)
+            task_docs.append(task_data)
             
             group_node = WBSNode(
                 project_id=project_id,
@@ -2020,12 +3098,19 @@ async def _generate_project_wbs(
                 wbs_code=str(g_idx),
                 children=None,
             )
-            await db.wbs.insert_one(group_node.model_dump())
             nodes.append(group_node)
             
             # Set up for next iteration
             previous_task_id = group_task_id
             cumulative_start += 30.0
+
+        await _insert_many_chunked(db.tasks, task_docs, session=session)
+        await _update_rollups(
+            "tasks", [(None, doc) for doc in task_docs], session=session
+        )
+        await _persist_wbs_nodes(
+            project_id, nodes, session=session, reconcile=reconcile
+        )
         
         # Record audit for default WBS creation
         # Calculate critical path for the sequential default structure
@@ -2045,12 +3130,15 @@ async def _generate_project_wbs(
             nodes,
             critical_path,
             metrics,
+            session=session,
         )
-        
+
         return nodes
 
     # Existing logic for projects with tasks
-    critical_path, metrics = _calculate_cpm(tasks)
+    critical_path, metrics = _calculate_cpm(
+        tasks, schedule_key=(project_id, current_user.discipline)
+    )
     grouped = build_wbs_tree(tasks, DEFAULT_WBS_RULES)
 
     for g_idx, (group_name, group_tasks) in enumerate(sorted(grouped.items()), start=1):
@@ -2069,7 +3157,6 @@ async def _generate_project_wbs(
             wbs_code=str(g_idx),
             children=None,
         )
-        await db.wbs.insert_one(group_node.model_dump())
         nodes.append(group_node)
 
         for t_idx, t in enumerate(group_tasks, start=1):
@@ -2100,16 +3187,16 @@ async def _generate_project_wbs(
                 "children": None,
                 "wbs_group": group_name,
             }
-            node = WBSNode(**node_data)
-            await db.wbs.insert_one(node.model_dump())
-            nodes.append(node)
+            nodes.append(WBSNode(**node_data))
 
+    await _persist_wbs_nodes(project_id, nodes, session=session, reconcile=reconcile)
     await _record_wbs_audit(
         project_id,
         current_user.id,
         nodes,
         critical_path,
         metrics,
+        session=session,
     )
 
     return nodes
@@ -2126,6 +3213,129 @@ async def generate_project_wbs_endpoint(
     return await _generate_project_wbs(project_id, current_user)
 
 
+@api_router.get("/projects/{project_id}/wbs/audit")
+async def list_wbs_audit_versions(
+    project_id: str, current_user: User = Depends(get_current_user)
+):
+    """List the retained WBS audit versions without their payloads."""
+    records = (
+        await db.wbs_audit.find(
+            {"project_id": project_id, "version": {"$exists": True}},
+            {"_id": 0, "version": 1, "kind": 1, "timestamp": 1, "created_by": 1},
+        )
+        .sort("version", 1)
+        .to_list(None)
+    )
+    return records
+
+
+@api_router.get("/projects/{project_id}/wbs/audit/{version}")
+async def get_wbs_audit_version(
+    project_id: str, version: int, current_user: User = Depends(get_current_user)
+):
+    """Reconstruct the WBS and inference logs recorded at ``version``."""
+    loaded = await _load_wbs_audit_state(project_id, version)
+    if loaded is None or loaded[0] != version:
+        raise HTTPException(status_code=404, detail="WBS audit version not found")
+    _, _, state, record = loaded
+    return {
+        "project_id": project_id,
+        "version": version,
+        "timestamp": record["timestamp"],
+        "created_by": record["created_by"],
+        "nodes": audit_state_nodes(state),
+        "inference_logs": state["inference_logs"],
+    }
+
+
+@api_router.post("/projects/{project_id}/wbs/audit/compact")
+async def compact_wbs_audit_endpoint(
+    project_id: str,
+    retain: Optional[int] = None,
+    current_user: User = Depends(require_role(UserRole.SCHEDULER)),
+):
+    if retain is not None and retain < 1:
+        raise HTTPException(status_code=400, detail="retain must be at least 1")
+    deleted = await compact_wbs_audit(project_id, retain)
+    return {"project_id": project_id, "deleted": deleted}
+
+
+# Seconds of quiet after the last task edit before the WBS is regenerated
+WBS_REGEN_DEBOUNCE_SECONDS = float(os.environ.get("WBS_REGEN_DEBOUNCE_SECONDS", "0.5"))
+# Upper bound for clients long-polling the WBS version
+WBS_VERSION_MAX_WAIT_SECONDS = 30.0
+
+
+async def _regenerate_project_wbs(key: tuple, current_user: User) -> None:
+    project_id, _discipline = key
+    await _generate_project_wbs(project_id, current_user)
+
+
+def _wbs_regeneration_key(project_id: str, current_user: User) -> tuple:
+    """Queue key of a WBS regeneration.
+
+    The generated WBS depends on the editor's discipline, so edits from
+    different disciplines must not be coalesced into one run.
+    """
+    return (project_id, current_user.discipline)
+
+
+wbs_regeneration = RegenerationQueue(
+    _regenerate_project_wbs, window=WBS_REGEN_DEBOUNCE_SECONDS
+)
+
+
+async def _check_task_schedule(task: Task, current_user: User) -> None:
+    """Reject an edit to ``task`` that would close a dependency cycle.
+
+    Runs before the edit is written, so the caller gets the 400 instead of
+    the queued regeneration failing in the background.
+    """
+    tasks_data = await db.tasks.find(
+        {"project_id": task.project_id, "discipline": current_user.discipline}
+    ).to_list(1000)
+    tasks = [Task(**t) for t in tasks_data if t.get("id") != task.id] + [task]
+    _schedule_network(tasks, (task.project_id, current_user.discipline))
+
+
+def _schedule_wbs_regeneration(
+    project_id: str, current_user: User, response: Response | None = None
+) -> int:
+    """Mark the project's WBS dirty and expose the version that will include it."""
+    version = wbs_regeneration.mark_dirty(
+        _wbs_regeneration_key(project_id, current_user), current_user
+    )
+    if response is not None:
+        response.headers["X-WBS-Version"] = str(version)
+    return version
+
+
+@api_router.get("/projects/{project_id}/wbs/version")
+async def get_project_wbs_version(
+    project_id: str,
+    wait_for: Optional[int] = None,
+    timeout: float = 10.0,
+    current_user: User = Depends(get_current_user),
+):
+    """Return the WBS version, optionally waiting until it reaches ``wait_for``.
+
+    Versions are counted per project and discipline of the caller.
+    """
+    key = _wbs_regeneration_key(project_id, current_user)
+    version = wbs_regeneration.version(key)
+    if wait_for is not None and version < wait_for:
+        version = await wbs_regeneration.wait_for(
+            key,
+            wait_for,
+            timeout=min(max(timeout, 0.0), WBS_VERSION_MAX_WAIT_SECONDS),
+        )
+    return {
+        "project_id": project_id,
+        "version": version,
+        "pending": wbs_regeneration.is_pending(key),
+    }
+
+
 @api_router.post("/projects/{project_id}/wbs/sync-tasks")
 async def sync_tasks_from_wbs(
     project_id: str, current_user: User = Depends(require_role(UserRole.SCHEDULER))
@@ -2163,6 +3373,7 @@ async def sync_tasks_from_wbs(
                     "updated_at": datetime.utcnow(),
                 }
                 await db.tasks.insert_one(task_data)
+                await _update_rollups("tasks", [(None, task_data)])
                 # Remove MongoDB _id field for JSON serialization
                 task_data.pop('_id', None)
                 synced_tasks.append(task_data)
@@ -2181,6 +3392,7 @@ async def sync_tasks_from_wbs(
                 )
                 # Create a clean dict without MongoDB ObjectId for JSON serialization
                 clean_task = {**existing_task, **update_data}
+                await _update_rollups("tasks", [(existing_task, clean_task)])
                 clean_task.pop('_id', None)
                 synced_tasks.append(clean_task)
     
@@ -2191,19 +3403,23 @@ async def sync_tasks_from_wbs(
 
 
 @api_router.get("/projects/{project_id}/wbs", response_model=List[WBSNode])
-async def get_project_wbs(project_id: str):
+async def get_project_wbs(project_id: str, stream: bool = False):
+    """Return the project WBS as a tree, or as flat NDJSON when ``stream``."""
     project = await db.projects.find_one({"id": project_id})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    nodes_data = await db.wbs.find({"project_id": project_id}).to_list(1000)
+    query = {"project_id": project_id}
+    if stream:
+        return _ndjson_response(db.wbs, query, WBSNode, sort_field="id")
+
     node_map: Dict[str, WBSNode] = {}
     roots: List[WBSNode] = []
-    for nd in nodes_data:
+    async for nd in iter_documents(db.wbs, query, "id"):
         node = WBSNode(**nd)
         node.children = []
         node_map[node.id] = node
-    for node in node_map.values():
+    for node in sorted(node_map.values(), key=lambda n: _wbs_code_key(n.wbs_code)):
         if node.parent_id and node.parent_id in node_map:
             parent = node_map[node.parent_id]
             if parent.children is None:
@@ -2214,14 +3430,30 @@ async def get_project_wbs(project_id: str):
     return roots
 
 
+def _wbs_code_key(code: str) -> tuple:
+    """Sort WBS codes numerically per level, so ``1.2`` precedes ``1.10``."""
+    return tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in code.split(".")
+    )
+
+
 @api_router.get("/projects/{project_id}/wbs/export", response_model=CPMExport)
 async def export_project_wbs_cpm(
     project_id: str,
-    working_days: str = "mon,tue,wed,thu,fri",
+    working_days: Optional[str] = None,
+    holidays: Optional[str] = None,
     anchor_date: Optional[str] = None,
+    level: bool = False,
     current_user: User = Depends(get_current_user),
 ):
-    """Export confirmed WBS for integration with external CPM services."""
+    """Export confirmed WBS for integration with external CPM services.
+
+    Task dates are computed on the project calendar, which ``working_days``
+    and ``holidays`` (comma-separated) override, anchored at ``anchor_date``
+    or the project start date. With ``level`` the export also carries the
+    resource-leveled schedule of the tasks' assignees.
+    """
     project = await db.projects.find_one({"id": project_id})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -2244,13 +3476,26 @@ async def export_project_wbs_cpm(
             )
         )
 
-    working = [d.strip().lower() for d in working_days.split(",") if d.strip()]
-    valid_days = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
-    for d in working:
-        if d not in valid_days:
-            raise HTTPException(status_code=400, detail=f"Invalid working day: {d}")
-
-    cal = CPMCalendar(working_days=working)
+    try:
+        cal = CPMCalendar(**(project.get("calendar") or {}))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if working_days is not None:
+        working = [d.strip().lower() for d in working_days.split(",") if d.strip()]
+        valid_days = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+        for d in working:
+            if d not in valid_days:
+                raise HTTPException(status_code=400, detail=f"Invalid working day: {d}")
+        cal.working_days = working
+    if holidays is not None:
+        try:
+            cal.holidays = [
+                date.fromisoformat(h.strip()) for h in holidays.split(",") if h.strip()
+            ]
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=400, detail="Invalid holidays format"
+            ) from exc
 
     anchor_dt = None
     if anchor_date:
@@ -2261,12 +3506,48 @@ async def export_project_wbs_cpm(
                 status_code=400, detail="Invalid anchor_date format"
             ) from exc
 
+    try:
+        work_cal = _project_calendar(project, anchor_dt, cal)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if work_cal and tasks:
+        starts = [t.early_start for t in tasks]
+        start_dates = work_cal.dates(starts).astype(object).tolist()
+        finish_dates = work_cal.finish_dates(
+            starts, [t.early_finish for t in tasks]
+        ).astype(object).tolist()
+        for t, sd, fd in zip(tasks, start_dates, finish_dates):
+            t.start_date = sd
+            t.finish_date = fd
+
+    leveled_duration = None
+    if level and tasks:
+        try:
+            network = CPMNetwork(
+                [t.task_id for t in tasks],
+                [t.duration_days for t in tasks],
+                [t.predecessors for t in tasks],
+            ).schedule()
+        except CycleError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        assigned = await db.tasks.find(
+            {"id": {"$in": network.ids}}, {"_id": 0, "id": 1, "assigned_to": 1}
+        ).to_list(None)
+        leveled_duration, leveled = await _level_schedule(
+            network, {d["id"]: d.get("assigned_to") for d in assigned}, work_cal
+        )
+        for t in tasks:
+            for field, value in leveled.get(t.task_id, {}).items():
+                if field in CPMExportTask.model_fields:
+                    setattr(t, field, value)
+
     return CPMExport.model_validate(
         {
             "project_id": project_id,
-            "anchor_date": anchor_dt,
+            "anchor_date": anchor_dt or project.get("start_date"),
             "calendar": cal.model_dump(),
             "tasks": [t.model_dump() for t in tasks],
+            "leveled_duration": leveled_duration,
         }
     )
 
@@ -2361,6 +3642,7 @@ async def split_task(
         raise HTTPException(status_code=404, detail="Task not found")
     node = await db.wbs.find_one({"task_id": task_id})
     await db.tasks.delete_one({"id": task_id})
+    await _update_rollups("tasks", [(task, None)])
     if node:
         await db.wbs.delete_one({"id": node["id"]})
     new_tasks = []
@@ -2368,7 +3650,9 @@ async def split_task(
         new_task_dict = task.copy()
         new_task_dict.update({"id": str(uuid.uuid4()), "title": title})
         new_task = Task(**new_task_dict)
-        await db.tasks.insert_one(new_task.model_dump())
+        new_task_doc = new_task.model_dump()
+        await db.tasks.insert_one(new_task_doc)
+        await _update_rollups("tasks", [(None, new_task_doc)])
         if node:
             code = f"{node.get('wbs_code', '')}.{idx}"
             if await db.wbs.find_one(
@@ -2418,8 +3702,12 @@ async def merge_tasks(
     merged["estimated_hours"] = sum(t.get("estimated_hours") or 0 for t in tasks)
     merged["duration_days"] = sum(t.get("duration_days") or 0 for t in tasks)
     merged_task = Task(**merged)
-    await db.tasks.insert_one(merged_task.model_dump())
+    merged_doc = merged_task.model_dump()
+    await db.tasks.insert_one(merged_doc)
     await db.tasks.delete_many({"id": {"$in": req.task_ids}})
+    await _update_rollups(
+        "tasks", [(None, merged_doc)] + [(task, None) for task in tasks]
+    )
     nodes = await db.wbs.find({"task_id": {"$in": req.task_ids}}).to_list(1000)
     parent_id = nodes[0].get("parent_id") if nodes else None
     code = nodes[0].get("wbs_code", "") if nodes else ""
@@ -2570,9 +3858,11 @@ async def update_sprint(sprint_id: str, sprint_update: dict):
 @api_router.delete("/sprints/{sprint_id}")
 async def delete_sprint(sprint_id: str, current_user: User = Depends(get_current_user)):
     # Remove sprint assignment from all tasks
-    await db.tasks.update_many(
-        {"sprint_id": sprint_id, "discipline": current_user.discipline},
-        {"$unset": {"sprint_id": ""}},
+    sprint_query = {"sprint_id": sprint_id, "discipline": current_user.discipline}
+    moved = await _rollup_sources_before("tasks", sprint_query)
+    await db.tasks.update_many(sprint_query, {"$unset": {"sprint_id": ""}})
+    await _update_rollups(
+        "tasks", [(task, {**task, "sprint_id": None}) for task in moved]
     )
 
     result = await db.sprints.delete_one({"id": sprint_id})
@@ -2584,19 +3874,29 @@ async def delete_sprint(sprint_id: str, current_user: User = Depends(get_current
 # Sprint Board (Kanban with sprint filtering)
 @api_router.get("/sprints/{sprint_id}/board")
 async def get_sprint_board(
-    sprint_id: str, current_user: User = Depends(get_current_user)
+    sprint_id: str,
+    lean: bool = False,
+    column: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
 ):
     sprint = await db.sprints.find_one({"id": sprint_id})
     if not sprint:
         raise HTTPException(status_code=404, detail="Sprint not found")
 
-    tasks = await db.tasks.find(
-        {"sprint_id": sprint_id, "discipline": current_user.discipline}
-    ).to_list(1000)
+    query = {"sprint_id": sprint_id, "discipline": current_user.discipline}
+    if lean:
+        board = await _lean_kanban(query, _status_columns(), limit, column, cursor)
+        if column is not None:
+            return board
+        return {"sprint": Sprint(**sprint).model_dump(), **board}
+
+    tasks = iter_documents(db.tasks, query, "created_at")
 
     sprint_board = {"todo": [], "in_progress": [], "review": [], "done": []}
 
-    for task in tasks:
+    async for task in tasks:
         task_obj = Task(**task)
         sprint_board[task_obj.status.value].append(task_obj.model_dump())
 
@@ -2721,6 +4021,10 @@ def calculate_burndown_data(tasks, start_date, end_date):
     return burndown_data
 
 
+# Uploads persisted to disk are copied in chunks of UPLOAD_CHUNK_BYTES
+UPLOAD_CHUNK_BYTES = int(os.environ.get("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
+
 # Document Management endpoints
 @api_router.post("/documents/upload")
 async def upload_document(
@@ -2754,11 +4058,7 @@ async def upload_document(
         file_path = documents_dir / unique_filename
 
         # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Get file size
-        file_size = file_path.stat().st_size
+        file_size = await save_upload(file, file_path, chunk_size=UPLOAD_CHUNK_BYTES)
 
         # Parse tags
         tag_list = (
@@ -2785,7 +4085,9 @@ async def upload_document(
         }
 
         document_obj = Document(**document_data)
-        await db.documents.insert_one(document_obj.model_dump())
+        document_doc = document_obj.model_dump()
+        await db.documents.insert_one(document_doc)
+        await _update_rollups("documents", [(None, document_doc)])
 
         return document_obj
 
@@ -2798,116 +4100,56 @@ async def upload_document(
         )
 
 
-def parse_mdr_excel(file_path: Path) -> List[Dict[str, Any]]:
+def parse_mdr_excel(source: Union[Path, IO[bytes]]) -> List[Dict[str, Any]]:
     """
     Parse MDR Excel file and extract document entries.
-    
+
     Expected columns:
     - Doc Number
-    - DOC Title  
+    - DOC Title
     - Category (or similar discipline column)
     - Status
     - IFR Date Planned, IFR Date Actual
-    - IFA Date Planned, IFA Date Actual  
+    - IFA Date Planned, IFA Date Actual
     - IFC Date Planned, IFC Date Actual
     - Remarks (optional)
     """
     try:
-        # Read Excel file
-        df = pd.read_excel(file_path)
+        df = pd.read_excel(source)
         logger.info(f"Read Excel file with columns: {df.columns.tolist()}")
-        
-        # Normalize column names to handle variations
-        column_mapping = {}
-        for col in df.columns:
-            col_lower = col.lower().strip()
-            if 'doc number' in col_lower or 'doc_number' in col_lower:
-                column_mapping['doc_number'] = col
-            elif 'doc title' in col_lower or 'document title' in col_lower:
-                column_mapping['doc_title'] = col
-            elif 'category' in col_lower or 'discipline' in col_lower:
-                column_mapping['category'] = col
-            elif 'status' in col_lower:
-                column_mapping['status'] = col
-            elif 'ifr' in col_lower and 'planned' in col_lower:
-                column_mapping['ifr_planned'] = col
-            elif 'ifr' in col_lower and 'actual' in col_lower:
-                column_mapping['ifr_actual'] = col
-            elif 'ifa' in col_lower and 'planned' in col_lower:
-                column_mapping['ifa_planned'] = col
-            elif 'ifa' in col_lower and 'actual' in col_lower:
-                column_mapping['ifa_actual'] = col
-            elif 'ifc' in col_lower and 'planned' in col_lower:
-                column_mapping['ifc_planned'] = col
-            elif 'ifc' in col_lower and 'actual' in col_lower:
-                column_mapping['ifc_actual'] = col
-            elif 'remarks' in col_lower:
-                column_mapping['remarks'] = col
-        
-        logger.info(f"Column mapping: {column_mapping}")
-        
-        # Extract data
-        entries = []
-        for _, row in df.iterrows():
-            # Skip empty rows
-            if pd.isna(row.get(column_mapping.get('doc_number', ''), '')):
-                continue
-                
-            entry = {
-                'doc_number': str(row.get(column_mapping.get('doc_number', ''), '')).strip(),
-                'doc_title': str(row.get(column_mapping.get('doc_title', ''), '')).strip(),
-                'category': str(row.get(column_mapping.get('category', ''), '')).strip(),
-                'status': str(row.get(column_mapping.get('status', ''), 'Not Started')).strip(),
-            }
-            
-            # Handle date fields
-            for date_field in ['ifr_planned', 'ifr_actual', 'ifa_planned', 'ifa_actual', 'ifc_planned', 'ifc_actual']:
-                if date_field in column_mapping:
-                    date_val = row.get(column_mapping[date_field])
-                    if pd.notna(date_val) and date_val != '':
-                        try:
-                            if isinstance(date_val, str):
-                                # Try parsing common date formats
-                                entry[date_field] = pd.to_datetime(date_val).date()
-                            else:
-                                entry[date_field] = date_val.date() if hasattr(date_val, 'date') else date_val
-                        except:
-                            logger.warning(f"Could not parse date {date_val} for {date_field}")
-                            entry[date_field] = None
-                    else:
-                        entry[date_field] = None
-            
-            # Handle remarks
-            if 'remarks' in column_mapping:
-                remarks_val = row.get(column_mapping['remarks'])
-                entry['remarks'] = str(remarks_val).strip() if pd.notna(remarks_val) else None
-            
-            entries.append(entry)
-        
+        entries = mdr_records(df)
         logger.info(f"Parsed {len(entries)} MDR entries")
         return entries
-        
+
     except Exception as e:
         logger.error(f"Error parsing MDR Excel file: {e}")
         raise
 
 
-def convert_mdr_to_kanban_activities(mdr_entries: List[Dict[str, Any]], project_id: str, created_by: str) -> List[Task]:
+# Kanban status of the task generated from an MDR entry
+MDR_TASK_STATUS = {
+    MDRStatus.NOT_STARTED: TaskStatus.TODO,
+    MDRStatus.IN_PROGRESS: TaskStatus.IN_PROGRESS,
+    MDRStatus.UNDER_REVIEW: TaskStatus.REVIEW,
+    MDRStatus.APPROVED: TaskStatus.DONE,
+    MDRStatus.COMPLETED: TaskStatus.DONE,
+}
+
+
+def convert_mdr_to_kanban_activities(
+    mdr_entries: List[Dict[str, Any]],
+    project_id: str,
+    created_by: str,
+    entry_ids: Optional[List[str]] = None,
+) -> List[Task]:
     """
     Convert MDR entries to Task objects for kanban boards, organized by discipline.
-    Each MDR entry becomes a task with the document number and title.
+    Each MDR entry becomes a task with the document number and title, linked
+    to its stored entry through ``mdr_entry_id`` when ``entry_ids`` (aligned
+    with ``mdr_entries``) is given.
     """
     tasks = []
     
-    # Map MDR status to TaskStatus
-    status_mapping = {
-        'Not Started': TaskStatus.TODO,
-        'In Progress': TaskStatus.IN_PROGRESS,
-        'Under Review': TaskStatus.REVIEW,
-        'Approved': TaskStatus.DONE,
-        'Completed': TaskStatus.DONE,
-    }
-    
     # Map MDR categories to simplified discipline names
     discipline_mapping = {
         'Project Management & Administration': 'Project Management',
@@ -2923,13 +4165,15 @@ def convert_mdr_to_kanban_activities(mdr_entries: List[Dict[str, Any]], project_
         'Environmental': 'Environmental',
     }
     
-    for entry in mdr_entries:
+    for index, entry in enumerate(mdr_entries):
         if not entry.get('doc_number') or not entry.get('doc_title'):
             continue
             
         # Map status
-        mdr_status = entry.get('status', 'Not Started')
-        task_status = status_mapping.get(mdr_status, TaskStatus.TODO)
+        mdr_status = MDR_STATUS_LOOKUP.get(
+            entry.get('status', 'Not Started').casefold(), MDRStatus.NOT_STARTED
+        )
+        task_status = MDR_TASK_STATUS[mdr_status]
         
         # Map discipline
         mdr_category = entry.get('category', '')
@@ -2954,7 +4198,8 @@ def convert_mdr_to_kanban_activities(mdr_entries: List[Dict[str, Any]], project_
             'discipline': discipline,
             'created_by': created_by,
             'due_date': due_date,
-            'tags': ['mdr', 'document', entry['doc_number'].split('-')[0].lower() if '-' in entry['doc_number'] else 'general']
+            'tags': ['mdr', 'document', entry['doc_number'].split('-')[0].lower() if '-' in entry['doc_number'] else 'general'],
+            'mdr_entry_id': entry_ids[index] if entry_ids else None,
         }
         
         # Add remarks to description if present
@@ -2967,101 +4212,299 @@ def convert_mdr_to_kanban_activities(mdr_entries: List[Dict[str, Any]], project_
     return tasks
 
 
+# Upper bound on documents sent per insert_many call during MDR imports
+MDR_WRITE_BATCH_SIZE = int(os.environ.get("MDR_WRITE_BATCH_SIZE", "1000"))
+
+
+def _transactions_unsupported(exc: OperationFailure) -> bool:
+    """Whether ``exc`` means the server cannot run transactions (standalone)."""
+    return exc.code == 20 or "Transaction numbers" in str(exc)
+
+
+async def _run_in_transaction(
+    write: Callable[[ClientSession | None], Awaitable[None]],
+    on_failure: Callable[[], Awaitable[None]] | None = None,
+) -> None:
+    """Run ``write`` inside a transaction.
+
+    Servers without transactions (standalone) run it without a session;
+    ``on_failure`` is then awaited to undo partial writes before re-raising.
+    """
+    try:
+        async with await client.start_session() as session:
+            async with session.start_transaction():
+                await write(session)
+        return
+    except OperationFailure as exc:
+        if not _transactions_unsupported(exc):
+            raise
+    logger.info("Transactions unavailable, writing without one")
+    try:
+        await write(None)
+    except Exception:
+        if on_failure is not None:
+            await on_failure()
+        raise
+
+
+async def _write_mdr_import(
+    entry_docs: List[Dict[str, Any]], task_docs: List[Dict[str, Any]]
+) -> None:
+    """Insert MDR entries and their kanban tasks all or nothing.
+
+    Both collections are written in chunked ``insert_many`` batches inside
+    one transaction. Servers without transactions get the same batches
+    outside a session, and whatever was written is deleted again if a later
+    batch fails. Rollups are updated once the documents are in.
+    """
+    batches = ((db.mdr_entries, entry_docs), (db.tasks, task_docs))
+
+    async def write(session: ClientSession | None) -> None:
+        for collection, docs in batches:
+            await _insert_many_chunked(
+                collection, docs, session=session, batch_size=MDR_WRITE_BATCH_SIZE
+            )
+
+    async def undo() -> None:
+        for collection, docs in batches:
+            await collection.delete_many({"id": {"$in": [doc["id"] for doc in docs]}})
+
+    await _run_in_transaction(write, undo)
+    await _update_rollups("mdr", [(None, doc) for doc in entry_docs])
+    await _update_rollups("tasks", [(None, doc) for doc in task_docs])
+
+
+def _mdr_entry_from_row(
+    entry_data: Dict[str, Any], project_id: str, created_by: str
+) -> MDREntry:
+    """Build an entry from a parsed MDR row, mapping unknown values to defaults."""
+    return MDREntry(
+        doc_number=entry_data['doc_number'],
+        doc_title=entry_data['doc_title'],
+        category=MDR_DISCIPLINE_LOOKUP.get(
+            entry_data['category'].casefold(), MDRDiscipline.PROJECT_MANAGEMENT
+        ),
+        status=MDR_STATUS_LOOKUP.get(
+            entry_data['status'].casefold(), MDRStatus.NOT_STARTED
+        ),
+        project_id=project_id,
+        ifr_planned_date=entry_data.get('ifr_planned'),
+        ifr_actual_date=entry_data.get('ifr_actual'),
+        ifa_planned_date=entry_data.get('ifa_planned'),
+        ifa_actual_date=entry_data.get('ifa_actual'),
+        ifc_planned_date=entry_data.get('ifc_planned'),
+        ifc_actual_date=entry_data.get('ifc_actual'),
+        remarks=entry_data.get('remarks'),
+        row_hash=row_hash(entry_data),
+        created_by=created_by,
+    )
+
+
+# Task fields owned by the MDR row; everything else (assignee, progress,
+# sprint ...) is left alone when a re-import updates the task
+MDR_TASK_FIELDS = (
+    "title",
+    "description",
+    "status",
+    "discipline",
+    "due_date",
+    "tags",
+    "updated_at",
+)
+
+
+async def _reimport_mdr(
+    project_id: str, rows: List[Dict[str, Any]], created_by: str
+) -> Dict[str, int]:
+    """Apply a revised register to the project's MDR entries and their tasks.
+
+    Rows are matched to stored entries on ``doc_number`` and compared by row
+    hash. Only new, changed and removed documents are written, as
+    ``bulk_write`` upserts and deletes, and the kanban task of a changed
+    document is updated in place. Returns the count of each kind of row.
+
+    When earlier plain uploads left several entries with one doc number, the
+    oldest is kept, as in :func:`backfill_mdr_task_links`, and the others are
+    removed with their tasks.
+
+    Rollups are updated after the write commits rather than inside it; a
+    crash between the two leaves them off until the next reconciliation.
+    """
+    by_number = {row["doc_number"]: row for row in rows if row["doc_number"]}
+    existing: Dict[str, Dict[str, Any]] = {}
+    duplicates: List[Dict[str, Any]] = []
+    async for doc in db.mdr_entries.find(
+        {"project_id": project_id},
+        {**ROLLUP_SOURCES["mdr"].projection, "id": 1, "doc_number": 1, "row_hash": 1},
+    ).sort([("created_at", 1), ("id", 1)]):
+        if existing.setdefault(doc["doc_number"], doc) is not doc:
+            duplicates.append(doc)
+    delta = classify_rows(
+        {number: row_hash(row) for number, row in by_number.items()},
+        {number: doc.get("row_hash") for number, doc in existing.items()},
+    )
+    counts = delta.counts()
+    counts["removed"] += len(duplicates)
+    if not (delta.new or delta.changed or delta.removed or duplicates):
+        return counts
+
+    # Tasks from imports that predate mdr_entry_id are linked first, so they
+    # are updated below rather than duplicated
+    await backfill_mdr_task_links(db, project_id)
+    dropped = [existing[n] for n in delta.removed] + duplicates
+    touched = [existing[n]["id"] for n in delta.changed]
+    touched += [doc["id"] for doc in dropped]
+    linked: Dict[str, List[dict]] = {}
+    for task in await db.tasks.find(
+        {"mdr_entry_id": {"$in": touched}},
+        {**ROLLUP_SOURCES["tasks"].projection, "mdr_entry_id": 1},
+    ).to_list(None):
+        linked.setdefault(task["mdr_entry_id"], []).append(task)
+
+    entry_ops, task_ops = [], []
+    entry_changes, task_changes = [], []
+    new_ids = []
+    for number in delta.new + delta.changed:
+        row = by_number[number]
+        entry = _mdr_entry_from_row(row, project_id, created_by).model_dump()
+        on_insert = {k: entry.pop(k) for k in ("id", "created_by", "created_at")}
+        if number in existing:
+            target = {"id": existing[number]["id"]}
+        else:
+            target = {"project_id": project_id, "doc_number": number}
+        entry_ops.append(
+            UpdateOne(
+                target,
+                {"$set": entry, "$setOnInsert": on_insert},
+                upsert=True,
+            )
+        )
+        entry_changes.append((existing.get(number), entry))
+
+        if number in existing:
+            entry_id = existing[number]["id"]
+        else:
+            entry_id = on_insert["id"]
+            new_ids.append(entry_id)
+        tasks = convert_mdr_to_kanban_activities(
+            [row], project_id, created_by, entry_ids=[entry_id]
+        )
+        if not tasks:
+            continue
+        task = tasks[0].model_dump()
+        owned = {k: task.pop(k) for k in MDR_TASK_FIELDS}
+        del task["mdr_entry_id"]  # seeded from the upsert filter
+        task_ops.append(
+            UpdateMany(
+                {"mdr_entry_id": entry_id},
+                {"$set": owned, "$setOnInsert": task},
+                upsert=True,
+            )
+        )
+        before = linked.get(entry_id) or [None]
+        task_changes.extend((b, {**(b or task), **owned}) for b in before)
+
+    for doc in dropped:
+        entry_id = doc["id"]
+        entry_ops.append(DeleteOne({"id": entry_id}))
+        entry_changes.append((doc, None))
+        task_ops.append(DeleteMany({"mdr_entry_id": entry_id}))
+        task_changes.extend((task, None) for task in linked.get(entry_id, []))
+
+    # Tasks are written before the entries that carry the row hashes, so
+    # without a transaction an entry is only marked current once its task
+    # is; anything left stale is rewritten by the next import
+    async def write(session: ClientSession | None) -> None:
+        for collection, ops in ((db.tasks, task_ops), (db.mdr_entries, entry_ops)):
+            if ops:
+                await collection.bulk_write(ops, ordered=False, session=session)
+
+    # New entries get fresh ids on every import, so whatever was written for
+    # them is removed again rather than left orphaned
+    async def undo() -> None:
+        if new_ids:
+            await db.tasks.delete_many({"mdr_entry_id": {"$in": new_ids}})
+            await db.mdr_entries.delete_many({"id": {"$in": new_ids}})
+
+    await _run_in_transaction(write, undo)
+    await _update_rollups("mdr", entry_changes)
+    await _update_rollups("tasks", task_changes)
+    return counts
+
+
+@api_router.post("/mdr/backfill-task-links")
+async def backfill_mdr_task_links_endpoint(
+    project_id: Optional[str] = None,
+    current_user: User = Depends(require_role(UserRole.SCHEDULER)),
+):
+    """Link MDR tasks created before ``mdr_entry_id`` existed to their entries."""
+    return await backfill_mdr_task_links(db, project_id)
+
+
 @api_router.post("/mdr/upload")
 async def upload_mdr_excel(
     file: UploadFile = File(...),
     project_id: str = Form(...),
+    reimport: bool = Form(False),
     current_user: User = Depends(require_role(UserRole.SCHEDULER)),
 ):
     """
     Upload and process an MDR Excel file to create kanban activities per discipline.
+
+    With ``reimport`` the file is treated as a revision of the project's
+    register: only new, changed and removed documents are written.
     """
     try:
         # Validate file type
         if not file.filename.endswith(('.xlsx', '.xls')):
             raise HTTPException(status_code=400, detail="File must be an Excel file (.xlsx or .xls)")
         
-        # Create temporary file
-        documents_dir = ROOT_DIR / "documents"
-        documents_dir.mkdir(exist_ok=True)
-        temp_path = documents_dir / f"mdr_{uuid.uuid4()}.xlsx"
-        
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Parse MDR Excel file
-        mdr_entries = parse_mdr_excel(temp_path)
+        # The request body is already spooled by Starlette; parse it in place
+        # off the event loop
+        await file.seek(0)
+        mdr_entries = await asyncio.to_thread(parse_mdr_excel, file.file)
         
         if not mdr_entries:
             raise HTTPException(status_code=400, detail="No valid MDR entries found in the Excel file")
         
-        # Store MDR entries in database
-        created_mdr_entries = []
-        for entry_data in mdr_entries:
-            # Map category to MDRDiscipline enum
-            mdr_discipline = None
-            for disc in MDRDiscipline:
-                if disc.value.lower() == entry_data['category'].lower():
-                    mdr_discipline = disc
-                    break
-            
-            if not mdr_discipline:
-                # Default to PROJECT_MANAGEMENT if no match
-                mdr_discipline = MDRDiscipline.PROJECT_MANAGEMENT
-            
-            # Map status to MDRStatus enum
-            mdr_status = None
-            for status in MDRStatus:
-                if status.value.lower() == entry_data['status'].lower():
-                    mdr_status = status
-                    break
-            
-            if not mdr_status:
-                mdr_status = MDRStatus.NOT_STARTED
-            
-            mdr_entry = MDREntry(
-                doc_number=entry_data['doc_number'],
-                doc_title=entry_data['doc_title'],
-                category=mdr_discipline,
-                status=mdr_status,
-                project_id=project_id,
-                ifr_planned_date=entry_data.get('ifr_planned'),
-                ifr_actual_date=entry_data.get('ifr_actual'),
-                ifa_planned_date=entry_data.get('ifa_planned'),
-                ifa_actual_date=entry_data.get('ifa_actual'),
-                ifc_planned_date=entry_data.get('ifc_planned'),
-                ifc_actual_date=entry_data.get('ifc_actual'),
-                remarks=entry_data.get('remarks'),
-                created_by=current_user.id
-            )
-            
-            await db.mdr_entries.insert_one(mdr_entry.model_dump())
-            created_mdr_entries.append(mdr_entry)
-        
+        if reimport:
+            counts = await _reimport_mdr(project_id, mdr_entries, current_user.id)
+            return {
+                "message": f"Re-imported {len(mdr_entries)} MDR entries",
+                **counts,
+            }
+
+        created_mdr_entries = [
+            _mdr_entry_from_row(entry_data, project_id, current_user.id)
+            for entry_data in mdr_entries
+        ]
+
         # Convert MDR entries to kanban activities
-        kanban_tasks = convert_mdr_to_kanban_activities(mdr_entries, project_id, current_user.id)
-        
-        # Store tasks in database
-        created_tasks = []
-        for task in kanban_tasks:
-            await db.tasks.insert_one(task.model_dump())
-            created_tasks.append(task)
-        
+        created_tasks = convert_mdr_to_kanban_activities(
+            mdr_entries,
+            project_id,
+            current_user.id,
+            entry_ids=[entry.id for entry in created_mdr_entries],
+        )
+
+        entry_docs = [entry.model_dump() for entry in created_mdr_entries]
+        task_docs = [task.model_dump() for task in created_tasks]
+        await _write_mdr_import(entry_docs, task_docs)
+
         return {
             "message": f"Successfully processed {len(mdr_entries)} MDR entries",
             "mdr_entries_created": len(created_mdr_entries),
             "kanban_tasks_created": len(created_tasks),
+            # insert_many adds ObjectIds to the written docs, so dump afresh
             "entries": [entry.model_dump() for entry in created_mdr_entries],
-            "tasks": [task.model_dump() for task in created_tasks]
+            "tasks": [task.model_dump() for task in created_tasks],
         }
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing MDR file: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to process MDR file: {str(e)}")
-    finally:
-        # Clean up temporary file
-        if 'temp_path' in locals() and temp_path.exists():
-            temp_path.unlink()
 
 
 @api_router.get("/mdr/entries/{project_id}")
@@ -3069,6 +4512,10 @@ async def get_mdr_entries(
     project_id: str,
     discipline: Optional[str] = None,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    stream: bool = False,
+    response: Response = None,
     current_user: User = Depends(get_current_user),
 ):
     """Get MDR entries for a project, optionally filtered by discipline and status."""
@@ -3080,8 +4527,11 @@ async def get_mdr_entries(
     if status:
         query["status"] = status
     
-    entries = await db.mdr_entries.find(query).to_list(1000)
-    return [MDREntry(**entry) for entry in entries]
+    if stream:
+        return _ndjson_response(db.mdr_entries, query, MDREntry)
+    return await _paginate(
+        response, db.mdr_entries, query, MDREntry, limit=limit, cursor=cursor
+    )
 
 
 @api_router.get("/mdr/dashboard/{project_id}")
@@ -3090,9 +4540,20 @@ async def get_mdr_dashboard(
     current_user: User = Depends(get_current_user),
 ):
     """Get MDR dashboard statistics for a project."""
-    entries = await db.mdr_entries.find({"project_id": project_id}).to_list(1000)
-    
-    if not entries:
+    rows = await _read_rollups({"project_id": project_id})
+    by_status = {}
+    by_discipline = {}
+    for row in rows:
+        mdr = row.get("mdr", {})
+        if not mdr.get("total"):
+            continue
+        discipline = row.get("discipline") or "Unknown"
+        by_discipline[discipline] = by_discipline.get(discipline, 0) + mdr["total"]
+        for status, count in mdr.get("status", {}).items():
+            by_status[status] = by_status.get(status, 0) + count
+    total_documents = sum(by_discipline.values())
+
+    if not total_documents:
         return MDRSummary(
             total_documents=0,
             by_status={},
@@ -3101,24 +4562,21 @@ async def get_mdr_dashboard(
             upcoming_milestones=0
         )
     
-    # Calculate statistics
-    total_documents = len(entries)
-    by_status = {}
-    by_discipline = {}
+    # Only the date checks still need the entries, and only their dates
+    date_fields = ["ifr_planned_date", "ifa_planned_date", "ifc_planned_date"]
+    entries = db.mdr_entries.find(
+        {
+            "project_id": project_id,
+            "$or": [{field: {"$ne": None}} for field in date_fields],
+        },
+        {"_id": 0, "status": 1, **{field: 1 for field in date_fields}},
+    )
     overdue_documents = 0
     upcoming_milestones = 0
     
     today = date.today()
     
-    for entry in entries:
-        # Count by status
-        status = entry.get('status', 'Not Started')
-        by_status[status] = by_status.get(status, 0) + 1
-        
-        # Count by discipline
-        discipline = entry.get('category', 'Unknown')
-        by_discipline[discipline] = by_discipline.get(discipline, 0) + 1
-        
+    async for entry in entries:
         # Check for overdue documents
         ifc_planned = entry.get('ifc_planned_date')
         if ifc_planned and isinstance(ifc_planned, (date, str)):
@@ -3132,7 +4590,7 @@ async def get_mdr_dashboard(
                 overdue_documents += 1
         
         # Check for upcoming milestones (next 30 days)
-        for date_field in ['ifr_planned_date', 'ifa_planned_date', 'ifc_planned_date']:
+        for date_field in date_fields:
             planned_date = entry.get(date_field)
             if planned_date and isinstance(planned_date, (date, str)):
                 if isinstance(planned_date, str):
@@ -3175,6 +4633,20 @@ async def update_mdr_entry(
         )
     
     updated_entry = await db.mdr_entries.find_one({"id": entry_id})
+    await _update_rollups("mdr", [(existing_entry, updated_entry)])
+
+    # Keep the generated kanban task in step with the document status
+    if update_data.get("status") is not None:
+        task_query = {"mdr_entry_id": entry_id}
+        task_status = MDR_TASK_STATUS[MDRStatus(update_data["status"])]
+        linked = await _rollup_sources_before("tasks", task_query)
+        await db.tasks.update_many(
+            task_query,
+            {"$set": {"status": task_status, "updated_at": update_data["updated_at"]}},
+        )
+        await _update_rollups(
+            "tasks", [(task, {**task, "status": task_status}) for task in linked]
+        )
     return MDREntry(**updated_entry)
 
 
@@ -3190,13 +4662,14 @@ async def delete_mdr_entry(
         raise HTTPException(status_code=404, detail="MDR entry not found")
     
     # Delete associated tasks that were created from this MDR entry
-    await db.tasks.delete_many({
-        "title": {"$regex": f"^{entry['doc_number']}:"},
-        "tags": "mdr"
-    })
+    task_query = {"mdr_entry_id": entry_id}
+    removed = await _rollup_sources_before("tasks", task_query)
+    await db.tasks.delete_many(task_query)
+    await _update_rollups("tasks", [(task, None) for task in removed])
     
     # Delete the MDR entry
     await db.mdr_entries.delete_one({"id": entry_id})
+    await _update_rollups("mdr", [(entry, None)])
     
     return {"message": "MDR entry and associated tasks deleted successfully"}
 
@@ -3205,6 +4678,10 @@ async def delete_mdr_entry(
 async def get_mdr_kanban_board(
     project_id: str,
     discipline: Optional[str] = None,
+    lean: bool = False,
+    column: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user: User = Depends(get_current_user),
 ):
     """Get MDR-based kanban board for a project, optionally filtered by discipline."""
@@ -3213,8 +4690,17 @@ async def get_mdr_kanban_board(
     if discipline:
         query["discipline"] = discipline
     
-    tasks = await db.tasks.find(query).to_list(1000)
-    
+    if lean:
+        board = await _lean_kanban(query, _status_columns(), limit, column, cursor)
+        if column is not None:
+            return board
+        return {
+            "project_id": project_id,
+            "discipline": discipline,
+            **board,
+            "total_documents": sum(board["counts"].values()),
+        }
+
     # Group tasks by status for kanban board
     kanban_board = {
         "todo": [],
@@ -3223,17 +4709,36 @@ async def get_mdr_kanban_board(
         "done": []
     }
     
-    for task in tasks:
+    total = 0
+    entry_ids = set()
+    async for task in iter_documents(db.tasks, query, "created_at"):
+        total += 1
         task_obj = Task(**task)
         status_key = task_obj.status.value
         if status_key in kanban_board:
             kanban_board[status_key].append(task_obj.model_dump())
+        if task_obj.mdr_entry_id:
+            entry_ids.add(task_obj.mdr_entry_id)
+
+    # Join each card with the document it was generated from
+    entries = {}
+    if entry_ids:
+        entries = {
+            entry["id"]: entry
+            for entry in await db.mdr_entries.find(
+                {"id": {"$in": sorted(entry_ids)}},
+                {"_id": 0, "id": 1, "doc_number": 1, "status": 1, "category": 1},
+            ).to_list(None)
+        }
+    for cards in kanban_board.values():
+        for card in cards:
+            card["mdr_entry"] = entries.get(card["mdr_entry_id"])
     
     return {
         "project_id": project_id,
         "discipline": discipline,
         "board": kanban_board,
-        "total_documents": len(tasks)
+        "total_documents": total
     }
 
 
@@ -3244,6 +4749,10 @@ async def get_documents(
     category: Optional[str] = None,
     status: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    stream: bool = False,
+    response: Response = None,
     current_user: User = Depends(get_current_user),
 ):
     # Role-based access control
@@ -3298,16 +4807,28 @@ async def get_documents(
             {"tags": {"$in": [{"$regex": search, "$options": "i"}]}},
         ]
 
-    documents = await db.documents.find(query).to_list(1000)
-    return [Document(**doc) for doc in documents]
+    if stream:
+        return _ndjson_response(db.documents, query, Document)
+    return await _paginate(
+        response, db.documents, query, Document, limit=limit, cursor=cursor
+    )
 
 
 @api_router.get("/documents/dcc", response_model=List[Document])
-async def get_dcc_documents(current_user: User = Depends(get_current_user)):
-    docs = await db.documents.find({"review_step": DocumentReviewStep.DCC}).to_list(
-        1000
+async def get_dcc_documents(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    response: Response = None,
+    current_user: User = Depends(get_current_user),
+):
+    return await _paginate(
+        response,
+        db.documents,
+        {"review_step": DocumentReviewStep.DCC},
+        Document,
+        limit=limit,
+        cursor=cursor,
     )
-    return [Document(**d) for d in docs]
 
 
 @api_router.get("/documents/{document_id}", response_model=Document)
@@ -3426,6 +4947,7 @@ async def update_document(
     await db.documents.update_one({"id": document_id}, {"$set": update_data})
 
     updated_document = await db.documents.find_one({"id": document_id})
+    await _update_rollups("documents", [(document, updated_document)])
     if new_status or review_step:
         status_val = (
             update_data.get("status", document["status"])
@@ -3450,6 +4972,7 @@ async def finalize_document(
     update_data = {"dcc_completed_at": datetime.utcnow()}
     await db.documents.update_one({"id": document_id}, {"$set": update_data})
     updated = await db.documents.find_one({"id": document_id})
+    await _update_rollups("documents", [(doc, updated)])
     await send_notification(
         Document(**updated),
         f"Document '{updated['title']}' finalized by DCC",
@@ -3458,6 +4981,14 @@ async def finalize_document(
     return Document(**updated)
 
 
+async def _set_task_status(task_id: str, status: TaskStatus) -> None:
+    task = await db.tasks.find_one({"id": task_id})
+    if not task:
+        return
+    await db.tasks.update_one({"id": task_id}, {"$set": {"status": status}})
+    await _update_rollups("tasks", [(task, {**task, "status": status})])
+
+
 @api_router.post("/documents/{document_id}/advance_review")
 async def advance_document_review(document_id: str, revision: bool = False):
     """Move a document through the DIC -> IDC -> DCC workflow."""
@@ -3476,9 +5007,7 @@ async def advance_document_review(document_id: str, revision: bool = False):
             f"Document '{doc.title}' requires revisions and was returned to DIC"
         )
         if doc.task_id:
-            await db.tasks.update_one(
-                {"id": doc.task_id}, {"$set": {"status": TaskStatus.IN_PROGRESS}}
-            )
+            await _set_task_status(doc.task_id, TaskStatus.IN_PROGRESS)
     else:
         if doc.review_step == DocumentReviewStep.DIC:
             update_data["review_step"] = DocumentReviewStep.IDC
@@ -3486,9 +5015,7 @@ async def advance_document_review(document_id: str, revision: bool = False):
             update_data["status"] = DocumentStatus.UNDER_REVIEW
             notification = f"Document '{doc.title}' sent for client approval"
             if doc.task_id:
-                await db.tasks.update_one(
-                    {"id": doc.task_id}, {"$set": {"status": TaskStatus.REVIEW}}
-                )
+                await _set_task_status(doc.task_id, TaskStatus.REVIEW)
         elif doc.review_step == DocumentReviewStep.IDC:
             update_data["review_step"] = DocumentReviewStep.DCC
             update_data["idc_completed_at"] = datetime.utcnow()
@@ -3497,15 +5024,14 @@ async def advance_document_review(document_id: str, revision: bool = False):
                 f"Document '{doc.title}' approved and sent to document control"
             )
             if doc.task_id:
-                await db.tasks.update_one(
-                    {"id": doc.task_id}, {"$set": {"status": TaskStatus.DONE}}
-                )
+                await _set_task_status(doc.task_id, TaskStatus.DONE)
         else:
             return {"message": "Document already in final stage"}
 
     await db.documents.update_one({"id": document_id}, {"$set": update_data})
 
     updated_document = await db.documents.find_one({"id": document_id})
+    await _update_rollups("documents", [(document, updated_document)])
     if notification:
         await send_notification(
             Document(**updated_document), notification, user_id=doc.created_by
@@ -3542,6 +5068,7 @@ async def update_document_status(
     await db.documents.update_one({"id": document_id}, {"$set": update_data})
 
     updated_document = await db.documents.find_one({"id": document_id})
+    await _update_rollups("documents", [(document, updated_document)])
     if new_status or review_step:
         status_val = (
             update_data.get("status", document["status"])
@@ -3572,14 +5099,26 @@ async def delete_document(
     result = await db.documents.delete_one({"id": document_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Document not found")
+    await _update_rollups("documents", [(document, None)])
 
     return {"message": "Document deleted successfully"}
 
 
 @api_router.get("/notifications", response_model=List[Notification])
-async def get_notifications(current_user: User = Depends(get_current_user)):
-    notes = await db.notifications.find({"user_id": current_user.id}).to_list(1000)
-    return [Notification(**n) for n in notes]
+async def get_notifications(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    response: Response = None,
+    current_user: User = Depends(get_current_user),
+):
+    return await _paginate(
+        response,
+        db.notifications,
+        {"user_id": current_user.id},
+        Notification,
+        limit=limit,
+        cursor=cursor,
+    )
 
 
 # Document analytics
@@ -3643,11 +5182,16 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-WBS-Version"],
 )
 
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if _rollup_reconciler is not None:
+        _rollup_reconciler.cancel()
+    await wbs_regeneration.flush()
+    await wbs_regeneration.close()
     client.close()
 
 
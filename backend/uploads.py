@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+async def _chunks(upload, chunk_size: int):
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def save_upload(
+    upload, path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Copy ``upload`` to ``path`` chunk by chunk and return the bytes written.
+
+    Reads go through the upload's async ``read`` and each blocking file call
+    runs in a worker thread, so a large file never holds the event loop.
+    """
+    buffer = await asyncio.to_thread(open, path, "wb")
+    written = 0
+    try:
+        async for chunk in _chunks(upload, chunk_size):
+            await asyncio.to_thread(buffer.write, chunk)
+            written += len(chunk)
+    finally:
+        await asyncio.to_thread(buffer.close)
+    return written
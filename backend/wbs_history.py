@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List
+
+
+def _escape(token: str) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def diff(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """Return JSON-patch style operations turning ``old`` into ``new``.
+
+    Dictionaries are compared key by key; any other value, including lists,
+    is replaced wholesale when it differs.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: List[Dict[str, Any]] = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(diff(old[key], value, child))
+        return ops
+    if old == new:
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(doc: Any, ops: List[Dict[str, Any]]) -> Any:
+    """Apply operations produced by :func:`diff` to a copy of ``doc``."""
+    result = copy.deepcopy(doc)
+    for op in ops:
+        tokens = [_unescape(t) for t in op["path"].split("/")[1:]]
+        if not tokens:
+            result = copy.deepcopy(op["value"])
+            continue
+        parent = result
+        for token in tokens[:-1]:
+            parent = parent[token]
+        if op["op"] == "remove":
+            parent.pop(tokens[-1], None)
+        else:
+            parent[tokens[-1]] = copy.deepcopy(op["value"])
+    return result
+
+
+def audit_state(nodes: List[Dict[str, Any]], inference_logs: Dict[str, Any]) -> Dict[str, Any]:
+    """Key WBS nodes by id so that deltas only touch nodes that changed."""
+    return {
+        "order": [n["id"] for n in nodes],
+        "nodes": {n["id"]: n for n in nodes},
+        "inference_logs": inference_logs,
+    }
+
+
+def state_nodes(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the nodes of an audit state in their original order."""
+    return [state["nodes"][node_id] for node_id in state["order"]]
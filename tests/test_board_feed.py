@@ -0,0 +1,188 @@
+import asyncio
+import types
+
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from backend.board_feed import BoardFeed, diff_cards
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs
+
+
+class Tasks:
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = 0
+
+    def find(self, query, projection=None):
+        self.finds += 1
+        matching = [
+            {k: v for k, v in d.items() if k in projection}
+            for d in self.docs
+            if all(d.get(k) == v for k, v in query.items())
+        ]
+        return Cursor(matching)
+
+    def watch(self, pipeline, full_document=None, resume_after=None):
+        raise OperationFailure("not a replica set", code=40573)
+
+
+def test_diff_cards_reports_moves_and_removals():
+    previous = {"a": {"id": "a", "status": "todo"}, "b": {"id": "b"}}
+    current = {"a": {"id": "a", "status": "done"}, "c": {"id": "c"}}
+
+    assert diff_cards(previous, current) == [
+        {"op": "upsert", "card": {"id": "a", "status": "done"}},
+        {"op": "upsert", "card": {"id": "c"}},
+        {"op": "delete", "id": "b"},
+    ]
+
+
+def test_change_events_are_scoped_and_projected():
+    feed = BoardFeed(None, ("id", "status"))
+    scope = {"discipline": "eng", "sprint_id": "s1"}
+    known = {}
+    doc = {"id": "t1", "status": "todo", "discipline": "eng", "sprint_id": "s1"}
+
+    moved_in = feed._change_delta(
+        scope, {"documentKey": {"_id": 1}, "fullDocument": doc}, known
+    )
+    moved_out = feed._change_delta(
+        scope,
+        {"documentKey": {"_id": 1}, "fullDocument": {**doc, "sprint_id": "s2"}},
+        known,
+    )
+    unrelated = feed._change_delta(scope, {"documentKey": {"_id": 2}}, known)
+
+    assert moved_in == {"op": "upsert", "card": {"id": "t1", "status": "todo"}}
+    assert moved_out == {"op": "delete", "id": "t1"}
+    assert unrelated is None
+
+
+def test_standalone_server_falls_back_to_polling():
+    tasks = Tasks(
+        [
+            {"id": "t1", "status": "todo", "discipline": "eng"},
+            {"id": "t2", "status": "todo", "discipline": "civil"},
+        ]
+    )
+    feed = BoardFeed(tasks, ("id", "status"), poll_interval=0.01)
+
+    async def scenario():
+        stream = feed.subscribe({"discipline": "eng"}, heartbeat=1)
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.03)
+        tasks.docs[0]["status"] = "done"
+        tasks.docs[1]["status"] = "done"
+        delta = await asyncio.wait_for(first, 1)
+        await stream.aclose()
+        return delta
+
+    delta = asyncio.run(scenario())
+
+    assert delta == {"op": "upsert", "card": {"id": "t1", "status": "done"}}
+    assert feed.use_change_streams is False
+    assert feed._channels == {}
+
+
+def test_watch_lets_through_changes_that_leave_the_scope():
+    pipelines = []
+
+    class Watched(Tasks):
+        def watch(self, pipeline, full_document=None, resume_after=None):
+            pipelines.append(pipeline)
+            raise OperationFailure("not a replica set", code=40573)
+
+    feed = BoardFeed(Watched([]), ("id",))
+
+    async def scenario():
+        try:
+            await feed._watch(types.SimpleNamespace(scope={"sprint_id": "s1"}))
+        except OperationFailure:
+            pass
+
+    asyncio.run(scenario())
+
+    branches = pipelines[0][0]["$match"]["$or"]
+    assert {"operationType": {"$in": ["delete", "replace"]}} in branches
+    assert {"updateDescription.removedFields": {"$in": ["sprint_id"]}} in branches
+
+
+def test_failed_producer_is_restarted_with_a_resync():
+    class Flaky(Tasks):
+        def find(self, query, projection=None):
+            if self.finds == 0:
+                self.finds += 1
+                raise RuntimeError("boom")
+            return super().find(query, projection)
+
+    tasks = Flaky([{"id": "t1", "status": "todo", "discipline": "eng"}])
+    feed = BoardFeed(tasks, ("id", "status"), poll_interval=0.01)
+
+    async def scenario():
+        stream = feed.subscribe({"discipline": "eng"}, heartbeat=1)
+        first = await asyncio.wait_for(stream.__anext__(), 1)
+        tasks.docs[0]["status"] = "done"
+        second = await asyncio.wait_for(stream.__anext__(), 1)
+        await stream.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first == {"op": "resync"}
+    assert second == {"op": "upsert", "card": {"id": "t1", "status": "done"}}
+
+
+class Stream:
+    def __init__(self, events, error):
+        self.events = events
+        self.error = error
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        for event in self.events:
+            yield event
+        await asyncio.sleep(0.01)
+        raise self.error
+
+
+def test_interrupted_change_stream_resumes_where_it_left_off():
+    doc = {"_id": 1, "id": "t1", "status": "todo", "discipline": "eng"}
+    resumed_after = []
+
+    class Streamed(Tasks):
+        def watch(self, pipeline, full_document=None, resume_after=None):
+            resumed_after.append(resume_after)
+            status = "todo" if len(resumed_after) == 1 else "done"
+            event = {
+                "_id": {"token": len(resumed_after)},
+                "documentKey": {"_id": 1},
+                "fullDocument": {**doc, "status": status},
+            }
+            return Stream([event], AutoReconnect("connection reset"))
+
+    feed = BoardFeed(Streamed([doc]), ("id", "status"), poll_interval=0.01)
+
+    async def scenario():
+        stream = feed.subscribe({"discipline": "eng"}, heartbeat=1)
+        first = await asyncio.wait_for(stream.__anext__(), 1)
+        second = await asyncio.wait_for(stream.__anext__(), 1)
+        await stream.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first["card"]["status"] == "todo"
+    assert second["card"]["status"] == "done"
+    assert resumed_after[:2] == [None, {"token": 1}]
+    assert feed.use_change_streams is True
@@ -0,0 +1,157 @@
+import time
+from datetime import date
+
+import pytest
+
+from backend.cpm_engine import (
+    CPMNetwork,
+    CycleError,
+    IncrementalScheduler,
+    WorkCalendar,
+    compute_cpm,
+)
+
+
+def test_compute_cpm_diamond_network():
+    ids = ["a", "b", "c", "d"]
+    durations = [2, 4, 1, 3]
+    preds = [[], ["a"], ["a"], ["b", "c"]]
+
+    cp, metrics = compute_cpm(ids, durations, preds)
+
+    assert cp == ["a", "b", "d"]
+    assert metrics["d"]["early_start"] == 6
+    assert metrics["d"]["early_finish"] == 9
+    assert metrics["c"]["late_start"] == 5
+    assert metrics["c"]["total_float"] == 3
+    assert metrics["b"]["total_float"] == 0
+    assert not metrics["c"]["is_critical"]
+
+
+def test_long_chain_does_not_recurse():
+    n = 20_000
+    ids = [f"t{i}" for i in range(n)]
+    preds = [[]] + [[f"t{i - 1}"] for i in range(1, n)]
+
+    network = CPMNetwork(ids, [1.0] * n, preds).schedule()
+
+    assert network.project_duration == n
+    assert network.critical_path[0] == "t0"
+    assert len(network.critical_path) == n
+    assert float(network.total_float.max()) == 0
+
+
+def test_long_chain_levels_in_linear_time():
+    n = 50_000
+    ids = [f"t{i}" for i in range(n)]
+    preds = [[]] + [[f"t{i - 1}"] for i in range(1, n)]
+    network = CPMNetwork(ids, [1.0] * n, preds)
+
+    began = time.perf_counter()
+    levels = network._levelize()
+    elapsed = time.perf_counter() - began
+
+    assert len(levels) == n
+    # A full in-degree pass per level made this take seconds
+    assert elapsed < 1.0
+
+
+def test_unknown_predecessors_are_ignored():
+    cp, metrics = compute_cpm(["a", "b"], [1, 2], [[], ["missing", "a"]])
+    assert cp == ["a", "b"]
+    assert metrics["b"]["early_start"] == 1
+
+
+def test_cycle_raises():
+    with pytest.raises(CycleError):
+        compute_cpm(["a", "b", "c"], [1, 1, 1], [["c"], ["a"], ["b"]])
+
+
+def _chain(n):
+    ids = [f"t{i}" for i in range(n)]
+    preds = [[]] + [[f"t{i - 1}"] for i in range(1, n)]
+    return ids, [1.0] * n, preds
+
+
+def test_incremental_duration_edit_matches_full_recompute():
+    ids, durations, preds = _chain(50)
+    ids.append("side")
+    durations.append(2.0)
+    preds.append(["t10"])
+    scheduler = IncrementalScheduler()
+    scheduler.schedule("p1", ids, durations, preds)
+
+    durations[45] = 4.0
+    network = scheduler.schedule("p1", ids, durations, preds)
+    reference = CPMNetwork(ids, durations, preds).schedule()
+
+    assert scheduler.last_touched < len(ids)
+    assert network.results() == reference.results()
+    assert network.critical_path == reference.critical_path
+
+
+def test_incremental_predecessor_edit_matches_full_recompute():
+    ids = ["a", "b", "c", "d"]
+    durations = [2.0, 4.0, 1.0, 3.0]
+    preds = [[], ["a"], ["a"], ["c"]]
+    scheduler = IncrementalScheduler()
+    scheduler.schedule("p1", ids, durations, preds)
+
+    preds[3] = ["b", "c"]
+    network = scheduler.schedule("p1", ids, durations, preds)
+    reference = CPMNetwork(ids, durations, preds).schedule()
+
+    assert network.results() == reference.results()
+    assert network.critical_path == ["a", "b", "d"]
+
+
+def test_unchanged_schedule_touches_nothing():
+    ids, durations, preds = _chain(10)
+    scheduler = IncrementalScheduler()
+    scheduler.schedule("p1", ids, durations, preds)
+    scheduler.schedule("p1", ids, durations, preds)
+    assert scheduler.last_touched == 0
+
+
+def test_incremental_cycle_discards_cached_network():
+    ids = ["a", "b"]
+    scheduler = IncrementalScheduler()
+    scheduler.schedule("p1", ids, [1, 1], [[], ["a"]])
+    with pytest.raises(CycleError):
+        scheduler.schedule("p1", ids, [1, 1], [["b"], ["a"]])
+    assert "p1" not in scheduler
+
+
+def test_work_calendar_skips_weekends_and_holidays():
+    calendar = WorkCalendar(date(2024, 7, 5), holidays=[date(2024, 7, 8)])
+
+    starts = calendar.dates([0, 1, 2])
+    finishes = calendar.finish_dates([0, 1], [1, 3])
+
+    assert [str(d) for d in starts] == ["2024-07-05", "2024-07-09", "2024-07-10"]
+    assert [str(d) for d in finishes] == ["2024-07-05", "2024-07-10"]
+    assert calendar.offset(date(2024, 7, 10)) == 2
+
+
+def test_work_calendar_grows_for_long_schedules():
+    calendar = WorkCalendar(date(2024, 1, 1), working_days=["mon", "wed"])
+    last = calendar.dates([1000])[0]
+    assert calendar.offset(last.astype(object)) == 1000
+
+
+def test_schedule_dates_for_network():
+    network = CPMNetwork(["a", "b"], [2, 1], [[], ["a"]]).schedule()
+    dates = WorkCalendar(date(2024, 7, 1)).schedule_dates(network)
+    assert [str(d) for d in dates["b"]] == ["2024-07-03"] * 4
+
+
+def test_results_cannot_alter_the_cached_network():
+    scheduler = IncrementalScheduler()
+    network = scheduler.schedule("p1", ["a", "b"], [2.0, 3.0], [[], ["a"]])
+
+    results = network.results()
+    results["a"]["early_finish"] = 99.0
+    del results["b"]
+
+    assert network.results()["a"]["early_finish"] == 2.0
+    assert set(scheduler.get("p1").results()) == {"a", "b"}
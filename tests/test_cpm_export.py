@@ -26,13 +26,20 @@ def load_server(monkeypatch, wbs_data):
         async def find_one(self, query):
             return self.find_one_result
 
-        def find(self, query):
+        def find(self, query, projection=None):
             return DummyCursor(self.list_result)
 
     class DummyDB:
         def __init__(self):
             self.projects = DummyCollection(find_one_result={"id": "p1"})
             self.wbs = DummyCollection(list_result=wbs_data)
+            self.tasks = DummyCollection(
+                list_result=[
+                    {"id": "t1", "assigned_to": "u1"},
+                    {"id": "t3", "assigned_to": "u1"},
+                ]
+            )
+            self.users = DummyCollection(list_result=[{"id": "u1"}])
 
     dummy_db = DummyDB()
 
@@ -172,3 +179,54 @@ def test_export_skips_group_nodes(monkeypatch):
     result = asyncio.run(server.export_project_wbs_cpm("p1", current_user=user))
     # only tasks with a task_id should be exported
     assert [t.task_id for t in result.tasks] == ["t1", "t2"]
+
+
+def test_export_returns_calendar_dates(monkeypatch):
+    server = load_server(monkeypatch, sample_wbs_with_groups())
+    server.db.projects.find_one_result = {
+        "id": "p1",
+        "start_date": server.datetime(2024, 7, 5),
+        "calendar": {"working_days": ["mon", "tue", "wed", "thu", "fri"]},
+    }
+    user = types.SimpleNamespace(discipline="eng")
+    result = asyncio.run(
+        server.export_project_wbs_cpm("p1", holidays="2024-07-08", current_user=user)
+    )
+    t1, t2 = result.tasks
+    # Friday start, weekend and a Monday holiday skipped
+    assert str(t1.start_date) == str(t1.finish_date) == "2024-07-05"
+    assert str(t2.start_date) == "2024-07-09"
+    assert str(t2.finish_date) == "2024-07-10"
+    assert [str(h) for h in result.calendar.holidays] == ["2024-07-08"]
+
+
+def test_export_includes_leveled_schedule(monkeypatch):
+    wbs = sample_wbs_with_groups()
+    wbs.append(
+        {
+            "id": "n3",
+            "project_id": "p1",
+            "task_id": "t3",
+            "title": "Task 3",
+            "duration_days": 1,
+            "predecessors": [],
+            "early_start": 0,
+            "early_finish": 1,
+            "is_critical": False,
+        }
+    )
+    server = load_server(monkeypatch, wbs)
+    server.db.projects.find_one_result = {"id": "p1", "start_date": "2024-07-01"}
+    user = types.SimpleNamespace(discipline="eng")
+
+    result = asyncio.run(
+        server.export_project_wbs_cpm("p1", level=True, current_user=user)
+    )
+
+    by_id = {t.task_id: t for t in result.tasks}
+    # t1 drives t2, so it keeps u1 first and t3 is pushed back a day
+    assert by_id["t1"].leveled_start == 0
+    assert by_id["t3"].leveled_start == 1
+    assert str(by_id["t3"].leveled_start_date) == "2024-07-02"
+    assert by_id["t2"].leveled_finish == 3
+    assert result.leveled_duration == 3
@@ -0,0 +1,262 @@
+import os
+import sys
+import types
+import asyncio
+from datetime import datetime, timedelta
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            for op, arg in cond.items():
+                if op == "$lt" and not (value is not None and value < arg):
+                    return False
+                if op == "$ne" and value == arg:
+                    return False
+                if op == "$in" and value not in arg:
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _evaluate(expr, doc):
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, dict) and "$ifNull" in expr:
+        value, default = expr["$ifNull"]
+        value = _evaluate(value, doc)
+        return default if value is None else value
+    if isinstance(expr, dict):
+        return {k: _evaluate(v, doc) for k, v in expr.items()}
+    return expr
+
+
+def _group(docs, spec):
+    groups = {}
+    for doc in docs:
+        key = _evaluate(spec["_id"], doc)
+        group = groups.setdefault(repr(key), {"_id": key})
+        for field, acc in spec.items():
+            if field != "_id":
+                group[field] = group.get(field, 0) + _evaluate(acc["$sum"], doc)
+    return list(groups.values())
+
+
+def load_server(
+    monkeypatch, projects, tasks, users=None, documents=None, mdr_entries=None
+):
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "testdb")
+    sys.modules["document_parser"] = types.ModuleType("document_parser")
+    sys.modules["document_parser"].parse_document = lambda *a, **k: None
+
+    class DummyCursor:
+        def __init__(self, result=None):
+            self._result = result or []
+
+        def sort(self, spec):
+            return self
+
+        def limit(self, n):
+            return self
+
+        async def to_list(self, length):
+            return self._result
+
+        def __aiter__(self):
+            return self._iterate()
+
+        async def _iterate(self):
+            for doc in self._result:
+                yield doc
+
+    class DummyCollection:
+        def __init__(self, docs):
+            self.docs = docs
+            self.pipelines = []
+            self.finds = 0
+            self.find_ones = 0
+            self.counts = 0
+
+        async def find_one(self, query):
+            self.find_ones += 1
+            return next((d for d in self.docs if _matches(d, query)), None)
+
+        def find(self, query, projection=None):
+            self.finds += 1
+            return DummyCursor([d for d in self.docs if _matches(d, query)])
+
+        async def count_documents(self, query):
+            self.counts += 1
+            return sum(1 for d in self.docs if _matches(d, query))
+
+        async def bulk_write(self, ops, ordered=True, session=None):
+            for op in ops:
+                self.docs[:] = [d for d in self.docs if not _matches(d, op._filter)]
+                if hasattr(op, "_doc"):
+                    self.docs.append(op._doc)
+
+        def aggregate(self, pipeline):
+            self.pipelines.append(pipeline)
+            docs = [d for d in self.docs if _matches(d, pipeline[0]["$match"])]
+            if "$group" in pipeline[1]:
+                return DummyCursor(_group(docs, pipeline[1]["$group"]))
+            facet = pipeline[1]["$facet"]
+            result = {}
+            for name, stages in facet.items():
+                n = sum(1 for d in docs if _matches(d, stages[0]["$match"]))
+                result[name] = [{"n": n}] if n else []
+            return DummyCursor([result])
+
+    class DummyDB:
+        def __init__(self):
+            self.projects = DummyCollection(projects)
+            self.tasks = DummyCollection(tasks)
+            self.users = DummyCollection(users or [])
+            self.documents = DummyCollection(documents or [])
+            self.mdr_entries = DummyCollection(mdr_entries or [])
+            self.rollups = DummyCollection([])
+
+    dummy_db = DummyDB()
+
+    class DummyClient:
+        def __getitem__(self, name):
+            return dummy_db
+
+    monkeypatch.setattr(
+        "motor.motor_asyncio.AsyncIOMotorClient", lambda *a, **kw: DummyClient()
+    )
+
+    server_path = os.path.join(os.path.dirname(__file__), "..", "backend", "server.py")
+    with open(server_path, "r") as f:
+        code = "from __future__ import annotations\n" + f.read()
+    module = types.ModuleType("server_under_test_dashboard")
+    module.__file__ = server_path
+    exec(compile(code, server_path, "exec"), module.__dict__)
+    for model in (
+        module.DashboardStats,
+        module.DisciplineDashboard,
+        module.DisciplineProjectSummary,
+        module.Project,
+    ):
+        model.model_rebuild(_types_namespace=module.__dict__)
+    asyncio.run(module.rebuild_rollups(dummy_db))
+    return module, dummy_db
+
+
+def _project(pid, name, status):
+    return {
+        "id": pid,
+        "name": name,
+        "description": "",
+        "status": status,
+        "start_date": datetime(2024, 7, 1),
+        "project_manager_id": "u1",
+        "created_by": "u1",
+    }
+
+
+def sample_data():
+    past = datetime.utcnow() - timedelta(days=3)
+    projects = [
+        _project("p1", "Plant", "active"),
+        _project("p2", "Pipeline", "completed"),
+    ]
+    tasks = [
+        {"id": "t1", "project_id": "p1", "discipline": "eng", "status": "done"},
+        {
+            "id": "t2",
+            "project_id": "p1",
+            "discipline": "eng",
+            "status": "in_progress",
+            "due_date": past,
+            "is_milestone": True,
+        },
+        {
+            "id": "t3",
+            "project_id": "p2",
+            "discipline": "eng",
+            "status": "todo",
+            "assigned_to": "default_user",
+        },
+        {"id": "t4", "project_id": "p1", "discipline": "civil", "status": "todo"},
+    ]
+    return projects, tasks
+
+
+def test_dashboard_stats_read_rollups(monkeypatch):
+    server, db = load_server(monkeypatch, *sample_data())
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    stats = asyncio.run(server.get_dashboard_stats(current_user=user))
+
+    assert stats.model_dump() == {
+        "total_projects": 2,
+        "active_projects": 1,
+        "total_tasks": 3,
+        "completed_tasks": 1,
+        "in_progress_tasks": 1,
+        "overdue_tasks": 1,
+        "my_tasks": 1,
+    }
+    assert len(db.projects.pipelines) == 1
+    assert not db.tasks.pipelines
+
+
+def test_project_dashboard_stats(monkeypatch):
+    server, db = load_server(monkeypatch, *sample_data())
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    stats = asyncio.run(server.get_project_dashboard_stats("p1", current_user=user))
+
+    assert stats.total_projects == 1
+    assert stats.active_projects == 1
+    assert stats.total_tasks == 2
+    assert stats.completed_tasks == 1
+    assert stats.overdue_tasks == 1
+    assert stats.my_tasks == 1
+    assert not db.tasks.pipelines and db.tasks.counts == 1
+
+
+def test_discipline_dashboard_batches_project_lookups(monkeypatch):
+    projects, tasks = sample_data()
+    for task in tasks:
+        task["assigned_to"] = "u1"
+    tasks[0]["estimated_hours"] = 20
+    tasks[0]["is_milestone"] = True
+    users = [{"id": "u1", "discipline": "eng", "availability": 0.5}]
+    server, db = load_server(monkeypatch, projects, tasks, users=users)
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    dashboard = asyncio.run(server.get_discipline_dashboard(current_user=user))
+
+    assert dashboard.tasks_by_status["done"] == 1
+    assert dashboard.tasks_by_status["todo"] == 1
+    assert dashboard.milestone_completion_percent == 50
+    assert dashboard.resource_utilization_percent == (20 + 8 + 8) / 20 * 100
+    progress = {p.project_id: p for p in dashboard.projects}
+    assert progress["p1"].project_name == "Plant"
+    assert progress["p1"].progress_percent == 50
+    assert progress["p2"].progress_percent == 0
+    assert db.projects.finds == 1 and db.projects.find_ones == 0
+    assert len(db.tasks.pipelines) == 1
+
+
+def test_discipline_projects_read_rollups(monkeypatch):
+    projects, tasks = sample_data()
+    projects.append(_project("p3", "Docs only", "active"))
+    documents = [
+        {"id": "d1", "project_id": "p3", "discipline": "eng"},
+        {"id": "d2", "project_id": "p1", "discipline": "eng"},
+        {"id": "d3", "project_id": None, "discipline": "eng"},
+    ]
+    server, db = load_server(monkeypatch, projects, tasks, documents=documents)
+
+    summaries = asyncio.run(server.get_discipline_projects("eng"))
+
+    counts = {s.project.id: (s.task_count, s.document_count) for s in summaries}
+    assert counts == {"p1": (2, 1), "p2": (1, 0), "p3": (0, 1)}
+    assert db.projects.finds == 1 and db.projects.find_ones == 0
+    assert not db.tasks.pipelines and not db.documents.pipelines
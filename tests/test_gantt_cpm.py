@@ -0,0 +1,198 @@
+import os
+import sys
+import types
+import asyncio
+import pymongo
+import pytest
+from datetime import datetime
+
+
+def load_server(monkeypatch, tasks_data):
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "testdb")
+    sys.modules["document_parser"] = types.ModuleType("document_parser")
+    sys.modules["document_parser"].parse_document = lambda *a, **k: None
+
+    class DummyCursor:
+        def __init__(self, result=None):
+            self._result = result or []
+
+        def sort(self, key, direction=1):
+            return self
+
+        def limit(self, n):
+            return self
+
+        async def to_list(self, length):
+            return self._result
+
+    class DummyCollection:
+        def __init__(self, find_one_result=None, list_result=None):
+            self.find_one_result = find_one_result
+            self.list_result = list_result or []
+            self.inserted = []
+
+        async def find_one(self, query, session=None):
+            return self.find_one_result
+
+        def find(self, query, projection=None, session=None):
+            return DummyCursor(self.list_result)
+
+        async def delete_many(self, filt, session=None):
+            pass
+
+        async def insert_one(self, doc, session=None):
+            self.inserted.append(doc)
+
+        async def insert_many(self, docs, ordered=True, session=None):
+            self.inserted.extend(docs)
+
+        async def bulk_write(self, requests, ordered=True, session=None):
+            self.inserted.extend(
+                op._doc for op in requests if isinstance(op, pymongo.InsertOne)
+            )
+
+    class DummyDB:
+        def __init__(self):
+            self.projects = DummyCollection(
+                find_one_result={"id": "p1", "start_date": datetime(2024, 7, 1)}
+            )
+            self.tasks = DummyCollection(list_result=tasks_data)
+            self.wbs = DummyCollection()
+            self.wbs_audit = DummyCollection()
+            self.users = DummyCollection(
+                list_result=[{"id": "u1", "availability": 1.0}]
+            )
+
+    dummy_db = DummyDB()
+
+    class DummyClient:
+        def __getitem__(self, name):
+            return dummy_db
+
+    monkeypatch.setattr(
+        "motor.motor_asyncio.AsyncIOMotorClient", lambda *a, **kw: DummyClient()
+    )
+
+    server_path = os.path.join(os.path.dirname(__file__), "..", "backend", "server.py")
+    with open(server_path, "r") as f:
+        code = "from __future__ import annotations\n" + f.read()
+    module = types.ModuleType("server_under_test_gantt")
+    module.__file__ = server_path
+    exec(compile(code, server_path, "exec"), module.__dict__)
+    for model in (
+        module.Task,
+        module.WBSNode,
+        module.DependencyMetadata,
+        module.GanttTask,
+        module.GanttData,
+    ):
+        model.model_rebuild(_types_namespace=module.__dict__)
+    return module, dummy_db
+
+
+def sample_tasks():
+    def task(id_, duration, preds, day):
+        return {
+            "id": id_,
+            "title": id_.upper(),
+            "description": "",
+            "discipline": "eng",
+            "project_id": "p1",
+            "created_by": "u1",
+            "duration_days": duration,
+            "predecessor_tasks": preds,
+            "start_date": datetime(2024, 7, day),
+            "end_date": datetime(2024, 7, day + int(duration)),
+        }
+
+    return [
+        task("a", 2.0, [], 1),
+        task("b", 1.0, [], 1),
+        task("c", 3.0, ["a"], 3),
+        task("d", 10.0, [], 1),
+    ]
+
+
+def test_gantt_matches_wbs_critical_flags(monkeypatch):
+    server, db = load_server(monkeypatch, sample_tasks())
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    nodes = asyncio.run(server._generate_project_wbs("p1", user))
+    gantt = asyncio.run(server.get_project_gantt("p1", current_user=user))
+
+    wbs_critical = {n.task_id for n in nodes if n.task_id and n.is_critical}
+    assert set(gantt.critical_path) == wbs_critical == {"d"}
+    by_id = {t.id: t for t in gantt.tasks}
+    assert by_id["c"].early_start == 2
+    assert by_id["c"].late_finish == 10
+    assert by_id["c"].total_float == 5
+    assert by_id["d"].is_critical
+    # Monday 2024-07-01 start on the default Mon-Fri calendar
+    assert str(by_id["c"].early_start_date) == "2024-07-03"
+    assert str(by_id["c"].early_finish_date) == "2024-07-05"
+    assert str(by_id["c"].late_finish_date) == "2024-07-12"
+
+
+def test_gantt_reuses_cached_schedule(monkeypatch):
+    server, db = load_server(monkeypatch, sample_tasks())
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    asyncio.run(server._generate_project_wbs("p1", user))
+    cached = server.cpm_scheduler.get(("p1", "eng"))
+    gantt = asyncio.run(server.get_project_gantt("p1", current_user=user))
+
+    assert server.cpm_scheduler.get(("p1", "eng")) is cached
+    assert server.cpm_scheduler.last_touched == 0
+    assert gantt.schedule_version == cached.version
+
+
+def test_gantt_levels_shared_assignee(monkeypatch):
+    tasks = sample_tasks()
+    for t in tasks:
+        t["assigned_to"] = "u1" if t["id"] in ("a", "b") else None
+    server, db = load_server(monkeypatch, tasks)
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    plain = asyncio.run(server.get_project_gantt("p1", current_user=user))
+    gantt = asyncio.run(server.get_project_gantt("p1", level=True, current_user=user))
+
+    assert plain.leveled_duration is None
+    assert all(t.leveled_start is None for t in plain.tasks)
+    by_id = {t.id: t for t in gantt.tasks}
+    # b has more float than a, so it waits for u1 to finish a
+    assert by_id["a"].leveled_start == 0
+    assert by_id["b"].leveled_start == 2
+    assert by_id["b"].resource_delay == 2
+    assert by_id["c"].leveled_start == 2
+    assert str(by_id["b"].leveled_start_date) == "2024-07-03"
+    assert str(by_id["b"].leveled_finish_date) == "2024-07-03"
+    assert gantt.leveled_duration == 10
+
+
+def test_gantt_rejects_invalid_stored_calendar(monkeypatch):
+    server, db = load_server(monkeypatch, sample_tasks())
+    db.projects.find_one_result["calendar"] = {"working_days": ["mon", "funday"]}
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    with pytest.raises(server.HTTPException) as exc:
+        asyncio.run(server.get_project_gantt("p1", current_user=user))
+
+    assert exc.value.status_code == 422
+    with pytest.raises(ValueError):
+        server.CPMCalendar(working_days=[])
+    assert server.CPMCalendar(working_days=["Sat "]).working_days == ["sat"]
+
+
+def test_gantt_leveling_rejects_invalid_availability(monkeypatch):
+    tasks = sample_tasks()
+    tasks[0]["assigned_to"] = "u1"
+    server, db = load_server(monkeypatch, tasks)
+    db.users.list_result = [{"id": "u1", "availability": "full"}]
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    with pytest.raises(server.HTTPException) as exc:
+        asyncio.run(server.get_project_gantt("p1", level=True, current_user=user))
+
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Invalid availability 'full' for user u1"
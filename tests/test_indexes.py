@@ -0,0 +1,89 @@
+import asyncio
+
+from backend.indexes import (
+    INDEXES,
+    IndexSpec,
+    QueryProbe,
+    ensure_indexes,
+    find_collection_scans,
+)
+
+
+class RecordingCollection:
+    def __init__(self, calls, name):
+        self.calls = calls
+        self.name = name
+
+    async def create_index(self, keys, unique=False, **options):
+        self.calls.append((self.name, tuple(keys), unique, *options.values()))
+        return "_".join(f"{k}_{d}" for k, d in keys)
+
+
+class FakeDB:
+    def __init__(self, plans=None):
+        self.calls = []
+        self.plans = plans or {}
+
+    def __getattr__(self, name):
+        if name == "broken":
+            raise RuntimeError("no such collection")
+        return RecordingCollection(self.calls, name)
+
+    async def command(self, cmd):
+        return {"queryPlanner": {"winningPlan": self.plans[cmd["explain"]["find"]]}}
+
+
+def test_registry_covers_hot_query_shapes():
+    keys = {(spec.collection, tuple(k for k, _ in spec.keys)) for spec in INDEXES}
+    assert ("tasks", ("project_id", "discipline", "due_date")) in keys
+    assert ("rollups", ("project_id", "discipline", "sprint_id")) in keys
+    assert ("documents", ("discipline", "project_id", "category", "status")) in keys
+    assert ("notifications", ("user_id", "created_at", "id")) in keys
+
+
+def test_ensure_indexes_is_idempotent_and_skips_failures():
+    db = FakeDB()
+    specs = [
+        IndexSpec("tasks", (("id", 1),), unique=True),
+        IndexSpec("broken", (("x", 1),)),
+        IndexSpec("users", (("id", 1),)),
+    ]
+
+    first = asyncio.run(ensure_indexes(db, specs))
+    second = asyncio.run(ensure_indexes(db, specs))
+
+    assert first == second == [specs[0], specs[2]]
+    assert db.calls[:2] == [
+        ("tasks", (("id", 1),), True),
+        ("users", (("id", 1),), False),
+    ]
+
+
+def test_partial_indexes_pass_their_filter():
+    db = FakeDB()
+    partial = {"version": {"$exists": True}}
+    spec = IndexSpec("wbs_audit", (("version", 1),), unique=True, partial=partial)
+
+    asyncio.run(ensure_indexes(db, [spec]))
+
+    assert db.calls == [("wbs_audit", (("version", 1),), True, partial)]
+    [audit] = [s for s in INDEXES if s.collection == "wbs_audit"]
+    assert audit.partial == partial
+
+
+def test_collection_scans_are_reported():
+    db = FakeDB(
+        plans={
+            "tasks": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+            "users": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}},
+        }
+    )
+    probes = [
+        QueryProbe("project tasks", "tasks", {"project_id": "?"}),
+        QueryProbe("user lookup", "users", {"id": "?"}),
+        QueryProbe("unexplainable", "missing", {}),
+    ]
+
+    scans = asyncio.run(find_collection_scans(db, probes))
+
+    assert [p.name for p in scans] == ["user lookup"]
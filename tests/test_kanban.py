@@ -0,0 +1,190 @@
+import os
+import sys
+import types
+import asyncio
+from datetime import datetime, timedelta
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        if key == "$and":
+            if not all(_matches(doc, q) for q in cond):
+                return False
+            continue
+        if key == "$or":
+            if not any(_matches(doc, q) for q in cond):
+                return False
+            continue
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            for op, arg in cond.items():
+                if op == "$in" and value not in arg:
+                    return False
+                if op == "$ne" and value == arg:
+                    return False
+                if op == "$gt" and not (value is not None and value > arg):
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _sorted(docs):
+    return sorted(docs, key=lambda d: (d["created_at"], d["id"]))
+
+
+def _project(doc, projection):
+    return {k: doc[k] for k, v in projection.items() if v and k in doc}
+
+
+def _run(docs, stages):
+    for stage in stages:
+        if "$match" in stage:
+            docs = [d for d in docs if _matches(d, stage["$match"])]
+        elif "$sort" in stage:
+            docs = _sorted(docs)
+        elif "$limit" in stage:
+            docs = docs[: stage["$limit"]]
+        elif "$project" in stage:
+            docs = [_project(d, stage["$project"]) for d in docs]
+        elif "$count" in stage:
+            docs = [{stage["$count"]: len(docs)}] if docs else []
+        elif "$facet" in stage:
+            docs = [{k: _run(docs, v) for k, v in stage["$facet"].items()}]
+    return docs
+
+
+def load_server(monkeypatch, tasks):
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "testdb")
+    sys.modules["document_parser"] = types.ModuleType("document_parser")
+    sys.modules["document_parser"].parse_document = lambda *a, **k: None
+
+    class DummyCursor:
+        def __init__(self, docs, projection=None):
+            self._docs = docs
+            self._projection = projection
+
+        def sort(self, spec):
+            self._docs = _sorted(self._docs)
+            return self
+
+        def limit(self, n):
+            self._docs = self._docs[:n]
+            return self
+
+        async def to_list(self, length):
+            if self._projection:
+                return [_project(d, self._projection) for d in self._docs]
+            return self._docs
+
+    class DummyCollection:
+        def __init__(self, docs):
+            self.docs = docs
+            self.pipelines = []
+
+        async def find_one(self, query):
+            return next((d for d in self.docs if _matches(d, query)), None)
+
+        def find(self, query, projection=None):
+            docs = [d for d in self.docs if _matches(d, query)]
+            return DummyCursor(docs, projection)
+
+        def aggregate(self, pipeline):
+            self.pipelines.append(pipeline)
+            return DummyCursor(_run(self.docs, pipeline))
+
+    class DummyDB:
+        def __init__(self):
+            self.tasks = DummyCollection(tasks)
+            self.projects = DummyCollection([])
+
+    dummy_db = DummyDB()
+
+    class DummyClient:
+        def __getitem__(self, name):
+            return dummy_db
+
+    monkeypatch.setattr(
+        "motor.motor_asyncio.AsyncIOMotorClient", lambda *a, **kw: DummyClient()
+    )
+
+    server_path = os.path.join(os.path.dirname(__file__), "..", "backend", "server.py")
+    with open(server_path, "r") as f:
+        code = "from __future__ import annotations\n" + f.read()
+    module = types.ModuleType("server_under_test_kanban")
+    module.__file__ = server_path
+    exec(compile(code, server_path, "exec"), module.__dict__)
+    return module, dummy_db
+
+
+def sample_tasks():
+    start = datetime(2024, 7, 1)
+    tasks = []
+    for i in range(5):
+        tasks.append(
+            {
+                "id": f"t{i}",
+                "title": f"Todo {i}",
+                "description": "long text the board never shows",
+                "status": "todo",
+                "discipline": "eng",
+                "assigned_to": "u1" if i % 2 else None,
+                "created_at": start + timedelta(hours=i),
+            }
+        )
+    tasks.append(
+        {
+            "id": "t9",
+            "title": "Review",
+            "status": "review",
+            "discipline": "eng",
+            "created_at": start,
+        }
+    )
+    return tasks
+
+
+def test_lean_discipline_board_returns_counts_and_first_page(monkeypatch):
+    server, db = load_server(monkeypatch, sample_tasks())
+
+    result = asyncio.run(server.get_discipline_kanban("eng", lean=True, limit=2))
+
+    assert result["counts"]["backlog"] == 3
+    assert result["counts"]["todo"] == 2
+    assert result["counts"]["review_dic"] == 1
+    assert [c["id"] for c in result["board"]["backlog"]] == ["t0", "t2"]
+    assert "description" not in result["board"]["backlog"][0]
+    assert result["next_cursors"]["backlog"] is not None
+    assert result["next_cursors"]["todo"] is None
+    assert len(db.tasks.pipelines) == 1
+
+
+def test_lean_column_page_continues_from_cursor(monkeypatch):
+    server, db = load_server(monkeypatch, sample_tasks())
+    first = asyncio.run(server.get_discipline_kanban("eng", lean=True, limit=2))
+
+    page = asyncio.run(
+        server.get_discipline_kanban(
+            "eng",
+            lean=True,
+            limit=2,
+            column="backlog",
+            cursor=first["next_cursors"]["backlog"],
+        )
+    )
+
+    assert page["column"] == "backlog"
+    assert [c["id"] for c in page["cards"]] == ["t4"]
+    assert page["next_cursor"] is None
+
+
+def test_lean_board_rejects_unknown_column(monkeypatch):
+    server, _ = load_server(monkeypatch, sample_tasks())
+
+    try:
+        asyncio.run(server.get_discipline_kanban("eng", lean=True, column="nope"))
+    except server.HTTPException as exc:
+        assert exc.status_code == 400
+    else:
+        raise AssertionError("expected HTTPException")
@@ -0,0 +1,76 @@
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from backend.mdr_import import detect_mdr_columns, mdr_records
+
+
+def sample_sheet():
+    return pd.DataFrame(
+        {
+            "Doc Number": ["P-001", None, " P-003 "],
+            "DOC Title": ["Layout", "Orphan", None],
+            "Category": ["Piping", "Piping", "Civil"],
+            "Status": ["In Progress", None, None],
+            "IFR Date Planned": ["2024-07-01", "2024-07-02", "soon"],
+            "IFR Date Actual": [datetime(2024, 7, 3), None, None],
+            "IFC Date Planned": [np.nan, np.nan, np.nan],
+            "Remarks": [" check ", None, None],
+        }
+    )
+
+
+def test_columns_are_matched_loosely():
+    mapping = detect_mdr_columns(sample_sheet().columns)
+
+    assert mapping["doc_number"] == "Doc Number"
+    assert mapping["ifr_actual"] == "IFR Date Actual"
+    assert "ifa_planned" not in mapping
+
+
+def test_records_keep_the_entry_shape():
+    first, second = mdr_records(sample_sheet())
+
+    assert first == {
+        "doc_number": "P-001",
+        "doc_title": "Layout",
+        "category": "Piping",
+        "status": "In Progress",
+        "ifr_planned": date(2024, 7, 1),
+        "ifr_actual": date(2024, 7, 3),
+        "ifc_planned": None,
+        "remarks": "check",
+    }
+    assert second["doc_number"] == "P-003"
+    assert second["doc_title"] == ""
+    assert second["status"] == "Not Started"
+    assert second["ifr_planned"] is None
+    assert second["remarks"] is None
+
+
+def test_thirty_thousand_rows_parse_quickly():
+    n = 30_000
+    days = pd.date_range("2024-01-01", periods=n, freq="h").strftime("%Y-%m-%d")
+    df = pd.DataFrame(
+        {
+            "Doc Number": [f"D-{i}" for i in range(n)],
+            "DOC Title": ["Title"] * n,
+            "Category": ["Process"] * n,
+            "Status": ["Not Started"] * n,
+            **{
+                f"{stage} Date {kind}": days
+                for stage in ("IFR", "IFA", "IFC")
+                for kind in ("Planned", "Actual")
+            },
+        }
+    )
+
+    began = time.perf_counter()
+    entries = mdr_records(df)
+    elapsed = time.perf_counter() - began
+
+    assert len(entries) == n
+    assert entries[-1]["ifc_actual"] == date.fromisoformat(days[-1])
+    assert elapsed < 2.0
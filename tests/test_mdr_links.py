@@ -0,0 +1,106 @@
+import asyncio
+
+from pymongo import UpdateOne
+
+from backend.mdr_links import backfill_task_links, doc_number_from_title
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for key, direction in reversed(keys):
+            self.docs.sort(key=lambda d: d[key], reverse=direction < 0)
+        return self
+
+    def __aiter__(self):
+        async def iterate():
+            for doc in self.docs:
+                yield doc
+
+        return iterate()
+
+
+class Collection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.writes = []
+
+    def _matching(self, query):
+        return [
+            d for d in self.docs if all(
+                (v in d.get(k, [])) if isinstance(d.get(k), list) else d.get(k) == v
+                for k, v in query.items()
+            )
+        ]
+
+    async def find_one(self, query, projection=None):
+        found = self._matching(query)
+        return found[0] if found else None
+
+    def find(self, query, projection=None):
+        return Cursor(self._matching(query))
+
+    async def bulk_write(self, ops, ordered=True):
+        self.writes.append(len(ops))
+        for op in ops:
+            assert isinstance(op, UpdateOne)
+            for doc in self._matching(op._filter):
+                doc.update(op._doc["$set"])
+
+
+class DB:
+    def __init__(self, entries, tasks):
+        self.mdr_entries = Collection(entries)
+        self.tasks = Collection(tasks)
+
+
+def entry(id_, project, number, created):
+    return {
+        "id": id_,
+        "project_id": project,
+        "doc_number": number,
+        "created_at": created,
+    }
+
+
+def task(id_, project, title, **extra):
+    return {"id": id_, "project_id": project, "title": title, "tags": ["mdr"], **extra}
+
+
+def test_doc_number_is_read_from_the_title():
+    assert doc_number_from_title("PIP-001: Layout: rev B") == "PIP-001"
+    assert doc_number_from_title("No number") is None
+
+
+def test_backfill_links_tasks_by_project_and_doc_number():
+    db = DB(
+        [
+            entry("e2", "p1", "A.1", 2),
+            entry("e1", "p1", "A.1", 1),
+            entry("e3", "p2", "A.1", 1),
+        ],
+        [
+            task("t1", "p1", "A.1: Layout"),
+            task("t2", "p2", "A.1: Layout"),
+            task("t3", "p1", "B.7: Missing"),
+            task("t4", "p1", "A.1: Linked", mdr_entry_id="e2"),
+        ],
+    )
+
+    result = asyncio.run(backfill_task_links(db, batch_size=1))
+
+    assert result == {"linked": 2, "unmatched": 1}
+    links = {t["id"]: t.get("mdr_entry_id") for t in db.tasks.docs}
+    # The oldest entry wins for a duplicated doc number, regex characters
+    # in the doc number are matched literally
+    assert links == {"t1": "e1", "t2": "e3", "t3": None, "t4": "e2"}
+    assert db.tasks.writes == [1, 1]
+
+
+def test_backfill_is_a_no_op_once_linked():
+    db = DB([entry("e1", "p1", "A", 1)], [task("t1", "p1", "A: x", mdr_entry_id="e1")])
+
+    assert asyncio.run(backfill_task_links(db, "p1")) == {"linked": 0, "unmatched": 0}
+    assert db.tasks.writes == []
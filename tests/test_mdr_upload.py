@@ -0,0 +1,294 @@
+import io
+import os
+import re
+import sys
+import types
+import asyncio
+
+import pytest
+from fastapi import UploadFile
+from pymongo import DeleteMany, DeleteOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict) and "$regex" in cond:
+            if not isinstance(value, str) or not re.search(cond["$regex"], value):
+                return False
+        elif isinstance(cond, dict) and "$in" in cond:
+            if value not in cond["$in"]:
+                return False
+        elif isinstance(value, list):
+            if cond not in value:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class DummyCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        self.docs.sort(key=lambda d: tuple(d.get(k) for k, _ in keys))
+        return self
+
+    async def to_list(self, length):
+        return self.docs
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield doc
+
+
+def load_server(monkeypatch, transactions=True):
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "testdb")
+    sys.modules["document_parser"] = types.ModuleType("document_parser")
+    sys.modules["document_parser"].parse_document = lambda *a, **k: None
+
+    class DummyCollection:
+        def __init__(self):
+            self.docs = []
+            self.batches = []
+            self.fail_on_insert = False
+            self.fail_on_bulk = False
+            self.bulk_ops = []
+
+        async def insert_many(self, docs, ordered=True, session=None):
+            if session is not None and not transactions:
+                raise OperationFailure("Transaction numbers are only allowed", 20)
+            if self.fail_on_insert:
+                raise BulkWriteError({"writeErrors": [{"code": 2}]})
+            self.batches.append(len(docs))
+            self.docs.extend(docs)
+
+        async def delete_many(self, query, session=None):
+            self.docs = [d for d in self.docs if not _matches(d, query)]
+
+        async def find_one(self, query, projection=None):
+            return next((d for d in self.docs if _matches(d, query)), None)
+
+        def find(self, query, projection=None):
+            return DummyCursor([dict(d) for d in self.docs if _matches(d, query)])
+
+        async def bulk_write(self, requests, ordered=True, session=None):
+            if session is not None and not transactions:
+                raise OperationFailure("Transaction numbers are only allowed", 20)
+            self.bulk_ops.extend(requests)
+            for n, op in enumerate(requests):
+                if self.fail_on_bulk and n == len(requests) - 1:
+                    raise BulkWriteError({"writeErrors": [{"index": n, "code": 2}]})
+                if isinstance(op, (UpdateOne, UpdateMany)):
+                    found = [d for d in self.docs if _matches(d, op._filter)]
+                    if not found:
+                        seeded = {
+                            k: v
+                            for k, v in op._filter.items()
+                            if not isinstance(v, dict)
+                        }
+                        found = [{**seeded, **op._doc["$setOnInsert"]}]
+                        self.docs.extend(found)
+                    for doc in found[: 1 if isinstance(op, UpdateOne) else None]:
+                        doc.update(op._doc["$set"])
+                elif isinstance(op, (DeleteOne, DeleteMany)):
+                    self.docs = [d for d in self.docs if not _matches(d, op._filter)]
+
+    class DummyDB:
+        def __init__(self):
+            self.mdr_entries = DummyCollection()
+            self.tasks = DummyCollection()
+            self.rollups = DummyCollection()
+
+    dummy_db = DummyDB()
+
+    class DummyTransaction:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb):
+            pass
+
+    class DummySession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb):
+            pass
+
+        def start_transaction(self):
+            return DummyTransaction()
+
+    class DummyClient:
+        def __getitem__(self, name):
+            return dummy_db
+
+        async def start_session(self):
+            return DummySession()
+
+    monkeypatch.setattr(
+        "motor.motor_asyncio.AsyncIOMotorClient", lambda *a, **kw: DummyClient()
+    )
+
+    server_path = os.path.join(os.path.dirname(__file__), "..", "backend", "server.py")
+    with open(server_path, "r") as f:
+        code = "from __future__ import annotations\n" + f.read()
+    module = types.ModuleType("server_under_test_mdr_upload")
+    module.__file__ = server_path
+    exec(compile(code, server_path, "exec"), module.__dict__)
+    for model in (module.MDREntry, module.Task):
+        model.model_rebuild(_types_namespace=module.__dict__)
+    return module, dummy_db
+
+
+def entries(n):
+    return [
+        {
+            "doc_number": f"PIP-{i:03d}",
+            "doc_title": f"Isometric {i}",
+            "category": "PIPING" if i % 2 else "technical safety",
+            "status": "in progress",
+        }
+        for i in range(n)
+    ]
+
+
+def upload(server, rows, reimport=False):
+    server.parse_mdr_excel = lambda path: rows
+    file = UploadFile(io.BytesIO(b"xlsx"), filename="mdr.xlsx")
+    user = types.SimpleNamespace(id="u1")
+    return asyncio.run(
+        server.upload_mdr_excel(
+            file=file, project_id="p1", reimport=reimport, current_user=user
+        )
+    )
+
+
+def test_upload_resolves_enums_and_inserts_in_batches(monkeypatch):
+    server, db = load_server(monkeypatch)
+    monkeypatch.setattr(server, "MDR_WRITE_BATCH_SIZE", 2)
+
+    result = upload(server, entries(5))
+
+    assert result["mdr_entries_created"] == result["kanban_tasks_created"] == 5
+    assert db.mdr_entries.batches == db.tasks.batches == [2, 2, 1]
+    categories = {d["category"] for d in db.mdr_entries.docs}
+    assert categories == {"Piping", "Technical Safety"}
+    assert {d["status"] for d in db.mdr_entries.docs} == {"In Progress"}
+    assert "_id" not in result["entries"][0]
+    entry_ids = {d["doc_number"]: d["id"] for d in db.mdr_entries.docs}
+    for task in db.tasks.docs:
+        assert task["mdr_entry_id"] == entry_ids[task["title"].split(":")[0]]
+
+
+def test_upload_is_parsed_from_the_received_file(monkeypatch):
+    server, db = load_server(monkeypatch)
+    body = io.BytesIO(b"xlsx")
+    body.seek(4)
+    seen = []
+
+    def parse(source):
+        seen.append((source, source.read()))
+        return entries(1)
+
+    server.parse_mdr_excel = parse
+    file = UploadFile(body, filename="mdr.xlsx")
+    asyncio.run(
+        server.upload_mdr_excel(
+            file=file,
+            project_id="p1",
+            reimport=False,
+            current_user=types.SimpleNamespace(id="u1"),
+        )
+    )
+
+    assert seen == [(body, b"xlsx")]
+
+
+def test_failed_import_leaves_nothing_behind_without_transactions(monkeypatch):
+    server, db = load_server(monkeypatch, transactions=False)
+    db.tasks.fail_on_insert = True
+
+    with pytest.raises(server.HTTPException) as exc:
+        upload(server, entries(3))
+
+    assert exc.value.status_code == 500
+    assert db.mdr_entries.docs == []
+    assert db.tasks.docs == []
+
+
+def test_reimport_writes_only_the_changes(monkeypatch):
+    server, db = load_server(monkeypatch)
+    upload(server, entries(4))
+    db.tasks.docs[1]["assigned_to"] = "u7"
+
+    revised = entries(5)[1:]  # PIP-000 removed, PIP-004 new
+    revised[0]["status"] = "approved"  # PIP-001 changed
+    result = upload(server, revised, reimport=True)
+
+    assert {k: result[k] for k in ("new", "changed", "unchanged", "removed")} == {
+        "new": 1,
+        "changed": 1,
+        "unchanged": 2,
+        "removed": 1,
+    }
+    assert len(db.mdr_entries.bulk_ops) == 3
+    numbers = sorted(d["doc_number"] for d in db.mdr_entries.docs)
+    assert numbers == ["PIP-001", "PIP-002", "PIP-003", "PIP-004"]
+    [changed] = [d for d in db.mdr_entries.docs if d["doc_number"] == "PIP-001"]
+    assert changed["status"] == "Approved"
+    [task] = [t for t in db.tasks.docs if t["title"].startswith("PIP-001:")]
+    assert task["status"] == "done"
+    assert task["assigned_to"] == "u7"  # updated in place
+    assert task["mdr_entry_id"] == changed["id"]
+    [new] = [d for d in db.mdr_entries.docs if d["doc_number"] == "PIP-004"]
+    [new_task] = [t for t in db.tasks.docs if t["title"].startswith("PIP-004:")]
+    assert new_task["mdr_entry_id"] == new["id"]
+    assert len(db.tasks.docs) == 4
+
+    again = upload(server, revised, reimport=True)
+    assert again["unchanged"] == 4
+    assert len(db.mdr_entries.bulk_ops) == 3
+
+
+@pytest.mark.parametrize("failing", ["tasks", "mdr_entries"])
+def test_failed_reimport_is_repaired_by_the_next_one(monkeypatch, failing):
+    server, db = load_server(monkeypatch, transactions=False)
+    upload(server, entries(2))
+    revised = entries(3)
+    revised[0]["status"] = "approved"
+    revised[1]["status"] = "approved"
+    getattr(db, failing).fail_on_bulk = True
+
+    with pytest.raises(server.HTTPException):
+        upload(server, revised, reimport=True)
+
+    getattr(db, failing).fail_on_bulk = False
+    assert [d["doc_number"] for d in db.mdr_entries.docs] == ["PIP-000", "PIP-001"]
+    entry_ids = {d["id"] for d in db.mdr_entries.docs}
+    assert {t["mdr_entry_id"] for t in db.tasks.docs} == entry_ids
+
+    result = upload(server, revised, reimport=True)
+
+    assert result["unchanged"] < 2 and result["new"] == 1
+    statuses = {t["title"][:7]: t["status"] for t in db.tasks.docs}
+    assert statuses["PIP-000"] == statuses["PIP-001"] == "done"
+    assert len(db.tasks.docs) == 3
+
+
+def test_reimport_drops_duplicates_of_plain_uploads(monkeypatch):
+    server, db = load_server(monkeypatch)
+    upload(server, entries(2))
+    upload(server, entries(2))
+    oldest_first = sorted(db.mdr_entries.docs, key=lambda d: (d["created_at"], d["id"]))
+    first = {d["doc_number"]: d["id"] for d in oldest_first[::-1]}
+
+    result = upload(server, entries(2), reimport=True)
+
+    assert result["removed"] == 2
+    assert {d["doc_number"]: d["id"] for d in db.mdr_entries.docs} == first
+    assert sorted(t["mdr_entry_id"] for t in db.tasks.docs) == sorted(first.values())
+    assert upload(server, entries(2), reimport=True)["removed"] == 0
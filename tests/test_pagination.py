@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.pagination import (
+    InvalidCursor,
+    fetch_page,
+    iter_documents,
+    keyset_filter,
+)
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        if key == "$and":
+            if not all(_matches(doc, q) for q in cond):
+                return False
+        elif key == "$or":
+            if not any(_matches(doc, q) for q in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = doc.get(key)
+            for op, arg in cond.items():
+                if op == "$gt" and not (value is not None and value > arg):
+                    return False
+                if op == "$ne" and value == arg:
+                    return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+
+class MemoryCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.find_calls = 0
+
+    def find(self, query, projection=None):
+        self.find_calls += 1
+        docs = [d for d in self.docs if _matches(d, query)]
+
+        class Cursor:
+            def sort(self, spec):
+                for field, _ in reversed(spec):
+                    docs.sort(key=lambda d: (d.get(field) is not None, d.get(field)))
+                return self
+
+            def limit(self, n):
+                del docs[n:]
+                return self
+
+            async def to_list(self, length):
+                return list(docs)
+
+        return Cursor()
+
+
+def _docs():
+    base = datetime(2024, 7, 1)
+    docs = [
+        {
+            "id": f"t{i:02d}",
+            "project_id": "p1",
+            "created_at": base + timedelta(hours=i // 3),
+        }
+        for i in range(10)
+    ]
+    docs.append({"id": "legacy", "project_id": "p1", "created_at": None})
+    docs.append({"id": "other", "project_id": "p2", "created_at": base})
+    return docs
+
+
+def test_pages_cover_every_document_once():
+    collection = MemoryCollection(_docs())
+
+    async def walk():
+        seen, cursor = [], None
+        while True:
+            page = await fetch_page(
+                collection, {"project_id": "p1"}, "created_at", 4, cursor
+            )
+            seen.extend(d["id"] for d in page.items)
+            if page.next_cursor is None:
+                return seen
+            cursor = page.next_cursor
+
+    seen = asyncio.run(walk())
+
+    assert seen[0] == "legacy"
+    assert sorted(seen) == sorted(d["id"] for d in _docs() if d["project_id"] == "p1")
+    assert len(seen) == len(set(seen))
+
+
+def test_iter_documents_fetches_in_batches():
+    collection = MemoryCollection(_docs())
+
+    async def collect():
+        return [d["id"] async for d in iter_documents(collection, {}, "id", 5)]
+
+    ids = asyncio.run(collect())
+
+    assert ids == sorted(d["id"] for d in _docs())
+    assert collection.find_calls == 3
+
+
+def test_cursor_is_bound_to_its_sort_field():
+    collection = MemoryCollection(_docs())
+    page = asyncio.run(fetch_page(collection, {}, "created_at", 2))
+
+    with pytest.raises(InvalidCursor):
+        keyset_filter({}, "id", page.next_cursor)
+    with pytest.raises(InvalidCursor):
+        keyset_filter({}, "id", "not-a-cursor")
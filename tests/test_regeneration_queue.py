@@ -0,0 +1,100 @@
+import asyncio
+
+from backend.regeneration_queue import RegenerationQueue
+
+
+def test_burst_of_edits_coalesces_into_one_run():
+    calls = []
+
+    async def regenerate(key, context):
+        calls.append((key, context))
+
+    async def scenario():
+        queue = RegenerationQueue(regenerate, window=0.05)
+        targets = [queue.mark_dirty("p1", i) for i in range(5)]
+        assert targets == [1] * 5
+        assert queue.is_pending("p1")
+        version = await queue.wait_for("p1", 1, timeout=1)
+        return queue, version
+
+    queue, version = asyncio.run(scenario())
+
+    assert calls == [("p1", 4)]
+    assert version == 1
+    assert not queue.is_pending("p1")
+
+
+def test_edit_during_run_triggers_another_regeneration():
+    calls = []
+
+    async def scenario():
+        queue = RegenerationQueue(None, window=0.01)
+
+        async def regenerate(key, context):
+            calls.append(context)
+            if context == "first":
+                queue.mark_dirty(key, "second")
+
+        queue._regenerate = regenerate
+        queue.mark_dirty("p1", "first")
+        return await queue.wait_for("p1", 2, timeout=1)
+
+    assert asyncio.run(scenario()) == 2
+    assert calls == ["first", "second"]
+
+
+def test_flush_skips_debounce_window():
+    calls = []
+
+    async def regenerate(key, context):
+        calls.append(key)
+
+    async def scenario():
+        queue = RegenerationQueue(regenerate, window=60)
+        queue.mark_dirty("p1")
+        queue.mark_dirty("p2")
+        await asyncio.wait_for(queue.flush(), timeout=1)
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert sorted(calls) == ["p1", "p2"]
+    assert queue.version("p1") == queue.version("p2") == 1
+
+
+def test_failed_regeneration_releases_waiters():
+    async def regenerate(key, context):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        queue = RegenerationQueue(regenerate, window=0)
+        queue.mark_dirty("p1")
+        return await queue.wait_for("p1", 1, timeout=1)
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_edit_during_run_waits_for_the_next_run():
+    applied = []
+
+    async def scenario():
+        started = asyncio.Event()
+        proceed = asyncio.Event()
+
+        async def regenerate(key, context):
+            started.set()
+            await proceed.wait()
+            applied.append(context)
+
+        queue = RegenerationQueue(regenerate, window=0.01)
+        queue.mark_dirty("p1", "first")
+        await started.wait()
+        target = queue.mark_dirty("p1", "second")
+        proceed.set()
+        version = await queue.wait_for("p1", target, timeout=1)
+        return target, version, list(applied)
+
+    target, version, seen = asyncio.run(scenario())
+
+    assert target == 2
+    assert version == 2
+    assert seen == ["first", "second"]
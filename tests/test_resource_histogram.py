@@ -0,0 +1,108 @@
+import time
+
+import numpy as np
+
+from backend.resource_histogram import (
+    build_histogram,
+    bucket_sums,
+    spread_hours,
+    working_mask,
+)
+
+
+def days(*values):
+    return np.array(values, dtype="datetime64[D]")
+
+
+def test_hours_are_spread_over_working_days_only():
+    # 2024-07-05 is a Friday, 2024-07-08 the following Monday
+    working = working_mask(np.datetime64("2024-07-05"), 4)
+    daily = spread_hours(
+        np.array([0]), np.array([3]), np.array([16.0]), np.array([0]), 1, working
+    )
+
+    assert daily.tolist() == [[8.0, 0.0, 0.0, 8.0]]
+
+
+def test_weekend_only_task_keeps_its_hours():
+    working = working_mask(np.datetime64("2024-07-06"), 2)
+    daily = spread_hours(
+        np.array([0]), np.array([1]), np.array([6.0]), np.array([0]), 1, working
+    )
+
+    assert daily.tolist() == [[3.0, 3.0]]
+
+
+def test_weeks_start_on_monday():
+    daily = np.ones((1, 5))
+    starts, sums = bucket_sums(daily, np.datetime64("2024-07-06"), "week")
+
+    assert [str(d) for d in starts] == ["2024-07-01", "2024-07-08"]
+    assert sums.tolist() == [[2.0, 3.0]]
+
+
+def test_over_allocation_is_flagged_per_bucket():
+    histogram = build_histogram(
+        days("2024-07-01", "2024-07-01", "2024-07-02"),
+        days("2024-07-01", "2024-07-01", "2024-07-02"),
+        np.array([6.0, 6.0, 4.0]),
+        np.array([0, 0, 1]),
+        np.array([8.0, 8.0]),
+        bucket="day",
+    )
+
+    assert histogram.hours.tolist() == [[12.0, 0.0], [0.0, 4.0]]
+    assert histogram.capacity.tolist() == [[8.0, 8.0], [8.0, 8.0]]
+    assert histogram.over_allocated.tolist() == [[True, False], [False, False]]
+
+
+def test_window_counts_partial_tasks_pro_rata():
+    histogram = build_histogram(
+        days("2024-07-01"),
+        days("2024-07-05"),
+        np.array([40.0]),
+        np.array([0]),
+        np.array([8.0]),
+        bucket="day",
+        window_start=np.datetime64("2024-07-04"),
+        window_end=np.datetime64("2024-07-08"),
+    )
+
+    assert histogram.hours.tolist() == [[8.0, 8.0, 0.0, 0.0, 0.0]]
+    assert histogram.capacity.tolist() == [[8.0, 8.0, 0.0, 0.0, 8.0]]
+
+
+def test_holidays_are_not_working_days():
+    histogram = build_histogram(
+        days("2024-07-03"),
+        days("2024-07-05"),
+        np.array([16.0]),
+        np.array([0]),
+        np.array([8.0]),
+        bucket="day",
+        holidays=["2024-07-04"],
+    )
+
+    assert histogram.hours.tolist() == [[8.0, 0.0, 8.0]]
+
+
+def test_ten_thousand_tasks_over_two_years_is_fast():
+    rng = np.random.default_rng(0)
+    first = np.datetime64("2024-01-01")
+    start_offsets = rng.integers(0, 700, 10_000)
+    starts = first + start_offsets
+    ends = starts + rng.integers(0, 30, 10_000)
+
+    began = time.perf_counter()
+    histogram = build_histogram(
+        starts,
+        ends,
+        rng.uniform(1, 80, 10_000),
+        rng.integers(0, 50, 10_000),
+        np.full(50, 8.0),
+        bucket="day",
+    )
+    elapsed = time.perf_counter() - began
+
+    assert histogram.hours.shape[0] == 50
+    assert elapsed < 1.0
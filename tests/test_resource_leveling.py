@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+
+from backend.cpm_engine import CPMNetwork
+from backend.resource_leveling import level_resources
+
+
+def network(*tasks):
+    ids, durations, preds = zip(*tasks)
+    return CPMNetwork(ids, durations, preds).schedule()
+
+
+def test_shared_resource_runs_least_float_first():
+    # a and b both need u1; b is on the longer chain so it has no float
+    net = network(("a", 2, []), ("b", 3, []), ("c", 4, ["b"]))
+    leveled = level_resources(net, ["u1", "u1", None], {"u1": 1.0})
+
+    result = leveled.results()
+    assert result["b"]["leveled_start"] == 0
+    assert result["a"]["leveled_start"] == 3
+    assert result["a"]["resource_delay"] == 3
+    assert result["c"]["leveled_start"] == 3
+    assert leveled.project_duration == 7
+
+
+def test_successors_wait_for_delayed_predecessors():
+    net = network(("a", 2, []), ("b", 2, []), ("c", 1, ["a"]))
+    leveled = level_resources(net, ["u1", "u1", "u2"], {"u1": 1.0, "u2": 1.0})
+
+    result = leveled.results()
+    assert result["a"]["leveled_start"] == 0
+    assert result["b"]["leveled_start"] == 2
+    assert result["c"]["leveled_start"] == 2
+    assert leveled.project_duration == 4
+
+
+def test_unassigned_and_unknown_resources_keep_cpm_dates():
+    net = network(("a", 2, []), ("b", 2, []))
+    leveled = level_resources(net, [None, "ghost"], {"u1": 1.0})
+
+    assert leveled.start.tolist() == net.early_start.tolist()
+    assert leveled.delay.tolist() == [0.0, 0.0]
+
+
+def test_fractional_demand_shares_a_resource():
+    net = network(("a", 2, []), ("b", 2, []), ("c", 2, []))
+    leveled = level_resources(
+        net, ["crew"] * 3, {"crew": 2.0}, demand=[1.0, 1.0, 1.0]
+    )
+
+    assert sorted(leveled.start.tolist()) == [0.0, 0.0, 2.0]
+
+
+def test_thousands_of_activities_level_quickly():
+    rng = np.random.default_rng(0)
+    n = 5000
+    ids = [f"t{i}" for i in range(n)]
+    preds = [
+        [ids[j] for j in rng.integers(0, i, min(i, 3))] if i else [] for i in range(n)
+    ]
+    net = CPMNetwork(ids, rng.integers(1, 10, n).tolist(), preds).schedule()
+    resources = [f"u{r}" for r in rng.integers(0, 300, n)]
+    capacity = {f"u{r}": 1.0 for r in range(300)}
+
+    began = time.perf_counter()
+    leveled = level_resources(net, resources, capacity)
+    elapsed = time.perf_counter() - began
+
+    assert elapsed < 2.0
+    assert (leveled.start >= net.early_start - 1e-9).all()
+    # No resource ever runs two tasks at once
+    order = np.lexsort((leveled.start, np.array(resources)))
+    same = np.array(resources)[order][1:] == np.array(resources)[order][:-1]
+    assert (leveled.start[order][1:][same] >= leveled.finish[order][:-1][same]).all()
@@ -0,0 +1,348 @@
+import os
+import sys
+import types
+import asyncio
+from datetime import date, datetime
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            for op, arg in cond.items():
+                if op == "$in" and value not in arg:
+                    return False
+                if op == "$ne" and value == arg:
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _evaluate(expr, doc):
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, dict) and "$ifNull" in expr:
+        value, default = expr["$ifNull"]
+        value = _evaluate(value, doc)
+        return default if value is None else value
+    if isinstance(expr, dict) and "$convert" in expr:
+        spec = expr["$convert"]
+        value = _evaluate(spec["input"], doc)
+        if value is None:
+            return spec["onNull"]
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return spec["onError"]
+    if isinstance(expr, dict) and "$cond" in expr:
+        condition, then, otherwise = expr["$cond"]
+        return _evaluate(then if _evaluate(condition, doc) else otherwise, doc)
+    if isinstance(expr, dict):
+        return {k: _evaluate(v, doc) for k, v in expr.items()}
+    return expr
+
+
+def _group(docs, spec):
+    groups = {}
+    for doc in docs:
+        key = _evaluate(spec["_id"], doc)
+        group = groups.setdefault(repr(key), {"_id": key})
+        for field, acc in spec.items():
+            if field == "_id":
+                continue
+            if "$sum" in acc:
+                group[field] = group.get(field, 0) + _evaluate(acc["$sum"], doc)
+            else:
+                group.setdefault(field, []).append(_evaluate(acc["$push"], doc))
+    return list(groups.values())
+
+
+def load_server(monkeypatch, projects, tasks, users):
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "testdb")
+    sys.modules["document_parser"] = types.ModuleType("document_parser")
+    sys.modules["document_parser"].parse_document = lambda *a, **k: None
+
+    class DummyCursor:
+        def __init__(self, result):
+            self._result = result
+
+        def sort(self, spec):
+            return self
+
+        def limit(self, n):
+            return self
+
+        async def to_list(self, length):
+            return self._result
+
+    class DummyCollection:
+        def __init__(self, docs):
+            self.docs = docs
+            self.pipelines = []
+            self.queries = []
+
+        async def find_one(self, query):
+            return next((d for d in self.docs if _matches(d, query)), None)
+
+        def find(self, query=None, projection=None):
+            self.queries.append(query or {})
+            return DummyCursor([d for d in self.docs if _matches(d, query or {})])
+
+        def aggregate(self, pipeline):
+            self.pipelines.append(pipeline)
+            docs = self.docs
+            for stage in pipeline:
+                if "$match" in stage:
+                    docs = [d for d in docs if _matches(d, stage["$match"])]
+                elif "$group" in stage:
+                    docs = _group(docs, stage["$group"])
+            return DummyCursor(docs)
+
+    class DummyDB:
+        def __init__(self):
+            self.projects = DummyCollection(projects)
+            self.tasks = DummyCollection(tasks)
+            self.users = DummyCollection(users)
+
+    dummy_db = DummyDB()
+
+    class DummyClient:
+        def __getitem__(self, name):
+            return dummy_db
+
+    monkeypatch.setattr(
+        "motor.motor_asyncio.AsyncIOMotorClient", lambda *a, **kw: DummyClient()
+    )
+
+    server_path = os.path.join(os.path.dirname(__file__), "..", "backend", "server.py")
+    with open(server_path, "r") as f:
+        code = "from __future__ import annotations\n" + f.read()
+    module = types.ModuleType("server_under_test_resources")
+    module.__file__ = server_path
+    exec(compile(code, server_path, "exec"), module.__dict__)
+    for model in (module.ProjectResource, module.ResourceAllocation):
+        model.model_rebuild(_types_namespace=module.__dict__)
+    return module, dummy_db
+
+
+def sample_data():
+    projects = [{"id": "p1", "name": "Plant", "start_date": datetime(2024, 7, 1)}]
+    tasks = [
+        {
+            "id": "t1",
+            "title": "Design",
+            "project_id": "p1",
+            "discipline": "eng",
+            "assigned_to": "u1",
+            "estimated_hours": 30,
+            "status": "done",
+        },
+        {
+            "id": "t2",
+            "title": "Check",
+            "project_id": "p1",
+            "discipline": "eng",
+            "assigned_to": "u1",
+        },
+        {
+            "id": "t3",
+            "title": "Backlog",
+            "project_id": "p1",
+            "discipline": "eng",
+            "estimated_hours": 0,
+        },
+        {
+            "id": "t4",
+            "title": "Ghost",
+            "project_id": "p1",
+            "discipline": "eng",
+            "assigned_to": "gone",
+            "estimated_hours": 5,
+        },
+    ]
+    users = [
+        {"id": "u1", "name": "Ada", "discipline": "eng"},
+        {"id": "u2", "name": "Bob", "discipline": "eng"},
+    ]
+    return projects, tasks, users
+
+
+def test_project_resources_join_only_assignees(monkeypatch):
+    server, db = load_server(monkeypatch, *sample_data())
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    result = asyncio.run(server.get_project_resources("p1", current_user=user))
+
+    assert result.total_hours_required == 30 + 8 + 8 + 5
+    assert result.total_hours_allocated == 38
+    [ada] = result.resources
+    assert ada.user_name == "Ada"
+    assert ada.total_allocated_hours == 38
+    assert ada.utilization_percent == 95
+    assert [t["id"] for t in ada.tasks] == ["t1", "t2"]
+
+
+def test_project_resources_count_hours_stored_as_text(monkeypatch):
+    projects, tasks, users = sample_data()
+    tasks[0]["estimated_hours"] = "12"
+    tasks[1]["estimated_hours"] = "a lot"
+    server, db = load_server(monkeypatch, projects, tasks, users)
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    result = asyncio.run(server.get_project_resources("p1", current_user=user))
+
+    [ada] = result.resources
+    assert ada.total_allocated_hours == 12 + 8
+    assert [t["hours"] for t in ada.tasks] == [12, 8]
+    assert result.total_hours_required == 12 + 8 + 8 + 5
+    assert ada.tasks[1] == {"id": "t2", "title": "Check", "hours": 8, "status": "todo"}
+    assert len(db.tasks.pipelines) == 1
+    assert db.users.queries == [{"id": {"$in": ["u1", "gone"]}}]
+
+
+def overview_data():
+    users = [
+        {"id": "u1", "name": "Ada", "discipline": "eng", "availability": 0.5},
+        {"id": "u2", "name": "Bob", "discipline": "eng"},
+        {"id": "u3", "name": "Cy", "discipline": "eng", "availability": None},
+    ]
+    tasks = [
+        {"id": "t1", "assigned_to": "u1", "discipline": "eng", "estimated_hours": "4"},
+        {"id": "t2", "assigned_to": "u1", "discipline": "eng", "status": "done"},
+        {"id": "t3", "assigned_to": "u3", "discipline": "eng", "estimated_hours": 2},
+        {"id": "t4", "assigned_to": "x", "discipline": "eng", "estimated_hours": "?"},
+    ]
+    return users, tasks
+
+
+def test_resources_overview_groups_all_users_in_one_pass(monkeypatch):
+    users, tasks = overview_data()
+    server, db = load_server(monkeypatch, [], tasks, users)
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    result = asyncio.run(server.get_resources_overview(current_user=user))
+
+    by_id = {r["user_id"]: r for r in result["resources"]}
+    assert by_id["u1"]["allocated_hours"] == 12
+    assert by_id["u1"]["available_hours"] == 20
+    assert by_id["u1"]["utilization_percent"] == 60
+    assert by_id["u1"]["active_tasks"] == 1
+    assert by_id["u2"]["allocated_hours"] == 0
+    assert by_id["u2"]["utilization_percent"] == 0
+    assert by_id["u3"]["available_hours"] == 0
+    assert by_id["u3"]["utilization_percent"] == 0
+    assert len(db.tasks.queries) == 1
+
+
+def test_resources_overview_rejects_invalid_numbers(monkeypatch):
+    users, tasks = overview_data()
+    tasks[1]["estimated_hours"] = "lots"
+    server, _ = load_server(monkeypatch, [], tasks, users)
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    try:
+        asyncio.run(server.get_resources_overview(current_user=user))
+    except server.HTTPException as exc:
+        assert exc.status_code == 400
+        assert exc.detail == "Invalid estimated_hours 'lots' for task t2"
+    else:
+        raise AssertionError("expected HTTPException")
+
+    users[1]["availability"] = "full"
+    tasks[1]["estimated_hours"] = 1
+    server, _ = load_server(monkeypatch, [], tasks, users)
+    try:
+        asyncio.run(server.get_resources_overview(current_user=user))
+    except server.HTTPException as exc:
+        assert exc.status_code == 400
+        assert exc.detail == "Invalid availability 'full' for user u2"
+    else:
+        raise AssertionError("expected HTTPException")
+
+
+def test_resource_histogram_flags_over_allocated_weeks(monkeypatch):
+    projects = [{"id": "p1", "name": "Plant"}]
+    tasks = [
+        {
+            "id": "t1",
+            "project_id": "p1",
+            "discipline": "eng",
+            "assigned_to": "u1",
+            "estimated_hours": 60,
+            "start_date": datetime(2024, 7, 1),
+            "end_date": datetime(2024, 7, 5),
+        },
+        {
+            "id": "t2",
+            "project_id": "p1",
+            "discipline": "eng",
+            "assigned_to": "u1",
+            "start_date": datetime(2024, 7, 8),
+            "end_date": datetime(2024, 7, 9),
+        },
+        {"id": "t3", "project_id": "p1", "discipline": "eng", "assigned_to": "u1"},
+        {
+            "id": "t4",
+            "project_id": "p1",
+            "discipline": "eng",
+            "estimated_hours": 3,
+            "start_date": datetime(2024, 7, 1),
+            "end_date": datetime(2024, 7, 1),
+        },
+    ]
+    users = [{"id": "u1", "name": "Ada", "discipline": "eng", "availability": 1.0}]
+    server, _ = load_server(monkeypatch, projects, tasks, users)
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    result = asyncio.run(
+        server.get_resource_histogram("p1", current_user=user, bucket="week")
+    )
+
+    assert result["buckets"] == ["2024-07-01", "2024-07-08"]
+    [ada] = result["series"]
+    assert ada["name"] == "Ada"
+    assert ada["hours"] == [60.0, 8.0]
+    assert ada["capacity"] == [40.0, 16.0]
+    assert ada["over_allocated"] == [True, False]
+    assert result["unscheduled_hours"] == 8
+    assert result["unassigned_hours"] == 3
+
+
+def test_resource_histogram_rejects_unknown_bucket(monkeypatch):
+    server, _ = load_server(monkeypatch, [{"id": "p1", "name": "Plant"}], [], [])
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    try:
+        asyncio.run(server.get_resource_histogram("p1", current_user=user, bucket="year"))
+    except server.HTTPException as exc:
+        assert exc.status_code == 400
+    else:
+        raise AssertionError("expected HTTPException")
+
+
+def test_resource_histogram_rejects_oversized_spans(monkeypatch):
+    projects = [{"id": "p1", "name": "Plant"}]
+    tasks = [
+        {
+            "id": "t1",
+            "project_id": "p1",
+            "discipline": "eng",
+            "assigned_to": "u1",
+            "start_date": datetime(2024, 7, 1),
+            "end_date": datetime(2099, 7, 1),
+        }
+    ]
+    server, _ = load_server(monkeypatch, projects, tasks, [])
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    for window in ({}, {"start": date(2024, 1, 1), "end": date(2034, 1, 1)}):
+        try:
+            asyncio.run(
+                server.get_resource_histogram("p1", current_user=user, **window)
+            )
+        except server.HTTPException as exc:
+            assert exc.status_code == 422
+        else:
+            raise AssertionError("expected HTTPException")
@@ -0,0 +1,152 @@
+import asyncio
+
+from backend.rollups import apply_changes, deltas, rebuild, summarize
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return list(self.docs)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class Collection:
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+        self.writes = []
+
+    def find(self, query, projection=None):
+        return Cursor(
+            [d for d in self.docs if all(d.get(k) == v for k, v in query.items())]
+        )
+
+    async def bulk_write(self, ops, ordered=True, session=None):
+        self.writes.append(ops)
+        # Rebuilds only issue ReplaceOne and DeleteOne
+        for op in ops:
+            self.docs = [
+                d
+                for d in self.docs
+                if not all(d.get(k) == v for k, v in op._filter.items())
+            ]
+            if hasattr(op, "_doc"):
+                self.docs.append(op._doc)
+
+
+class DB:
+    def __init__(self, tasks=(), documents=(), mdr_entries=(), rollups=()):
+        self.tasks = Collection(tasks)
+        self.documents = Collection(documents)
+        self.mdr_entries = Collection(mdr_entries)
+        self.rollups = Collection(rollups)
+
+
+def task(status="todo", project="p1", discipline="eng", sprint=None, **extra):
+    return {
+        "project_id": project,
+        "discipline": discipline,
+        "sprint_id": sprint,
+        "status": status,
+        **extra,
+    }
+
+
+def test_status_change_moves_one_count():
+    before = task("todo")
+    after = task("done")
+
+    assert deltas("tasks", [(before, after)]) == {
+        ("p1", "eng", None): {"tasks.status.todo": -1, "tasks.status.done": 1}
+    }
+
+
+def test_unchanged_counters_produce_no_write():
+    collection = Collection()
+    before = task("todo", title="old")
+    after = task("todo", title="new")
+
+    written = asyncio.run(apply_changes(collection, "tasks", [(before, after)]))
+
+    assert written == 0
+    assert collection.writes == []
+
+
+def test_moving_between_sprints_touches_both_rows():
+    result = deltas(
+        "tasks",
+        [(task(sprint="s1", estimated_hours=4), task(sprint="s2", estimated_hours=4))],
+    )
+
+    assert result[("p1", "eng", "s1")]["tasks.total"] == -1
+    assert result[("p1", "eng", "s2")]["tasks.estimated_hours"] == 4
+
+
+def test_estimated_hours_stored_as_text_are_coerced():
+    result = deltas(
+        "tasks",
+        [(None, task(estimated_hours="2.5")), (None, task(estimated_hours="n/a"))],
+    )
+
+    assert result[("p1", "eng", None)]["tasks.estimated_hours"] == 2.5
+
+
+def test_mdr_entries_roll_up_by_category():
+    entry = {"project_id": "p1", "category": "Piping", "status": "In Progress"}
+
+    assert deltas("mdr", [(None, entry)]) == {
+        ("p1", "Piping", None): {"mdr.total": 1, "mdr.status.In Progress": 1}
+    }
+
+
+def test_rebuild_replaces_rows_and_drops_stale_ones():
+    db = DB(
+        tasks=[
+            task("done", is_milestone=True),
+            task("todo", estimated_hours=6),
+            task("todo", project="p2"),
+        ],
+        documents=[{"project_id": "p1", "discipline": "eng", "status": "approved"}],
+        rollups=[
+            {"project_id": "p3", "discipline": "eng", "sprint_id": None, "tasks": {}}
+        ],
+    )
+
+    rows = asyncio.run(rebuild(db))
+
+    assert rows == 2
+    by_project = {r["project_id"]: r for r in db.rollups.docs}
+    assert set(by_project) == {"p1", "p2"}
+    p1 = by_project["p1"]
+    assert p1["tasks"]["status"] == {"done": 1, "todo": 1}
+    assert p1["tasks"]["milestones_done"] == 1
+    assert p1["tasks"]["estimated_hours"] == 6
+    assert p1["documents"] == {"total": 1, "status": {"approved": 1}}
+
+
+def test_scoped_rebuild_leaves_other_rows_alone():
+    other = {"project_id": "p2", "discipline": "eng", "sprint_id": None}
+    db = DB(tasks=[task("todo")], rollups=[other])
+
+    asyncio.run(rebuild(db, {"project_id": "p1"}))
+
+    assert other in db.rollups.docs
+    assert len(db.rollups.docs) == 2
+
+
+def test_summarize_adds_nested_counters():
+    rows = [
+        {"project_id": "p1", "tasks": {"total": 2, "status": {"todo": 2}}},
+        {"project_id": "p2", "tasks": {"total": 1, "status": {"done": 1}}},
+    ]
+
+    assert summarize(rows) == {
+        "tasks": {"total": 3, "status": {"todo": 2, "done": 1}}
+    }
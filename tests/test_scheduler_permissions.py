@@ -2,6 +2,7 @@ import os
 import sys
 import types
 import asyncio
+import pymongo
 import pytest
 
 
@@ -15,6 +16,12 @@ def load_server(monkeypatch, tasks_data):
         def __init__(self, result=None):
             self._result = result or []
 
+        def sort(self, key, direction=1):
+            return self
+
+        def limit(self, n):
+            return self
+
         async def to_list(self, length):
             return self._result
 
@@ -27,7 +34,7 @@ def load_server(monkeypatch, tasks_data):
         async def find_one(self, query, session=None):
             return self.find_one_result
 
-        def find(self, query, session=None):
+        def find(self, query, projection=None, session=None):
             return DummyCursor(self.list_result)
 
         async def delete_many(self, filt, session=None):
@@ -36,6 +43,14 @@ def load_server(monkeypatch, tasks_data):
         async def insert_one(self, doc, session=None):
             self.inserted.append(doc)
 
+        async def insert_many(self, docs, ordered=True, session=None):
+            self.inserted.extend(docs)
+
+        async def bulk_write(self, requests, ordered=True, session=None):
+            self.inserted.extend(
+                op._doc for op in requests if isinstance(op, pymongo.InsertOne)
+            )
+
     class DummyDB:
         def __init__(self):
             self.projects = DummyCollection(find_one_result={"id": "p1"})
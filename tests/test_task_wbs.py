@@ -16,6 +16,12 @@ def load_server(monkeypatch, tasks=None):
         def __init__(self, result=None):
             self._result = result or []
 
+        def sort(self, key, direction=1):
+            return self
+
+        def limit(self, n):
+            return self
+
         async def to_list(self, length):
             return self._result
 
@@ -25,20 +31,27 @@ def load_server(monkeypatch, tasks=None):
             self.inserted = []
             self.deleted = []
             self.deleted_one_filters = []
+            self.operations = []
             self.unique_index = None
 
+        @staticmethod
+        def _matches(doc, query):
+            for key, cond in query.items():
+                if isinstance(cond, dict) and "$exists" in cond:
+                    if (key in doc) != cond["$exists"]:
+                        return False
+                elif doc.get(key) != cond:
+                    return False
+            return True
+
         async def find_one(self, query, session=None):
             for doc in self.docs:
-                if all(doc.get(k) == v for k, v in query.items()):
+                if self._matches(doc, query):
                     return doc
             return None
 
-        def find(self, query, session=None):
-            result = [
-                doc
-                for doc in self.docs
-                if all(doc.get(k) == v for k, v in query.items())
-            ]
+        def find(self, query, projection=None, session=None):
+            result = [doc for doc in self.docs if self._matches(doc, query)]
             return DummyCursor(result)
 
         async def insert_one(self, doc, session=None):
@@ -51,6 +64,32 @@ def load_server(monkeypatch, tasks=None):
             self.inserted.append(doc)
             return types.SimpleNamespace(inserted_id=doc.get("id"))
 
+        async def insert_many(self, docs, ordered=True, session=None):
+            for i, doc in enumerate(docs):
+                try:
+                    await self.insert_one(doc, session=session)
+                except pymongo.errors.DuplicateKeyError:
+                    raise pymongo.errors.BulkWriteError(
+                        {"writeErrors": [{"index": i, "code": 11000, "errmsg": "dup"}]}
+                    )
+            return types.SimpleNamespace(inserted_ids=[d.get("id") for d in docs])
+
+        async def bulk_write(self, requests, ordered=True, session=None):
+            self.operations.extend(requests)
+            for i, op in enumerate(requests):
+                if isinstance(op, pymongo.DeleteOne):
+                    await self.delete_one(op._filter, session=session)
+                elif isinstance(op, pymongo.UpdateOne):
+                    doc = await self.find_one(op._filter)
+                    doc.update(op._doc["$set"])
+                else:
+                    try:
+                        await self.insert_one(op._doc, session=session)
+                    except pymongo.errors.DuplicateKeyError:
+                        raise pymongo.errors.BulkWriteError(
+                            {"writeErrors": [{"index": i, "code": 11000, "errmsg": "dup"}]}
+                        )
+
         async def delete_one(self, filt, session=None):
             self.deleted_one_filters.append(filt)
             for i, doc in enumerate(self.docs):
@@ -68,7 +107,7 @@ def load_server(monkeypatch, tasks=None):
             ]
             return types.SimpleNamespace(deleted_count=0)
 
-        async def create_index(self, spec, unique=False):
+        async def create_index(self, spec, unique=False, partialFilterExpression=None):
             if unique:
                 self.unique_index = spec
             return "idx"
@@ -138,7 +177,7 @@ def test_duplicate_task_insertion_raises(monkeypatch):
     server.TaskCreate.model_rebuild(_types_namespace=server.__dict__)
     server.WBSNode.model_rebuild(_types_namespace=server.__dict__)
 
-    asyncio.run(server.ensure_wbs_index())
+    asyncio.run(server.ensure_database_indexes())
     user = types.SimpleNamespace(id="u1", discipline="eng")
     monkeypatch.setattr(server.uuid, "uuid4", lambda: "t1")
     task = server.TaskCreate(title="T", description="d", project_id="p1")
@@ -177,8 +216,158 @@ def test_delete_task_removes_wbs_entry(monkeypatch):
         "created_by": "u1",
     }
     db.wbs.docs.append(node)
-    asyncio.run(server.ensure_wbs_index())
+    asyncio.run(server.ensure_database_indexes())
     user = types.SimpleNamespace(id="u1", discipline="eng")
 
     asyncio.run(server.delete_task("t1", current_user=user))
     assert any(f.get("task_id") == "t1" for f in db.wbs.deleted_one_filters)
+
+
+def test_wbs_regeneration_only_writes_changed_nodes(monkeypatch):
+    tasks = [
+        {
+            "id": f"t{i}",
+            "title": f"T{i}",
+            "description": "d",
+            "discipline": "eng",
+            "project_id": "p1",
+            "created_by": "u1",
+        }
+        for i in range(3)
+    ]
+    server, db = load_server(monkeypatch, tasks)
+    server.Task.model_rebuild(_types_namespace=server.__dict__)
+    server.WBSNode.model_rebuild(_types_namespace=server.__dict__)
+    asyncio.run(server.ensure_database_indexes())
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    first = asyncio.run(server._generate_project_wbs("p1", user))
+    assert len(db.wbs.operations) == 4
+
+    db.wbs.operations.clear()
+    assert asyncio.run(server._generate_project_wbs("p1", user)) == first
+    assert db.wbs.operations == []
+
+    db.tasks.docs[1]["title"] = "Renamed"
+    db.tasks.docs.pop(2)
+    second = asyncio.run(server._generate_project_wbs("p1", user))
+
+    assert [type(op).__name__ for op in db.wbs.operations] == ["DeleteOne", "UpdateOne"]
+    assert db.wbs.operations[1]._doc == {"$set": {"title": "Renamed"}}
+    assert {n.id for n in second} < {n.id for n in first}
+    assert {d["id"] for d in db.wbs.docs} == {n.id for n in second}
+
+
+def test_wbs_regeneration_deletes_duplicate_nodes(monkeypatch):
+    tasks = [
+        {
+            "id": "t1",
+            "title": "T1",
+            "description": "d",
+            "discipline": "eng",
+            "project_id": "p1",
+            "created_by": "u1",
+        }
+    ]
+    server, db = load_server(monkeypatch, tasks)
+    server.Task.model_rebuild(_types_namespace=server.__dict__)
+    server.WBSNode.model_rebuild(_types_namespace=server.__dict__)
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    first = asyncio.run(server._generate_project_wbs("p1", user))
+    task_node = next(d for d in db.wbs.docs if d["task_id"] == "t1")
+    db.wbs.docs.append({**task_node, "id": "stray"})
+    db.wbs.operations.clear()
+    second = asyncio.run(server._generate_project_wbs("p1", user))
+
+    assert [type(op).__name__ for op in db.wbs.operations] == ["DeleteOne"]
+    assert db.wbs.operations[0]._filter == {"id": "stray"}
+    assert [n.id for n in second] == [n.id for n in first]
+
+
+def test_task_edits_regenerate_wbs_in_background(monkeypatch):
+    server, db = load_server(monkeypatch)
+    server.Task.model_rebuild(_types_namespace=server.__dict__)
+    server.TaskCreate.model_rebuild(_types_namespace=server.__dict__)
+    server.WBSNode.model_rebuild(_types_namespace=server.__dict__)
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+    response = server.Response()
+
+    async def scenario():
+        for i in range(3):
+            task = server.TaskCreate(title=f"T{i}", description="d", project_id="p1")
+            await server.create_task(task, response=response, current_user=user)
+        assert db.wbs.docs == []
+        await server.wbs_regeneration.flush(("p1", "eng"))
+        return await server.get_project_wbs_version("p1", current_user=user)
+
+    status = asyncio.run(scenario())
+
+    assert response.headers["X-WBS-Version"] == "1"
+    assert status == {"project_id": "p1", "version": 1, "pending": False}
+    assert len(db.wbs.operations) == 4
+
+
+def test_edits_from_two_disciplines_each_regenerate(monkeypatch):
+    server, db = load_server(monkeypatch)
+    seen = []
+
+    running = []
+
+    async def regenerate(project_id, current_user, session=None, reconcile=True):
+        running.append(project_id)
+        assert running.count(project_id) == 1  # one generation per project
+        await asyncio.sleep(0.01)
+        running.remove(project_id)
+        seen.append((project_id, current_user.discipline))
+
+    monkeypatch.setattr(server, "_build_project_wbs", regenerate)
+    eng = types.SimpleNamespace(id="u1", discipline="eng")
+    civil = types.SimpleNamespace(id="u2", discipline="civil")
+
+    async def scenario():
+        server._schedule_wbs_regeneration("p1", eng)
+        server._schedule_wbs_regeneration("p1", civil)
+        await server.wbs_regeneration.flush()
+
+    asyncio.run(scenario())
+
+    assert sorted(seen) == [("p1", "civil"), ("p1", "eng")]
+    assert server._wbs_locks == {}
+
+
+def test_task_closing_a_dependency_cycle_is_rejected(monkeypatch):
+    server, db = load_server(monkeypatch)
+    server.Task.model_rebuild(_types_namespace=server.__dict__)
+    server.TaskCreate.model_rebuild(_types_namespace=server.__dict__)
+    server.TaskUpdate.model_rebuild(_types_namespace=server.__dict__)
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    async def scenario():
+        first = await server.create_task(
+            server.TaskCreate(title="A", description="d", project_id="p1"),
+            current_user=user,
+        )
+        second = await server.create_task(
+            server.TaskCreate(
+                title="B",
+                description="d",
+                project_id="p1",
+                predecessor_tasks=[first.id],
+            ),
+            current_user=user,
+        )
+        with pytest.raises(server.HTTPException) as exc:
+            await server.update_task(
+                first.id,
+                server.TaskUpdate(predecessor_tasks=[second.id]),
+                current_user=user,
+            )
+        await server.wbs_regeneration.close()
+        return first, exc.value
+
+    first, error = asyncio.run(scenario())
+
+    assert error.status_code == 400
+    [stored] = [d for d in db.tasks.docs if d["id"] == first.id]
+    assert stored["predecessor_tasks"] == []
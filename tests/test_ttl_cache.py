@@ -0,0 +1,149 @@
+import asyncio
+
+from backend.ttl_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    loads = []
+
+    async def loader():
+        loads.append(clock.now)
+        return {"loaded_at": clock.now}
+
+    async def scenario():
+        first = await cache.get_or_load("u1", loader)
+        clock.now = 4
+        second = await cache.get_or_load("u1", loader)
+        clock.now = 6
+        third = await cache.get_or_load("u1", loader)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+
+    assert first is second
+    assert third == {"loaded_at": 6}
+    assert loads == [0, 6]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+
+def test_concurrent_misses_share_one_load():
+    calls = []
+
+    async def scenario():
+        cache = TTLCache(ttl=60)
+        release = asyncio.Event()
+
+        async def loader():
+            calls.append(1)
+            await release.wait()
+            return "user"
+
+        waiters = [
+            asyncio.ensure_future(cache.get_or_load("u1", loader)) for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(scenario()) == ["user"] * 5
+    assert calls == [1]
+
+
+def test_invalidation_during_load_discards_stale_value():
+    async def scenario():
+        cache = TTLCache(ttl=60)
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            return "old"
+
+        pending = asyncio.ensure_future(cache.get_or_load("u1", loader))
+        await asyncio.sleep(0)
+        cache.invalidate("u1")
+        release.set()
+        assert await pending == "old"
+        return cache.get("u1")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_reload_after_invalidation_is_cached():
+    async def scenario():
+        cache = TTLCache(ttl=60)
+        release = asyncio.Event()
+
+        async def stale():
+            await release.wait()
+            return "old"
+
+        async def fresh():
+            return "new"
+
+        pending = asyncio.ensure_future(cache.get_or_load("u1", stale))
+        await asyncio.sleep(0)
+        cache.invalidate("u1")
+        assert await cache.get_or_load("u1", fresh) == "new"
+        release.set()
+        await pending
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert cache.get("u1") == "new"
+    assert cache._loading == {}
+
+
+def test_invalidated_keys_leave_no_bookkeeping():
+    async def load():
+        return "value"
+
+    async def scenario():
+        cache = TTLCache(maxsize=2, ttl=60)
+        for n in range(100):
+            await cache.get_or_load(n, load)
+            cache.invalidate(n)
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert len(cache) == 0
+    assert not any(
+        isinstance(v, dict) and v for v in vars(cache).values()
+    )
+
+
+def test_missing_values_are_not_cached():
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return None
+
+    async def scenario():
+        cache = TTLCache(ttl=60)
+        await cache.get_or_load("ghost", loader)
+        await cache.get_or_load("ghost", loader)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
@@ -0,0 +1,20 @@
+import asyncio
+import io
+
+from fastapi import UploadFile
+
+from backend.uploads import save_upload
+
+
+def upload(data):
+    return UploadFile(io.BytesIO(data), filename="upload.bin")
+
+
+def test_save_upload_writes_every_chunk(tmp_path):
+    data = bytes(range(256)) * 100
+    path = tmp_path / "copy.bin"
+
+    written = asyncio.run(save_upload(upload(data), path, chunk_size=1000))
+
+    assert written == len(data)
+    assert path.read_bytes() == data
@@ -2,7 +2,9 @@ import os
 import sys
 import types
 import asyncio
+import pymongo
 import pytest
+from datetime import datetime
 
 
 def load_server(monkeypatch, tasks_data):
@@ -15,6 +17,12 @@ def load_server(monkeypatch, tasks_data):
         def __init__(self, result=None):
             self._result = result or []
 
+        def sort(self, key, direction=1):
+            return self
+
+        def limit(self, n):
+            return self
+
         async def to_list(self, length):
             return self._result
 
@@ -24,17 +32,32 @@ def load_server(monkeypatch, tasks_data):
             self.list_result = list_result or []
             self.inserted = []
             self.deleted = []
+            self.batches = []
+            self.sessions = []
 
         async def find_one(self, query, session=None):
             return self.find_one_result
 
-        def find(self, query, session=None):
+        def find(self, query, projection=None, session=None):
             return DummyCursor(self.list_result)
 
         async def insert_one(self, doc, session=None):
             self.inserted.append(doc)
+            self.sessions.append(session)
             return types.SimpleNamespace(inserted_id=doc.get("id"))
 
+        async def insert_many(self, docs, ordered=True, session=None):
+            self.batches.append(len(docs))
+            self.inserted.extend(docs)
+            self.sessions.append(session)
+            return types.SimpleNamespace(inserted_ids=[d.get("id") for d in docs])
+
+        async def bulk_write(self, requests, ordered=True, session=None):
+            self.sessions.append(session)
+            self.inserted.extend(
+                op._doc for op in requests if isinstance(op, pymongo.InsertOne)
+            )
+
         async def delete_many(self, filt, session=None):
             self.deleted.append(filt)
 
@@ -139,3 +162,311 @@ def test_wbs_audit_logging(monkeypatch):
         for node in audit["nodes"]
     )
     assert audit["nodes"][0]["created_by"] == "u1"
+
+
+def test_wbs_nodes_written_in_batches_within_session(monkeypatch):
+    tasks = [
+        {
+            "id": f"t{i}",
+            "title": f"Task {i}",
+            "description": "d",
+            "duration_days": 1.0,
+            "predecessor_tasks": [f"t{i - 1}"] if i else [],
+            "discipline": "eng",
+            "project_id": "p1",
+            "created_by": "u1",
+        }
+        for i in range(5)
+    ]
+
+    server, db = load_server(monkeypatch, tasks)
+    server.Task.model_rebuild(_types_namespace=server.__dict__)
+    server.DependencyMetadata.model_rebuild(_types_namespace=server.__dict__)
+    server.WBSNode.model_rebuild(_types_namespace=server.__dict__)
+    monkeypatch.setattr(server, "WBS_WRITE_BATCH_SIZE", 4)
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+    session = object()
+
+    nodes = asyncio.run(
+        server._generate_project_wbs("p1", user, session=session, reconcile=False)
+    )
+
+    assert len(nodes) == 6
+    assert db.wbs.batches == [4, 2]
+    assert [d["id"] for d in db.wbs.inserted] == [n.id for n in nodes]
+    assert set(db.wbs.sessions) == {session}
+    assert db.wbs_audit.sessions == [session]
+
+
+class MemoryCollection:
+    """In-memory stand-in supporting the queries used for WBS history."""
+
+    def __init__(self):
+        self.docs = []
+        self.inserted = []
+        self.sessions = []
+
+    @staticmethod
+    def _matches(doc, query):
+        for key, cond in query.items():
+            value = doc.get(key)
+            if isinstance(cond, dict):
+                checks = {
+                    "$lte": lambda v, c: v is not None and v <= c,
+                    "$lt": lambda v, c: v is not None and v < c,
+                    "$gt": lambda v, c: v is not None and v > c,
+                    "$exists": lambda v, c: (v is not None) == c,
+                }
+                if not all(checks[op](value, c) for op, c in cond.items()):
+                    return False
+            elif value != cond:
+                return False
+        return True
+
+    def find(self, query, projection=None, session=None):
+        collection = self
+
+        class Cursor:
+            def __init__(self):
+                self._docs = [d for d in collection.docs if collection._matches(d, query)]
+
+            def sort(self, key, direction=1):
+                self._docs.sort(key=lambda d: d[key], reverse=direction < 0)
+                return self
+
+            def limit(self, n):
+                self._docs = self._docs[:n]
+                return self
+
+            async def to_list(self, length):
+                return list(self._docs)
+
+        return Cursor()
+
+    async def insert_one(self, doc, session=None):
+        self.docs.append(doc)
+        self.inserted.append(doc)
+        self.sessions.append(session)
+
+    async def update_one(self, filt, update, session=None):
+        doc = next(d for d in self.docs if self._matches(d, filt))
+        doc.update(update["$set"])
+
+    async def delete_many(self, filt, session=None):
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if not self._matches(d, filt)]
+        return types.SimpleNamespace(deleted_count=before - len(self.docs))
+
+    async def bulk_write(self, requests, ordered=True, session=None):
+        for op in requests:
+            if isinstance(op, pymongo.InsertOne):
+                self.docs.append(op._doc)
+            elif isinstance(op, pymongo.UpdateOne):
+                doc = next(d for d in self.docs if self._matches(d, op._filter))
+                doc.update(op._doc["$set"])
+            else:
+                await self.delete_many(op._filter)
+
+
+def test_wbs_audit_stores_deltas_and_reconstructs_versions(monkeypatch):
+    tasks = [
+        {
+            "id": f"t{i}",
+            "title": f"Task {i}",
+            "description": "d",
+            "duration_days": 1.0,
+            "predecessor_tasks": [],
+            "discipline": "eng",
+            "project_id": "p1",
+            "created_by": "u1",
+        }
+        for i in range(3)
+    ]
+    server, db = load_server(monkeypatch, tasks)
+    server.Task.model_rebuild(_types_namespace=server.__dict__)
+    server.DependencyMetadata.model_rebuild(_types_namespace=server.__dict__)
+    server.WBSNode.model_rebuild(_types_namespace=server.__dict__)
+    db.wbs = MemoryCollection()
+    db.wbs_audit = MemoryCollection()
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    async def scenario():
+        generated = []
+        for duration in (1.0, 1.0, 4.0, 2.0):
+            tasks[1]["duration_days"] = duration
+            nodes = await server._generate_project_wbs("p1", user)
+            generated.append([n.model_dump() for n in nodes])
+        return generated
+
+    generated = asyncio.run(scenario())
+    records = db.wbs_audit.docs
+
+    # the unchanged second run is not recorded
+    assert [(r["version"], r["kind"]) for r in records] == [
+        (1, "snapshot"),
+        (2, "delta"),
+        (3, "delta"),
+    ]
+    # node ids are stable, so deltas only carry field-level changes
+    node_paths = [op["path"] for op in records[2]["patch"] if op["path"].startswith("/nodes")]
+    assert node_paths and all(p.count("/") == 3 for p in node_paths)
+
+    server._wbs_audit_heads.clear()
+    version_2 = asyncio.run(server.get_wbs_audit_version("p1", 2, current_user=user))
+    assert version_2["nodes"] == generated[2]
+    assert version_2["inference_logs"]["metrics"]["t1"]["duration"] == 4.0
+
+    versions = asyncio.run(server.list_wbs_audit_versions("p1", current_user=user))
+    assert [v["version"] for v in versions] == [1, 2, 3]
+
+
+def test_wbs_audit_compaction_keeps_retained_versions(monkeypatch):
+    tasks = [
+        {
+            "id": "t1",
+            "title": "Task 1",
+            "description": "d",
+            "duration_days": 1.0,
+            "predecessor_tasks": [],
+            "discipline": "eng",
+            "project_id": "p1",
+            "created_by": "u1",
+        }
+    ]
+    server, db = load_server(monkeypatch, tasks)
+    server.Task.model_rebuild(_types_namespace=server.__dict__)
+    server.DependencyMetadata.model_rebuild(_types_namespace=server.__dict__)
+    server.WBSNode.model_rebuild(_types_namespace=server.__dict__)
+    db.wbs = MemoryCollection()
+    db.wbs_audit = MemoryCollection()
+    monkeypatch.setattr(server, "WBS_AUDIT_SNAPSHOT_INTERVAL", 3)
+    monkeypatch.setattr(server, "WBS_AUDIT_RETENTION_VERSIONS", 4)
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    async def scenario():
+        for i in range(10):
+            tasks[0]["duration_days"] = float(i + 1)
+            await server._generate_project_wbs("p1", user)
+
+    asyncio.run(scenario())
+
+    kept = [r["version"] for r in db.wbs_audit.docs]
+    # snapshots at 1, 4, 7 and 10; 7 is the newest one before version 7
+    assert kept == [7, 8, 9, 10]
+    with pytest.raises(server.HTTPException):
+        asyncio.run(server.get_wbs_audit_version("p1", 6, current_user=user))
+    restored = asyncio.run(server.get_wbs_audit_version("p1", 8, current_user=user))
+    assert restored["inference_logs"]["metrics"]["t1"]["duration"] == 8.0
+
+
+def test_wbs_audit_ignores_dependency_timestamps(monkeypatch):
+    tasks = [
+        {
+            "id": f"t{i}",
+            "title": f"Task {i}",
+            "description": "d",
+            "duration_days": 1.0,
+            "predecessor_tasks": [f"t{i - 1}"] if i else [],
+            "discipline": "eng",
+            "project_id": "p1",
+            "created_by": "u1",
+        }
+        for i in range(3)
+    ]
+    server, db = load_server(monkeypatch, tasks)
+    server.Task.model_rebuild(_types_namespace=server.__dict__)
+    server.DependencyMetadata.model_rebuild(_types_namespace=server.__dict__)
+    server.WBSNode.model_rebuild(_types_namespace=server.__dict__)
+    db.wbs = MemoryCollection()
+    db.wbs_audit = MemoryCollection()
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    async def scenario():
+        await server._generate_project_wbs("p1", user)
+        await server._generate_project_wbs("p1", user)
+
+    asyncio.run(scenario())
+
+    [record] = db.wbs_audit.docs
+    deps = [d for n in record["nodes"] for d in n["dependency_metadata"]]
+    assert deps and all("timestamp" not in d for d in deps)
+
+
+def test_wbs_audit_head_follows_stored_versions(monkeypatch):
+    tasks = [
+        {
+            "id": "t1",
+            "title": "Task 1",
+            "description": "d",
+            "duration_days": 1.0,
+            "predecessor_tasks": [],
+            "discipline": "eng",
+            "project_id": "p1",
+            "created_by": "u1",
+        }
+    ]
+    server, db = load_server(monkeypatch, tasks)
+    server.Task.model_rebuild(_types_namespace=server.__dict__)
+    server.DependencyMetadata.model_rebuild(_types_namespace=server.__dict__)
+    server.WBSNode.model_rebuild(_types_namespace=server.__dict__)
+    db.wbs = MemoryCollection()
+    db.wbs_audit = MemoryCollection()
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    async def scenario():
+        await server._generate_project_wbs("p1", user)
+        # a head cached from a write that was later rolled back
+        server._wbs_audit_heads["p1"] = (5, 1, {"order": [], "nodes": {}})
+        tasks[0]["duration_days"] = 2.0
+        await server._generate_project_wbs("p1", user)
+
+    asyncio.run(scenario())
+
+    assert [r["version"] for r in db.wbs_audit.docs] == [1, 2]
+    node_paths = [op["path"] for op in db.wbs_audit.docs[1]["patch"]]
+    assert all(p.count("/") == 3 for p in node_paths if p.startswith("/nodes"))
+
+
+def test_versionless_audit_records_are_folded_into_history(monkeypatch):
+    tasks = [
+        {
+            "id": "t1",
+            "title": "Task 1",
+            "description": "d",
+            "duration_days": 1.0,
+            "predecessor_tasks": [],
+            "discipline": "eng",
+            "project_id": "p1",
+            "created_by": "u1",
+        }
+    ]
+    server, db = load_server(monkeypatch, tasks)
+    server.Task.model_rebuild(_types_namespace=server.__dict__)
+    server.DependencyMetadata.model_rebuild(_types_namespace=server.__dict__)
+    server.WBSNode.model_rebuild(_types_namespace=server.__dict__)
+    db.wbs = MemoryCollection()
+    db.wbs_audit = MemoryCollection()
+    legacy = {"critical_path": ["t1"], "metrics": {"t1": {"duration": 3.0}}}
+    db.wbs_audit.docs = [
+        {
+            "_id": i,
+            "project_id": "p1",
+            "timestamp": datetime(2024, 1, i + 1),
+            "created_by": "u1",
+            "nodes": [],
+            "inference_logs": legacy,
+        }
+        for i in range(3)
+    ]
+    user = types.SimpleNamespace(id="u1", discipline="eng")
+
+    deleted = asyncio.run(server.compact_wbs_audit("p1"))
+
+    assert deleted == 2
+    [record] = db.wbs_audit.docs
+    assert (record["_id"], record["version"], record["kind"]) == (2, 1, "snapshot")
+
+    asyncio.run(server._generate_project_wbs("p1", user))
+    assert [r["version"] for r in db.wbs_audit.docs] == [1, 2]
+    restored = asyncio.run(server.get_wbs_audit_version("p1", 1, current_user=user))
+    assert restored["inference_logs"] == legacy
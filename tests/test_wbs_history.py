@@ -0,0 +1,36 @@
+from backend.wbs_history import apply_patch, audit_state, diff, state_nodes
+
+
+def test_diff_only_touches_changed_fields():
+    old = audit_state(
+        [{"id": "a", "title": "A", "early_start": 0.0}, {"id": "b/1", "title": "B"}],
+        {"critical_path": ["a"], "metrics": {"a": {"early_start": 0.0}}},
+    )
+    new = audit_state(
+        [{"id": "a", "title": "A", "early_start": 2.0}, {"id": "c", "title": "C"}],
+        {"critical_path": ["a"], "metrics": {"a": {"early_start": 2.0}}},
+    )
+
+    ops = diff(old, new)
+
+    assert {op["path"] for op in ops} == {
+        "/order",
+        "/nodes/b~11",
+        "/nodes/a/early_start",
+        "/nodes/c",
+        "/inference_logs/metrics/a/early_start",
+    }
+    assert apply_patch(old, ops) == new
+    assert [n["id"] for n in state_nodes(apply_patch(old, ops))] == ["a", "c"]
+
+
+def test_apply_patch_leaves_input_untouched():
+    old = {"nodes": {"a": {"title": "A"}}}
+    patched = apply_patch(old, [{"op": "replace", "path": "/nodes/a/title", "value": "Z"}])
+    assert old == {"nodes": {"a": {"title": "A"}}}
+    assert patched == {"nodes": {"a": {"title": "Z"}}}
+
+
+def test_identical_states_have_empty_diff():
+    state = audit_state([{"id": "a"}], {"critical_path": None, "metrics": None})
+    assert diff(state, audit_state([{"id": "a"}], dict(state["inference_logs"]))) == []